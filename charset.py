@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+页面字符集识别
+优先使用响应头和<meta>中声明的字符集，都没有时才做检测，
+检测结果按主机和路径前缀缓存，同一栏目的页面只检测一次
+"""
+
+import re
+import codecs
+import threading
+from urllib.parse import urlsplit
+import chardet
+
+HEADER_CHARSET_PATTERN = re.compile(r'charset\s*=\s*["\']?([\w.:-]+)', re.I)
+META_CHARSET_PATTERN = re.compile(rb'<meta[^>]+charset\s*=\s*["\']?([\w.:-]+)', re.I)
+
+# <meta>声明只在文档开头查找
+META_SCAN_BYTES = 4096
+# 检测只使用开头的一段内容
+DETECT_SAMPLE_BYTES = 32 * 1024
+
+
+def normalize_encoding(name):
+    """规范化编码名称，无法识别返回None；GB2312/GBK统一按超集GB18030解码"""
+    if not name:
+        return None
+    try:
+        encoding = codecs.lookup(name.strip()).name
+    except LookupError:
+        return None
+    if encoding in ('gb2312', 'gbk'):
+        return 'gb18030'
+    return encoding
+
+
+def decodes_cleanly(content, encoding):
+    """内容能否按该编码无错误解码（末尾被截断的多字节字符不算错误）"""
+    try:
+        codecs.getincrementaldecoder(encoding)().decode(content[:DETECT_SAMPLE_BYTES], final=False)
+        return True
+    except UnicodeDecodeError:
+        return False
+
+
+class CharsetDetector:
+    def __init__(self, prefix_depth=1):
+        """
+        prefix_depth: 缓存键使用的路径段数，如 www.xuhui.gov.cn/xxgk
+        """
+        self.prefix_depth = prefix_depth
+        self._cache = {}
+        self._lock = threading.Lock()
+
+    def _prefix(self, url):
+        """主机加路径前缀"""
+        parts = urlsplit(url)
+        segments = [s for s in parts.path.split('/') if s][:self.prefix_depth]
+        return '/'.join([parts.netloc.lower()] + segments)
+
+    def detect(self, url, content, content_type=''):
+        """确定页面编码：响应头声明 > <meta>声明 > utf-8校验 > 按前缀缓存的检测结果 > 检测"""
+        match = HEADER_CHARSET_PATTERN.search(content_type or '')
+        encoding = normalize_encoding(match.group(1)) if match else None
+        if encoding:
+            return encoding
+
+        match = META_CHARSET_PATTERN.search(content[:META_SCAN_BYTES])
+        encoding = normalize_encoding(match.group(1).decode('ascii', 'ignore')) if match else None
+        if encoding:
+            return encoding
+
+        # utf-8 校验很快，且GBK内容几乎不可能恰好是合法的utf-8
+        if decodes_cleanly(content, 'utf-8'):
+            return 'utf-8'
+
+        prefix = self._prefix(url)
+        with self._lock:
+            cached = self._cache.get(prefix)
+        if cached and decodes_cleanly(content, cached):
+            return cached
+
+        guess = chardet.detect(content[:DETECT_SAMPLE_BYTES])
+        encoding = normalize_encoding(guess.get('encoding')) or 'utf-8'
+
+        with self._lock:
+            self._cache[prefix] = encoding
+        return encoding
+
+    def decode(self, url, content, content_type=''):
+        """将原始字节解码为文本"""
+        return content.decode(self.detect(url, content, content_type), errors='replace')
+
+
+# 所有抓取结果共用一个检测器，检测缓存在整个进程内有效
+default_detector = CharsetDetector()
+
+
+def decode_html(url, content, content_type=''):
+    """使用共享检测器解码页面"""
+    return default_detector.decode(url, content, content_type)
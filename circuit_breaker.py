@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+按主机的熔断器
+连续失败达到阈值后熔断，在冷却时间内对该主机的请求直接失败，冷却后放行一次试探请求；
+allow() 放行的请求必须以 record_success、record_failure 或 release 之一结束，否则试探期不会结束
+"""
+
+import time
+import threading
+from urllib.parse import urlparse
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._hosts = {}
+        self._lock = threading.Lock()
+
+    def _state_for(self, url):
+        """获取主机的熔断状态（调用方需持有锁）"""
+        host = urlparse(url).netloc.lower()
+        if host not in self._hosts:
+            self._hosts[host] = {'state': CLOSED, 'failures': 0, 'opened_at': 0.0}
+        return self._hosts[host]
+
+    def allow(self, url):
+        """是否允许向该主机发出请求"""
+        with self._lock:
+            host_state = self._state_for(url)
+            if host_state['state'] == CLOSED:
+                return True
+            if host_state['state'] == OPEN and time.monotonic() - host_state['opened_at'] >= self.reset_timeout:
+                # 冷却结束，只放行一个试探请求
+                host_state['state'] = HALF_OPEN
+                return True
+            return False
+
+    def record_success(self, url):
+        """记录一次成功，恢复为闭合状态"""
+        with self._lock:
+            host_state = self._state_for(url)
+            host_state['state'] = CLOSED
+            host_state['failures'] = 0
+
+    def record_failure(self, url):
+        """记录一次失败，达到阈值或试探失败时熔断"""
+        with self._lock:
+            host_state = self._state_for(url)
+            host_state['failures'] += 1
+            if host_state['state'] == HALF_OPEN or host_state['failures'] >= self.failure_threshold:
+                host_state['state'] = OPEN
+                host_state['opened_at'] = time.monotonic()
+
+    def release(self, url):
+        """放行后未发出的请求（已到截止时间或预算用完）：试探请求作废，主机重新熔断并重新计算冷却时间"""
+        with self._lock:
+            host_state = self._state_for(url)
+            if host_state['state'] == HALF_OPEN:
+                host_state['state'] = OPEN
+                host_state['opened_at'] = time.monotonic()
+
+    def open_hosts(self):
+        """当前处于熔断状态的主机"""
+        with self._lock:
+            return [host for host, host_state in self._hosts.items() if host_state['state'] != CLOSED]
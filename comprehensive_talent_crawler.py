@@ -5,23 +5,67 @@
 覆盖更全面的政策来源，重点关注企业申报要求
 """
 
-import requests
 import re
 import json
-import time
 import pandas as pd
-from bs4 import BeautifulSoup
 from datetime import datetime
-from urllib.parse import urljoin, urlparse
+from urllib.parse import urljoin
 import os
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from fetch_engine import default_engine
+from crawl_frontier import CrawlFrontier
+from content_templates import ContentTemplates
+from pagination import PaginationWalker
+from link_priority import anchor_date, top_links
+from url_canon import canonical_url, policy_id
+from documents import parse_html
+from list_parser import parse_links, candidate_anchors
+from keyword_matcher import KeywordMatcher, keyword_matcher, score_categories
+from detail_metadata import parse_detail_metadata
 
 class ComprehensiveTalentCrawler:
-    def __init__(self):
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
-        })
+    def __init__(self, engine=None, frontier=None, transport='http1', templates=None):
+        # 共享抓取引擎：并发抓取、按主机限制并发，响应缓存到磁盘
+        # transport: 'http1' 或 'http2'（服务器支持时多路复用同一连接）
+        self.engine = engine or default_engine(transport=transport)
+        # 抓取前沿：记录已抓过的详情页，增量运行时只抓新页面和到期页面
+        self.frontier = frontier or CrawlFrontier('comprehensive_talent')
+        # 正文提取模板：按主机和URL模式记住取到正文的选择器，新页面结构才完整尝试
+        self.templates = templates or ContentTemplates('comprehensive_talent')
+        # 部门列表页自动翻页，第1页未变化时跳过其余页面
+        self.pagination = PaginationWalker(self.engine, frontier=self.frontier)
+        
+        # 政务公开各部门代码，列表页由翻页器自动识别页数
+        self.department_codes = [
+            # 政务公开 - 规范性文件
+            "xhxxgk_wbj_zcwj",
+            
+            # 人力资源和社会保障局
+            "xhxxgk_wbj_rshbj",
+            
+            # 住房保障和房屋管理局
+            "xhxxgk_wbj_zfbzj",
+            
+            # 科学技术委员会
+            "xhxxgk_wbj_kjw",
+            
+            # 教育局
+            "xhxxgk_wbj_jyj",
+            
+            # 发展和改革委员会
+            "xhxxgk_wbj_fgw",
+            
+            # 商务委员会
+            "xhxxgk_wbj_sww",
+            
+            # 通知公告
+            "xhxxgk_wbj_gggs",
+            
+            # 徐汇区新型工业化推进办公室
+            "xhxxgk_wbj_xgybgs",
+            
+            # 更多的政策页面
+            "xhxxgk_wbj_xxgyhb",
+        ]
         
         # 更全面的徐汇区人才政策URL
         self.urls = [
@@ -30,34 +74,20 @@ class ComprehensiveTalentCrawler:
             "https://www.xuhui.gov.cn/zcfg/sfxwj/",
             "https://www.xuhui.gov.cn/zcfg/qfxwj/",
             
-            # 政务公开 - 规范性文件
-            "https://www.xuhui.gov.cn/xxgk/portal/article/organizationArticle?code=xhxxgk_wbj_zcwj",
-            
             # 人力资源和社会保障局
             "https://www.xuhui.gov.cn/renshebao/",
-            "https://www.xuhui.gov.cn/xxgk/portal/article/organizationArticle?code=xhxxgk_wbj_rshbj",
             
             # 住房保障和房屋管理局
             "https://www.xuhui.gov.cn/fangtuju/",
-            "https://www.xuhui.gov.cn/xxgk/portal/article/organizationArticle?code=xhxxgk_wbj_zfbzj",
             
             # 科学技术委员会
             "https://www.xuhui.gov.cn/kejiju/",
-            "https://www.xuhui.gov.cn/xxgk/portal/article/organizationArticle?code=xhxxgk_wbj_kjw",
             
             # 教育局
             "https://www.xuhui.gov.cn/jiaoyu/",
-            "https://www.xuhui.gov.cn/xxgk/portal/article/organizationArticle?code=xhxxgk_wbj_jyj",
-            
-            # 发展和改革委员会
-            "https://www.xuhui.gov.cn/xxgk/portal/article/organizationArticle?code=xhxxgk_wbj_fgw",
-            
-            # 商务委员会
-            "https://www.xuhui.gov.cn/xxgk/portal/article/organizationArticle?code=xhxxgk_wbj_sww",
             
             # 通知公告
             "https://www.xuhui.gov.cn/tzgg/",
-            "https://www.xuhui.gov.cn/xxgk/portal/article/organizationArticle?code=xhxxgk_wbj_gggs",
             
             # 直接搜索人才政策相关页面
             "https://www.xuhui.gov.cn/ztlm/",  # 专题专栏
@@ -65,12 +95,6 @@ class ComprehensiveTalentCrawler:
             
             # 徐汇区新型工业化推进办公室
             "https://www.xuhui.gov.cn/xgybgs/",
-            "https://www.xuhui.gov.cn/xxgk/portal/article/organizationArticle?code=xhxxgk_wbj_xgybgs",
-            
-            # 更多的政策页面
-            "https://www.xuhui.gov.cn/xxgk/portal/article/organizationArticle?code=xhxxgk_wbj_xxgyhb&page=1",
-            "https://www.xuhui.gov.cn/xxgk/portal/article/organizationArticle?code=xhxxgk_wbj_xxgyhb&page=2",
-            "https://www.xuhui.gov.cn/xxgk/portal/article/organizationArticle?code=xhxxgk_wbj_xxgyhb&page=3",
         ]
         
         # 更详细的人才关键词
@@ -125,26 +149,26 @@ class ComprehensiveTalentCrawler:
             "企业要求", "用人单位条件", "雇主条件", "招聘企业"
         ]
         
+        # 关键词匹配器只建一次，筛选链接、判断内容时直接使用
+        self.talent_matcher = KeywordMatcher(self.talent_keywords)
+        self.link_matcher = KeywordMatcher(
+            self.talent_keywords + self.company_keywords +
+            ['人才', '住房', '落户', '博士', '硕士', '专家', '引进', '补贴', '公寓']
+        )
+        self.meaningful_matcher = KeywordMatcher(['人才', '住房', '落户', '博士', '硕士', '补贴', '公寓', '引进'])
+        
         self.policies = []
 
     def fetch_page(self, url):
         """获取页面内容"""
-        try:
-            print(f"正在爬取: {url}")
-            response = self.session.get(url, timeout=15)
-            response.raise_for_status()
-            response.encoding = 'utf-8'
-            return response.text
-        except Exception as e:
-            print(f"获取页面失败 {url}: {e}")
-            return None
+        return self.engine.fetch_text(url)
 
     def extract_links_from_page(self, html, base_url):
         """从页面提取相关链接"""
         if not html:
             return []
         
-        soup = BeautifulSoup(html, 'html.parser')
+        soup = parse_links(html)
         links = []
         
         # 多种链接选择器
@@ -162,43 +186,36 @@ class ComprehensiveTalentCrawler:
             '.content a'
         ]
         
-        found_links = []
-        for selector in selectors:
-            found_links.extend(soup.select(selector))
+        # 一次遍历所有链接：按最先匹配的选择器和文档顺序排列，每个链接只提取一次文字
+        found_links = candidate_anchors(soup, selectors)
         
         # 过滤和识别人才相关链接
         seen_hrefs = set()
-        for a in found_links:
-            href = a.get('href')
-            title = a.get_text(strip=True)
-            
+        for a, href, title in found_links:
             if href and href not in seen_hrefs and len(title) > 3:
                 # 检查是否与人才相关
-                is_talent_related = (
-                    any(keyword in title for keyword in self.talent_keywords) or
-                    any(keyword in title for keyword in self.company_keywords) or
-                    '人才' in title or '住房' in title or '落户' in title or 
-                    '博士' in title or '硕士' in title or '专家' in title or
-                    '引进' in title or '补贴' in title or '公寓' in title
-                )
+                is_talent_related = self.link_matcher.contains_any(title)
                 
                 if is_talent_related:
-                    full_url = urljoin(base_url, href)
+                    full_url = canonical_url(urljoin(base_url, href))
                     links.append({
                         'title': title,
-                        'url': full_url
+                        'url': full_url,
+                        'date': anchor_date(a),
+                        'source': base_url
                     })
                     seen_hrefs.add(href)
         
         return links
 
-    def extract_content_from_url(self, url):
+    def extract_content_from_url(self, url, html=None):
         """从URL提取内容"""
-        html = self.fetch_page(url)
+        if html is None:
+            html = self.fetch_page(url)
         if not html:
             return None
         
-        soup = BeautifulSoup(html, 'html.parser')
+        soup = parse_html(html)
         
         # 提取标题
         title = ""
@@ -214,66 +231,30 @@ class ComprehensiveTalentCrawler:
                     title = candidate_title
                     break
         
-        # 提取内容
-        content = ""
+        # 提取内容：同类页面直接用学到的选择器，新页面结构才依次尝试各选择器和 body 全文
         content_selectors = [
             '.content', '.art-content', '.main-content', '.policy-content',
             '[class*="content"]', '.main', 'article', '.detail', '.text', '.body'
         ]
-        for selector in content_selectors:
-            elem = soup.select_one(selector)
-            if elem:
-                # 移除导航等无关元素
-                for nav in elem.select('nav, .nav, .menu, .breadcrumb, .pagination, .sidebar'):
-                    nav.decompose()
-                content = elem.get_text(strip=True)
-                if len(content) > 200:
-                    break
-        
-        if not content or len(content) < 100:
-            body = soup.find('body')
-            if body:
-                for elem in body.select('nav, .nav, .menu, .sidebar, .footer, .header, .breadcrumb'):
-                    elem.decompose()
-                content = body.get_text(strip=True)
-        
-        # 提取时间
-        publish_date = ""
-        date_patterns = [
-            r'(\d{4}[-年]\d{1,2}[-月]\d{1,2}[日]?)',
-            r'(\d{4}/\d{1,2}/\d{1,2})',
-            r'(\d{4}\.\d{1,2}\.\d{1,2})',
-            r'发布时间[：:]\s*(\d{4}[-年]\d{1,2}[-月]\d{1,2})',
-            r'时间[：:]\s*(\d{4}[-年]\d{1,2}[-月]\d{1,2})'
-        ]
-        
-        for pattern in date_patterns:
-            match = re.search(pattern, content + title)
-            if match:
-                publish_date = match.group(1)
-                break
-        
-        # 提取部门
-        department = ""
-        dept_patterns = [
-            r'发布机构[：:]\s*([^，。；！？\n]+)',
-            r'发布部门[：:]\s*([^，。；！？\n]+)',
-            r'(徐汇区[^，。；！？\n]*?[局|委|办|中心|部|处])',
-            r'(上海市徐汇区[^，。；！？\n]*?[局|委|办|中心|部|处])'
-        ]
+        content = self.templates.extract(
+            url, soup, content_selectors,
+            remove='nav, .nav, .menu, .breadcrumb, .pagination, .sidebar',
+            body_remove='nav, .nav, .menu, .sidebar, .footer, .header, .breadcrumb'
+        )
         
-        for pattern in dept_patterns:
-            match = re.search(pattern, content + title)
-            if match:
-                department = match.group(1).strip()
-                break
+        # 提取时间、部门、发文字号、索引号和主题分类：从详情页头部字段读取
+        metadata = parse_detail_metadata(soup, title, content)
         
         return {
             'title': title,
             'url': url,
+            'policy_id': policy_id(url),
             'content': content[:8000],  # 增加内容长度
-            'publish_date': publish_date,
-            'department': department,
+            'publish_date': metadata['publish_date'],
+            'department': metadata['department'],
+            'document_number': metadata['document_number'],
+            'index_number': metadata['index_number'],
+            'subject': metadata['subject'],
             'crawl_time': datetime.now().isoformat()
         }
 
@@ -307,16 +288,8 @@ class ComprehensiveTalentCrawler:
             ]
         }
         
-        # 计算得分
-        category_scores = {}
-        for category, keywords in categories.items():
-            score = 0
-            for keyword in keywords:
-                if keyword in policy['title']:
-                    score += 3
-                if keyword in policy['content']:
-                    score += 1
-            category_scores[category] = score
+        # 计算得分：标题中出现的关键词3分，内容中1分
+        category_scores = score_categories(categories, policy['title'], policy['content'])
         
         if category_scores:
             best_category = max(category_scores, key=category_scores.get)
@@ -355,20 +328,19 @@ class ComprehensiveTalentCrawler:
         }
         
         requirements = {}
+        # 按句子分割，每个句子只扫描一遍，得到其中出现的所有关键词
+        sentences = [sentence.strip() for sentence in re.split(r'[。！？；\n]', text)]
+        matcher = keyword_matcher([k for keywords in requirement_patterns.values() for k in keywords])
+        sentence_hits = [matcher.found(s) if 15 < len(s) < 500 else set() for s in sentences]
+        
         for req_type, keywords in requirement_patterns.items():
             found_items = []
             
-            # 按句子分割并搜索
-            sentences = re.split(r'[。！？；\n]', text)
-            for sentence in sentences:
-                sentence = sentence.strip()
-                if len(sentence) > 15 and len(sentence) < 500:
-                    for keyword in keywords:
-                        if keyword in sentence:
-                            # 过滤无效句子
-                            if not sentence.startswith(('首页', '返回', '上一页', '下一页', '点击')):
-                                found_items.append(sentence)
-                                break
+            for sentence, found in zip(sentences, sentence_hits):
+                if not found.isdisjoint(keywords):
+                    # 过滤无效句子
+                    if not sentence.startswith(('首页', '返回', '上一页', '下一页', '点击')):
+                        found_items.append(sentence)
             
             # 去重并限制数量
             unique_items = []
@@ -384,43 +356,60 @@ class ComprehensiveTalentCrawler:
         
         return requirements
 
-    def crawl_policies(self):
-        """爬取政策"""
-        print("开始全面爬取徐汇区企业人才政策...")
-        print(f"将爬取 {len(self.urls)} 个政策源")
-        
-        os.makedirs('data', exist_ok=True)
-        
+    def collect_links(self, list_pages, documents=None):
+        """
+        从列表页收集相关链接，按政策ID去重并记入抓取前沿
+        documents: 多个爬虫配置共用的 DocumentCache（见 multi_profile_crawler.py）
+        """
         all_links = []
-        
-        # 第一步：从各个页面收集链接
-        for url in self.urls:
-            html = self.fetch_page(url)
-            if html:
-                links = self.extract_links_from_page(html, url)
-                all_links.extend(links)
-                if links:
-                    print(f"从 {url} 获取到 {len(links)} 个相关链接")
-            time.sleep(1)
-        
-        # 第二步：去重
+        for url, result in list_pages:
+            # 链接集合与上次相同的列表页直接沿用上次提取的链接
+            links = self.frontier.list_links(url, result, self.extract_links_from_page, documents)
+            all_links.extend(links)
+            if links:
+                print(f"从 {url} 获取到 {len(links)} 个相关链接")
+        
+        # 按政策ID去重，同一政策的不同URL写法只保留一个
         unique_links = []
-        seen_urls = set()
+        seen_ids = set()
         for link in all_links:
-            if link['url'] not in seen_urls:
+            if policy_id(link['url']) not in seen_ids:
                 unique_links.append(link)
-                seen_urls.add(link['url'])
+                seen_ids.add(policy_id(link['url']))
         
         print(f"去重后共找到 {len(unique_links)} 个人才相关链接")
-        
-        # 第三步：提取详细内容（增加到80个）
-        target_links = unique_links[:80]
-        print(f"将详细爬取前 {len(target_links)} 个政策")
-        
+        self.frontier.mark_seen(unique_links)
+        return unique_links
+
+    def detail_candidates(self, unique_links):
+        """需要提取详细内容的链接（增加到80个），按标题关键词、列表日期和来源部门优先"""
+        target_links = top_links(unique_links, 80, self.talent_matcher)
+        print(f"将按优先级详细爬取 {len(target_links)} 个政策")
+        return target_links
+
+    def process_detail_pages(self, target_links, detail_pages, documents=None):
+        """
+        提取详细内容，只保留有实际内容的政策
+        detail_pages: {url: FetchResult}，不在其中的链接沿用上次结果
+        """
         for i, link in enumerate(target_links, 1):
             print(f"正在处理第 {i}/{len(target_links)} 个: {link['title'][:50]}...")
             
-            policy = self.extract_content_from_url(link['url'])
+            if link['url'] not in detail_pages:
+                policy = self.frontier.get_record(link['url'])
+                if policy:
+                    self.policies.append(policy)
+                    print(f"  ♻️  沿用上次结果 (分类: {policy['category']})")
+                continue
+            
+            result = detail_pages[link['url']]
+            if not result.ok:
+                self.frontier.mark_failed(link['url'])
+                continue
+            
+            saved = None
+            html = documents.parse(link['url'], result.text) if documents is not None else result.text
+            policy = self.extract_content_from_url(link['url'], html)
             if policy and len(policy['content']) > 200:
                 policy['category'] = self.classify_policy(policy)
                 policy['company_requirements'] = self.extract_company_requirements(policy)
@@ -429,19 +418,48 @@ class ComprehensiveTalentCrawler:
                 has_meaningful_content = (
                     len(policy['content']) > 500 or
                     any(len(v.strip()) > 20 for v in policy['company_requirements'].values() if v) or
-                    any(keyword in policy['title'] + policy['content'] for keyword in 
-                        ['人才', '住房', '落户', '博士', '硕士', '补贴', '公寓', '引进'])
+                    self.meaningful_matcher.contains_any(policy['title'] + policy['content'])
                 )
                 
                 if has_meaningful_content:
                     self.policies.append(policy)
+                    saved = policy
                     print(f"  ✅ 已保存 (分类: {policy['category']})")
                 else:
                     print(f"  ❌ 跳过 (内容不足)")
             
-            time.sleep(1)
+            self.frontier.mark_fetched(link['url'], result.content, saved)
+
+    def crawl_policies(self, deadline=None, budget=None):
+        """爬取政策"""
+        # deadline: 整次爬取的时间预算（秒）；budget: 爬取预算（CrawlBudget），见 FetchEngine.set_deadline / set_budget
+        self.engine.set_deadline(deadline)
+        self.engine.set_budget(budget)
+        print("开始全面爬取徐汇区企业人才政策...")
+        print(f"将爬取 {len(self.department_codes)} 个部门列表和 {len(self.urls)} 个政策源")
+        
+        os.makedirs('data', exist_ok=True)
+        
+        # 第一步：并发抓取各个页面并收集链接，部门列表自动翻页
+        list_pages = self.pagination.walk(self.department_codes)
+        section_pages = self.engine.fetch_many(self.urls)
+        list_pages += [(url, section_pages[url]) for url in self.urls]
+        
+        # 第二步：收集链接并去重
+        unique_links = self.collect_links(list_pages)
+        
+        # 第三步：提取详细内容
+        # 只抓取从未抓过或已到刷新时间的详情页，其余沿用上次结果；已到截止时间或预算用完时不再抓取
+        target_links = self.detail_candidates(unique_links)
+        due_links = [] if self.engine.should_stop() else self.frontier.due(target_links)
+        print(f"其中 {len(due_links)} 个需要抓取，{len(target_links) - len(due_links)} 个沿用上次结果")
+        
+        detail_pages = self.engine.fetch_many([link['url'] for link in due_links])
+        self.process_detail_pages(target_links, detail_pages)
         
+        self.engine.report_stop_reason()
         print(f"\n🎯 成功爬取 {len(self.policies)} 个人才政策")
+        self.engine.print_summary()
 
     def export_results(self):
         """导出结果"""
@@ -482,7 +500,11 @@ class ComprehensiveTalentCrawler:
                 '分类': policy.get('category', ''),
                 '发布部门': policy.get('department', ''),
                 '发布时间': policy.get('publish_date', ''),
+                '发文字号': policy.get('document_number', ''),
+                '索引号': policy.get('index_number', ''),
+                '主题分类': policy.get('subject', ''),
                 '链接': policy.get('url', ''),
+                '政策ID': policy_id(policy.get('url', '')),
                 '企业基本条件': req.get('企业基本条件', ''),
                 '人才要求': req.get('人才要求', ''),
                 '申报材料': req.get('申报材料', ''),
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+按主机的自适应并发控制（AIMD）
+p95延迟和错误率正常时逐步增加同时在途的请求数，遇到超时、429或5xx时成倍减少，
+让并发数跟随网站当时实际能承受的能力
+"""
+
+import time
+import asyncio
+import threading
+from urllib.parse import urlparse
+
+# 表示服务器过载的状态码
+CONGESTION_STATUS_CODES = (429, 500, 502, 503, 504)
+
+
+def percentile(values, fraction):
+    """近似分位数（取排序后最接近的样本）"""
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+class AIMDController:
+    def __init__(self, initial=2, min_limit=1, max_limit=16, increase=1, decrease=0.5,
+                 window=20, latency_target=3.0, error_threshold=0.1):
+        """
+        initial/min_limit/max_limit: 每个主机的初始、最小和最大并发数
+        increase: 一个观察窗口内状况正常时增加的并发数
+        decrease: 过载时并发数乘以的系数
+        window: 观察窗口的请求数，满一个窗口判断一次是否增加
+        latency_target: p95延迟（秒）不超过该值才增加
+        error_threshold: 窗口内失败比例不超过该值才增加
+        """
+        self.initial = initial
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.increase = increase
+        self.decrease = decrease
+        self.window = window
+        self.latency_target = latency_target
+        self.error_threshold = error_threshold
+        self._hosts = {}
+        self._lock = threading.Lock()
+
+    def _state_for(self, host):
+        """获取主机的控制状态（调用方需持有锁）"""
+        if host not in self._hosts:
+            self._hosts[host] = {'limit': float(self.initial), 'peak': float(self.initial),
+                                 'latencies': [], 'errors': 0, 'decreases': 0, 'cut_at': 0.0}
+        return self._hosts[host]
+
+    def limit(self, host):
+        """主机当前允许的并发数"""
+        with self._lock:
+            return int(self._state_for(host)['limit'])
+
+    def record(self, url, latency, status_code=0, error=False):
+        """
+        记录一次请求的结果
+        latency: 从发出请求到读完响应的秒数
+        error: 请求因超时或连接错误失败
+        """
+        host = urlparse(url).netloc.lower()
+        with self._lock:
+            state = self._state_for(host)
+            if error or status_code in CONGESTION_STATUS_CODES:
+                # 同一批在途请求会先后失败，一个延迟周期内只减少一次
+                now = time.monotonic()
+                if now - state['cut_at'] >= max(latency, 1.0):
+                    state['limit'] = max(self.min_limit, state['limit'] * self.decrease)
+                    state['decreases'] += 1
+                    state['cut_at'] = now
+                state['errors'] += 1
+            state['latencies'].append(latency)
+
+            if len(state['latencies']) < self.window:
+                return
+            healthy = (percentile(state['latencies'], 0.95) <= self.latency_target and
+                       state['errors'] / len(state['latencies']) <= self.error_threshold)
+            if healthy:
+                state['limit'] = min(self.max_limit, state['limit'] + self.increase)
+                state['peak'] = max(state['peak'], state['limit'])
+            state['latencies'] = []
+            state['errors'] = 0
+
+    def summary(self):
+        """各主机最终稳定的并发数"""
+        with self._lock:
+            return ", ".join(
+                f"{host} 并发 {int(state['limit'])} (最高 {int(state['peak'])}, 降低 {state['decreases']} 次)"
+                for host, state in sorted(self._hosts.items())
+            )
+
+
+class AdaptiveGate:
+    """事件循环内按控制器当前的并发数放行同一主机的请求，用法同 asyncio.Semaphore"""
+
+    def __init__(self, controller, host):
+        self.controller = controller
+        self.host = host
+        self.in_flight = 0
+        self._condition = asyncio.Condition()
+
+    async def __aenter__(self):
+        async with self._condition:
+            await self._condition.wait_for(lambda: self.in_flight < self.controller.limit(self.host))
+            self.in_flight += 1
+
+    async def __aexit__(self, *exc_info):
+        async with self._condition:
+            self.in_flight -= 1
+            self._condition.notify_all()
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+按主机和URL模式学习的正文提取模板
+详情页正文原本要依次尝试一串选择器，都不够长时再取整个 body 并去掉导航。
+同一主机、同一URL模式的页面结构通常相同：第一次按完整流程提取时记下最终取到正文的选择器，
+之后同类页面直接用该选择器提取。同一模式下的页面仍可能不同（有的页面没有 .content 而只有 .main），
+因此每次使用模板前先确认排在它前面的选择器在本页都没有匹配，否则按完整流程提取；
+模板取不到足够的正文时（页面改版）同样按完整流程提取并重新学习，结果始终与完整流程一致。
+模板持久化在 SQLite 中，各爬虫的记录相互独立
+"""
+
+import os
+import re
+import copy
+import time
+import sqlite3
+import threading
+from urllib.parse import urlsplit
+from url_canon import canonical_url
+
+# 取 body 全文的模板
+BODY_SELECTOR = 'body'
+
+# URL路径中的数字（日期、编号）不区分页面类型
+PATH_NUMBER_PATTERN = re.compile(r'\d+')
+
+
+def url_pattern(url):
+    """URL所属的 (主机, 路径模式)，路径中的数字统一为 {n}，查询参数不计入"""
+    parts = urlsplit(canonical_url(url))
+    return parts.netloc, PATH_NUMBER_PATTERN.sub('{n}', parts.path)
+
+
+def element_text(soup, selector, remove=None):
+    """选择器匹配的第一个元素的文字，remove 匹配的子元素不计入；没有匹配的元素返回None"""
+    elem = soup.find('body') if selector == BODY_SELECTOR else soup.select_one(selector)
+    if not elem:
+        return None
+    if remove:
+        # 在副本上去掉导航，共用的解析结果保持不变
+        elem = copy.copy(elem)
+        for nav in elem.select(remove):
+            nav.decompose()
+    return elem.get_text(strip=True)
+
+
+def cascade_content(soup, selectors, remove=None, body_remove=None, enough=200, body_below=100):
+    """
+    完整的正文提取流程：依次尝试 selectors，取到超过 enough 个字的正文即停止；
+    最终正文少于 body_below 个字时改取 body 全文（去掉 body_remove 匹配的元素）
+    返回 (正文, 取到正文的选择器)，没有取到时选择器为None
+    """
+    content, used = "", None
+    for selector in selectors:
+        text = element_text(soup, selector, remove)
+        if text is not None:
+            content, used = text, selector
+            if len(content) > enough:
+                break
+
+    if len(content) < body_below:
+        text = element_text(soup, BODY_SELECTOR, body_remove)
+        if text is not None:
+            content, used = text, BODY_SELECTOR
+    return content, used
+
+
+class ContentTemplates:
+    def __init__(self, profile, path='data/cache/templates.db'):
+        """
+        profile: 爬虫名称，各爬虫的选择器列表不同，模板相互独立
+        path: 模板数据库，所有爬虫共用
+        """
+        self.profile = profile
+        self.hits = 0
+        self.learned = 0
+        self.relearned = 0
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS templates (
+                profile TEXT,
+                host TEXT,
+                pattern TEXT,
+                selector TEXT,
+                min_length INTEGER,
+                learned REAL,
+                PRIMARY KEY (profile, host, pattern)
+            )
+        """)
+        self._conn.commit()
+        # 模板数量很少，启动时全部读入内存，提取时不查询数据库
+        self._templates = {
+            (host, pattern): (selector, min_length)
+            for host, pattern, selector, min_length in self._conn.execute(
+                "SELECT host, pattern, selector, min_length FROM templates WHERE profile = ?", (profile,)
+            )
+        }
+
+    def _learn(self, key, selector, min_length):
+        """记录模板"""
+        with self._lock:
+            self._templates[key] = (selector, min_length)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO templates (profile, host, pattern, selector, min_length, learned) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (self.profile, key[0], key[1], selector, min_length, time.time())
+            )
+            self._conn.commit()
+
+    def _template_content(self, soup, template, selectors, remove, body_remove, enough):
+        """
+        用模板提取正文；完整流程在本页可能选中其他选择器时返回None
+        完整流程选中前面的选择器，只可能因为它在本页有匹配，用 select_one 确认即可，不必提取其文字；
+        模板正文不超过 enough 个字时，完整流程还会继续尝试后面的选择器，同样要确认它们没有匹配
+        """
+        selector, min_length = template
+        if selector == BODY_SELECTOR:
+            earlier, later = selectors, []
+        elif selector in selectors:
+            index = selectors.index(selector)
+            earlier, later = selectors[:index], selectors[index + 1:]
+        else:
+            return None
+        if any(soup.select_one(other) for other in earlier):
+            return None
+        content = element_text(soup, selector, body_remove if selector == BODY_SELECTOR else remove)
+        if content is None or len(content) < min_length:
+            return None
+        if len(content) <= enough and any(soup.select_one(other) for other in later):
+            return None
+        return content
+
+    def extract(self, url, soup, selectors, remove=None, body_remove=None, enough=200, body_below=100):
+        """
+        提取详情页正文，参数同 cascade_content
+        有模板时直接用模板的选择器；模板的选择器已不在 selectors 中、排在它前面的选择器在本页有匹配、
+        没有匹配元素或正文不够长时，按完整流程提取并重新学习
+        """
+        key = url_pattern(url)
+        template = self._templates.get(key)
+        if template is not None:
+            content = self._template_content(soup, template, selectors, remove, body_remove, enough)
+            if content is not None:
+                self.hits += 1
+                return content
+
+        content, used = cascade_content(soup, selectors, remove, body_remove, enough, body_below)
+        # 正文过短（错误页、空页面）时不学习，保留原有模板
+        if used is None or len(content) < body_below:
+            return content
+        # 模板正文的最低长度与完整流程接受该选择器的条件相同
+        if used != BODY_SELECTOR and len(content) > enough:
+            min_length = max(enough + 1, body_below)
+        else:
+            min_length = body_below
+        if template is None:
+            self.learned += 1
+        elif template != (used, min_length):
+            self.relearned += 1
+            print(f"    🧩 {key[0]}{key[1]} 页面结构变化，正文选择器 {template[0]} → {used}")
+        self._learn(key, used, min_length)
+        return content
+
+    def close(self):
+        """关闭数据库"""
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+爬取预算
+限制一次爬取（或共用同一预算的多个爬取任务）最多发出的请求数、下载的字节数和耗费的时间，
+抓取引擎发出的每个网络请求都记入预算，用完后不再发出新请求
+"""
+
+import time
+import threading
+
+
+class CrawlBudget:
+    def __init__(self, max_requests=None, max_bytes=None, max_seconds=None):
+        """
+        max_requests: 最多发出的网络请求数（含重试，缓存命中不计）
+        max_bytes: 最多下载的字节数；已发出的请求会读完，因此可能略有超出
+        max_seconds: 从第一次使用起最多耗费的秒数
+        均为None表示不限
+        """
+        self.max_requests = max_requests
+        self.max_bytes = max_bytes
+        self.max_seconds = max_seconds
+        self.requests = 0
+        self.bytes = 0
+        self.started = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        """开始计时；多个爬取任务共用预算时，从第一次开始算起"""
+        with self._lock:
+            if self.started is None:
+                self.started = time.monotonic()
+
+    @property
+    def deadline(self):
+        """时间预算的截止时间（time.monotonic），不限时间返回None"""
+        if self.max_seconds is None or self.started is None:
+            return None
+        return self.started + self.max_seconds
+
+    def elapsed(self):
+        """已耗费的秒数"""
+        return time.monotonic() - self.started if self.started is not None else 0.0
+
+    def _exhausted_reason(self):
+        """预算用完的原因（调用方需持有锁），未用完返回None"""
+        if self.max_requests is not None and self.requests >= self.max_requests:
+            return f"请求数已达 {self.max_requests} 次"
+        if self.max_bytes is not None and self.bytes >= self.max_bytes:
+            return f"下载量已达 {self.max_bytes / 1024 / 1024:.1f} MB"
+        if self.deadline is not None and time.monotonic() >= self.deadline:
+            return f"耗时已达 {self.max_seconds:.0f} 秒"
+        return None
+
+    def exhausted_reason(self):
+        """预算用完的原因，未用完返回None"""
+        with self._lock:
+            return self._exhausted_reason()
+
+    def exhausted(self):
+        """预算是否已用完"""
+        return self.exhausted_reason() is not None
+
+    def requests_left(self):
+        """还能发出的请求数，不限请求数返回None"""
+        if self.max_requests is None:
+            return None
+        with self._lock:
+            return max(self.max_requests - self.requests, 0)
+
+    def charge_request(self):
+        """发出请求前记入一次请求；预算已用完时不记入，返回False"""
+        with self._lock:
+            if self._exhausted_reason() is not None:
+                return False
+            self.requests += 1
+            return True
+
+    def charge_bytes(self, size):
+        """记入下载的字节数"""
+        with self._lock:
+            self.bytes += size
+
+    def summary(self):
+        """预算使用情况"""
+        def usage(used, limit, fmt):
+            return fmt(used) + (f"/{fmt(limit)}" if limit is not None else "")
+        return (f"请求 {usage(self.requests, self.max_requests, str)} 次, "
+                f"下载 {usage(self.bytes, self.max_bytes, lambda b: f'{b / 1024 / 1024:.1f}')} MB, "
+                f"用时 {usage(self.elapsed(), self.max_seconds, lambda s: f'{s:.0f}')} 秒")
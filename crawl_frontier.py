@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+持久化的抓取前沿与已见集合
+以政策ID（详情页 detail?id= 标识，见 url_canon.py）为键，记录抓取状态、最近出现时间和内容哈希，
+定时增量运行时只抓取从未抓过或已到刷新时间的详情页；
+列表页记录链接集合指纹和提取出的链接，指纹未变化时不再解析
+"""
+
+import os
+import json
+import time
+import hashlib
+import sqlite3
+import threading
+from url_canon import canonical_url, policy_id
+from pagination import list_fingerprint, department_code
+from list_parser import parse_links
+
+PENDING = 'pending'
+FETCHED = 'fetched'
+FAILED = 'failed'
+
+
+class CrawlFrontier:
+    def __init__(self, profile, path='data/cache/frontier.db', refresh_interval=7 * 24 * 3600):
+        """
+        profile: 爬虫名称，各爬虫的抓取记录相互独立
+        refresh_interval: 已抓取页面的刷新间隔（秒）
+        """
+        self.profile = profile
+        self.refresh_interval = refresh_interval
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS pages (
+                profile TEXT,
+                key TEXT,
+                url TEXT,
+                title TEXT,
+                state TEXT,
+                first_seen REAL,
+                last_seen REAL,
+                last_fetched REAL,
+                content_hash TEXT,
+                record TEXT,
+                PRIMARY KEY (profile, key)
+            )
+        """)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS list_pages (
+                profile TEXT,
+                key TEXT,
+                fingerprint TEXT,
+                links TEXT,
+                checked REAL,
+                PRIMARY KEY (profile, key)
+            )
+        """)
+        self._conn.commit()
+
+    def mark_seen(self, links):
+        """记录列表页中出现的链接：新链接加入待抓取，已有链接更新最近出现时间"""
+        now = time.time()
+        with self._lock:
+            for link in links:
+                self._conn.execute(
+                    "INSERT INTO pages (profile, key, url, title, state, first_seen, last_seen) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?) "
+                    "ON CONFLICT (profile, key) DO UPDATE SET last_seen = excluded.last_seen",
+                    (self.profile, policy_id(link['url']), link['url'], link.get('title', ''),
+                     PENDING, now, now)
+                )
+            self._conn.commit()
+
+    def is_due(self, url):
+        """是否需要抓取：从未成功抓取过，或距上次抓取已超过刷新间隔"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT state, last_fetched FROM pages WHERE profile = ? AND key = ?",
+                (self.profile, policy_id(url))
+            ).fetchone()
+        if row is None or row[0] != FETCHED:
+            return True
+        return time.time() - row[1] >= self.refresh_interval
+
+    def due(self, links):
+        """链接中需要抓取的部分，见 is_due"""
+        return [link for link in links if self.is_due(link['url'])]
+
+    def get_record(self, url):
+        """上次抓取时保存的政策记录（上次被过滤掉时为None）"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT record FROM pages WHERE profile = ? AND key = ?",
+                (self.profile, policy_id(url))
+            ).fetchone()
+        if row is None or row[0] is None:
+            return None
+        return json.loads(row[0])
+
+    def mark_fetched(self, url, content, record=None):
+        """记录一次成功抓取，保存内容哈希和提取出的政策记录"""
+        now = time.time()
+        content_hash = hashlib.sha1(content).hexdigest()
+        record_json = json.dumps(record, ensure_ascii=False) if record is not None else None
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO pages (profile, key, url, state, first_seen, last_seen, last_fetched, content_hash, record) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (profile, key) DO UPDATE SET state = excluded.state, "
+                "last_fetched = excluded.last_fetched, content_hash = excluded.content_hash, "
+                "record = excluded.record",
+                (self.profile, policy_id(url), url, FETCHED, now, now, now, content_hash, record_json)
+            )
+            self._conn.commit()
+
+    def mark_failed(self, url):
+        """记录抓取失败，下次运行会重新抓取"""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE pages SET state = ? WHERE profile = ? AND key = ?",
+                (FAILED, self.profile, policy_id(url))
+            )
+            self._conn.commit()
+
+    def _list_page(self, url):
+        """上次记录的列表页 (指纹, 链接)，没有记录返回None"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT fingerprint, links FROM list_pages WHERE profile = ? AND key = ?",
+                (self.profile, canonical_url(url))
+            ).fetchone()
+        if row is None:
+            return None
+        return row[0], json.loads(row[1])
+
+    def has_list_page(self, url):
+        """是否记录过该列表页"""
+        return self._list_page(url) is not None
+
+    def list_unchanged(self, url, html):
+        """列表页的链接集合是否与上次记录的相同"""
+        fingerprint = list_fingerprint(html)
+        previous = self._list_page(url)
+        return fingerprint is not None and previous is not None and previous[0] == fingerprint
+
+    def list_links(self, url, result, extract, documents=None):
+        """
+        列表页中的政策链接：指纹与上次相同时直接沿用上次提取的链接，否则用 extract(html, url) 提取并记录
+        result: 列表页的 FetchResult；为None表示翻页器跳过了该页，同样沿用上次的链接
+        documents: 多个爬虫配置共用的 DocumentCache，提供时 extract 收到的是已解析的文档（只含链接，见 list_parser.py）
+        """
+        if result is None or not result.ok:
+            previous = self._list_page(url) if result is None else None
+            return previous[1] if previous else []
+
+        # 没有详情链接的页面（栏目首页等）无法指纹比较，每次都解析
+        fingerprint = list_fingerprint(result.text)
+        html = documents.parse(url, result.text, parse_links) if documents is not None else result.text
+        if fingerprint is None:
+            return extract(html, url)
+        previous = self._list_page(url)
+        if previous is not None and previous[0] == fingerprint:
+            return previous[1]
+
+        links = extract(html, url)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO list_pages (profile, key, fingerprint, links, checked) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (self.profile, canonical_url(url), fingerprint,
+                 json.dumps(links, ensure_ascii=False), time.time())
+            )
+            self._conn.commit()
+        return links
+
+    def close(self):
+        """关闭数据库"""
+        with self._lock:
+            self._conn.close()
+
+
+class FrontierGroup:
+    """
+    多个爬虫配置共用一次翻页时的列表页指纹判断，接口与 PaginationWalker 用到的 CrawlFrontier 方法相同
+    读取某部门的所有配置都认为列表未变化，才跳过该部门的其余页面
+    """
+
+    def __init__(self, members):
+        """members: [(CrawlFrontier, 该配置的部门代码)]"""
+        self.members = members
+
+    def _frontiers_for(self, url):
+        code = department_code(url)
+        return [frontier for frontier, codes in self.members if code in codes]
+
+    def has_list_page(self, url):
+        frontiers = self._frontiers_for(url)
+        return bool(frontiers) and all(frontier.has_list_page(url) for frontier in frontiers)
+
+    def list_unchanged(self, url, html):
+        frontiers = self._frontiers_for(url)
+        return bool(frontiers) and all(frontier.list_unchanged(url, html) for frontier in frontiers)
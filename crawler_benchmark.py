@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+爬虫录制/回放基准测试
+  python crawler_benchmark.py record            联网运行全部爬虫，把请求和响应录制到存档
+  python crawler_benchmark.py replay [延迟秒数]  离线从存档回放，测量各爬虫的耗时和吞吐量
+回放延迟设为0时，耗时基本就是解析和分析的开销
+"""
+
+import io
+import sys
+import time
+import contextlib
+from fetch_engine import default_engine
+from crawl_frontier import CrawlFrontier
+from content_templates import ContentTemplates
+from fixtures import FixtureRecorder, FixtureReplayer, DEFAULT_FIXTURE_PATH
+from talent_focused_crawler import TalentFocusedCrawler
+from enhanced_xuhui_crawler import EnhancedXuhuiTalentCrawler
+from comprehensive_talent_crawler import ComprehensiveTalentCrawler
+from verified_talent_crawler import VerifiedTalentCrawler
+from xuhui_talent_crawler import XuhuiTalentCrawler
+
+# (名称, 爬虫类, 爬取方法)
+CRAWLERS = [
+    ('talent_focused', TalentFocusedCrawler, 'crawl_talent_policies'),
+    ('enhanced_xuhui', EnhancedXuhuiTalentCrawler, 'crawl_all_policies'),
+    ('comprehensive_talent', ComprehensiveTalentCrawler, 'crawl_policies'),
+    ('verified_talent', VerifiedTalentCrawler, 'crawl_verified_policies'),
+    ('xuhui_talent', XuhuiTalentCrawler, 'crawl_all_policies'),
+]
+
+
+def run_crawlers(fixture):
+    """用给定的录制/回放模式依次运行全部爬虫，返回每个爬虫的测量结果"""
+    results = []
+    for name, crawler_class, crawl_method in CRAWLERS:
+        engine = default_engine(fixture=fixture, verbose=False)
+        # 前沿和正文模板放在内存中，每次都完整抓取、从头学习模板，结果可重复
+        crawler = crawler_class(engine=engine, frontier=CrawlFrontier(name, path=':memory:'),
+                                templates=ContentTemplates(name, path=':memory:'))
+
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            getattr(crawler, crawl_method)()
+        elapsed = time.perf_counter() - start
+
+        results.append({
+            'name': name,
+            'policies': len(crawler.policies),
+            'requests': engine.stats['requests'],
+            'errors': engine.stats['errors'],
+            'bytes': engine.stats['bytes_downloaded'],
+            'seconds': elapsed
+        })
+        engine.close()
+    return results
+
+
+def print_results(results):
+    """打印测量结果"""
+    print(f"{'爬虫':<22}{'政策数':>8}{'请求数':>8}{'失败':>6}{'下载KB':>10}{'耗时(秒)':>10}{'请求/秒':>10}")
+    for r in results:
+        rate = r['requests'] / r['seconds'] if r['seconds'] > 0 else 0
+        print(f"{r['name']:<22}{r['policies']:>8}{r['requests']:>8}{r['errors']:>6}"
+              f"{r['bytes'] / 1024:>10.1f}{r['seconds']:>10.2f}{rate:>10.1f}")
+
+
+def main():
+    mode = sys.argv[1] if len(sys.argv) > 1 else 'replay'
+
+    if mode == 'record':
+        recorder = FixtureRecorder(DEFAULT_FIXTURE_PATH)
+        print(f"🔴 录制模式：请求和响应将保存到 {DEFAULT_FIXTURE_PATH}")
+        results = run_crawlers(recorder)
+        recorder.save()
+        print(f"✅ 已录制 {len(recorder.archive.entries)} 个请求")
+    elif mode == 'replay':
+        latency = float(sys.argv[2]) if len(sys.argv) > 2 else 0.05
+        print(f"▶️  回放模式：{DEFAULT_FIXTURE_PATH}，每个请求模拟延迟 {latency} 秒")
+        results = run_crawlers(FixtureReplayer(DEFAULT_FIXTURE_PATH, latency=latency))
+    else:
+        print(__doc__)
+        return
+
+    print_results(results)
+
+if __name__ == "__main__":
+    main()
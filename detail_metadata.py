@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+详情页元数据解析
+徐汇区政务公开详情页的头部有固定字段（索引号、主题分类、发布机构、发文字号、发布时间），
+直接从头部区块读取这些字段，不再把整个文档树转回字符串后逐个正则查找；
+页面没有头部字段时，只在标题和正文首尾的有限范围内查找日期和部门。
+正则表达式在导入时编译
+"""
+
+import re
+
+# 头部字段名 -> 结果中的键；发布部门、发布日期是部分页面使用的别名
+FIELD_KEYS = {
+    '索引号': 'index_number',
+    '主题分类': 'subject',
+    '发布机构': 'department',
+    '发布部门': 'department',
+    '发文字号': 'document_number',
+    '发布时间': 'publish_date',
+    '发布日期': 'publish_date',
+}
+
+# 字段名及其后的冒号，一次查找头部区块中的所有字段
+FIELD_LABEL_PATTERN = re.compile(r'(%s)\s*[：:]' % '|'.join(FIELD_KEYS))
+
+# 日期：2024-05-06、2024年5月6日、2024/5/6、2024.5.6
+DATE_PATTERN = re.compile(r'\d{4}(?:[-年]\d{1,2}[-月]\d{1,2}日?|/\d{1,2}/\d{1,2}|\.\d{1,2}\.\d{1,2})')
+LABELED_DATE_PATTERN = re.compile(r'(?:发布|成文)?(?:时间|日期)[：:]\s*(%s)' % DATE_PATTERN.pattern)
+LABELED_DEPARTMENT_PATTERN = re.compile(r'发布(?:机构|部门)[：:]\s*([^，。；！？\s]+)')
+DEPARTMENT_PATTERN = re.compile(r'((?:上海市)?徐汇区[^，。；！？\s]*?(?:局|委|办|中心|部|处))')
+
+# 头部区块：从第一个字段名向上最多找几层祖先元素，区块文字超过该长度则不是头部
+MAX_HEADER_DEPTH = 6
+MAX_HEADER_CHARS = 1000
+
+# 没有头部字段时查找的范围：标题、正文开头和结尾（落款日期通常在正文末尾）
+FALLBACK_HEAD_CHARS = 1500
+FALLBACK_TAIL_CHARS = 500
+
+
+def header_block(soup):
+    """
+    包含头部字段的区块文字，字段之间以换行分隔
+    从第一个带冒号的字段名向上逐层扩大，直到上一层不再包含更多字段（如从一行扩大到整个表格）；
+    没有头部字段，或字段名只出现在正文段落中（区块文字过长）时返回空字符串
+    """
+    label = soup.find(string=FIELD_LABEL_PATTERN)
+    if label is None or label.parent is None:
+        return ""
+    block = label.parent
+    text = block.get_text('\n', strip=True)
+    fields = len(set(FIELD_LABEL_PATTERN.findall(text)))
+    for _ in range(MAX_HEADER_DEPTH):
+        if block.name == 'body' or block.parent is None:
+            break
+        parent_text = block.parent.get_text('\n', strip=True)
+        parent_fields = len(set(FIELD_LABEL_PATTERN.findall(parent_text)))
+        if len(parent_text) > MAX_HEADER_CHARS or (fields >= 2 and parent_fields == fields):
+            break
+        block, text, fields = block.parent, parent_text, parent_fields
+    return text if len(text) <= MAX_HEADER_CHARS else ""
+
+
+def header_fields(soup):
+    """
+    读取头部字段 {键: 值}
+    字段值是字段名之后、下一个字段名之前的第一行文字，
+    同时支持 <td>发布机构：</td><td>...</td> 和 <span>发布机构：...</span> 两种写法
+    """
+    text = header_block(soup)
+    labels = list(FIELD_LABEL_PATTERN.finditer(text))
+    fields = {}
+    for i, match in enumerate(labels):
+        end = labels[i + 1].start() if i + 1 < len(labels) else len(text)
+        lines = [line.strip() for line in text[match.end():end].split('\n') if line.strip()]
+        key = FIELD_KEYS[match.group(1)]
+        if lines and key not in fields:
+            fields[key] = lines[0]
+    return fields
+
+
+def fallback_region(title, content):
+    """没有头部字段时查找的有限文字范围"""
+    if len(content) <= FALLBACK_HEAD_CHARS + FALLBACK_TAIL_CHARS:
+        return f"{title}\n{content}"
+    return f"{title}\n{content[:FALLBACK_HEAD_CHARS]}\n{content[-FALLBACK_TAIL_CHARS:]}"
+
+
+def find_publish_date(text):
+    """文字中的发布时间：优先带“发布时间/日期”标签的日期"""
+    match = LABELED_DATE_PATTERN.search(text)
+    if match:
+        return match.group(1)
+    match = DATE_PATTERN.search(text)
+    return match.group(0) if match else ""
+
+
+def find_department(text):
+    """文字中的发布部门：优先带“发布机构/部门”标签的名称"""
+    match = LABELED_DEPARTMENT_PATTERN.search(text) or DEPARTMENT_PATTERN.search(text)
+    return match.group(1).strip() if match else ""
+
+
+def parse_detail_metadata(soup, title="", content=""):
+    """
+    解析详情页元数据
+    返回 {'index_number', 'subject', 'department', 'document_number', 'publish_date'}，缺少的字段为空字符串；
+    发布时间只保留日期部分，头部没有发布时间或发布机构时在标题和正文首尾查找
+    """
+    fields = header_fields(soup)
+    metadata = {key: fields.get(key, "") for key in dict.fromkeys(FIELD_KEYS.values())}
+
+    date = DATE_PATTERN.search(metadata['publish_date'])
+    metadata['publish_date'] = date.group(0) if date else ""
+
+    if not metadata['publish_date'] or not metadata['department']:
+        region = fallback_region(title, content)
+        metadata['publish_date'] = metadata['publish_date'] or find_publish_date(region)
+        metadata['department'] = metadata['department'] or find_department(region)
+    return metadata
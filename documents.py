@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+页面解析结果的共享
+多个爬虫配置处理同一页面时只解析一次，
+共享的文档只读，需要修改文档树的提取逻辑先复制对应的元素
+"""
+
+from bs4 import BeautifulSoup
+from url_canon import canonical_url
+
+
+def parse_html(html):
+    """解析页面；传入的已经是解析好的文档时直接返回"""
+    if isinstance(html, BeautifulSoup):
+        return html
+    return BeautifulSoup(html, 'html.parser')
+
+
+class DocumentCache:
+    def __init__(self, max_documents=256):
+        """
+        按规范URL缓存解析过的页面
+        max_documents: 最多保留的文档数。各配置按相同顺序依次处理同一批页面，
+        满了之后淘汰旧文档会让每个配置都重新解析全部页面，因此满了之后不再加入新文档，
+        至少前 max_documents 个页面只解析一次
+        """
+        self.max_documents = max_documents
+        self._documents = {}
+        self.parsed = 0
+        self.reused = 0
+
+    def parse(self, url, html, parser=parse_html):
+        """
+        解析页面；同一URL且内容相同时返回已解析的文档
+        parser: 解析函数，列表页只提取链接时用 list_parser.parse_links
+        """
+        key = (canonical_url(url), parser)
+        cached = self._documents.get(key)
+        if cached is not None and cached[0] == html:
+            self.reused += 1
+            return cached[1]
+
+        document = parser(html)
+        self.parsed += 1
+        if key in self._documents or len(self._documents) < self.max_documents:
+            self._documents[key] = (html, document)
+        return document
+
+    def clear(self):
+        """清空缓存（如列表页处理完后），释放内存"""
+        self._documents.clear()
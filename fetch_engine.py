@@ -0,0 +1,619 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+徐汇区政策爬虫共享抓取引擎
+基于asyncio调度并发请求，按主机限制同时在途的请求数，
+并提供同步封装，供各爬虫现有的 crawl_* 方法直接调用
+"""
+
+import time
+import asyncio
+import threading
+import heapq
+import weakref
+import itertools
+import functools
+from requests.structures import CaseInsensitiveDict
+from urllib.parse import urlparse
+from concurrent.futures import ThreadPoolExecutor
+from http_cache import HTTPCache
+from charset import decode_html
+from url_canon import canonical_url
+from session_pool import create_session_pool, iter_body, abort_response
+from rate_limiter import HostRateLimiter
+from retry_policy import RetryPolicy
+from circuit_breaker import CircuitBreaker
+from concurrency_control import AIMDController, AdaptiveGate
+
+# 服务器不支持或拒绝HEAD请求时返回的状态码，需改用GET
+HEAD_UNSUPPORTED_STATUS = (403, 405, 501)
+
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
+}
+
+
+class FetchError(Exception):
+    """抓取失败"""
+
+
+class Watchdog:
+    """
+    到期中止读取的后台线程：所有请求的截止时间放在一个堆中，由同一个线程依次处理，
+    不再为每个请求创建一个定时器线程
+    """
+
+    def __init__(self):
+        self._heap = []
+        self._order = itertools.count()
+        self._condition = threading.Condition()
+        self._thread = None
+        self._closed = False
+
+    def schedule(self, deadline, callback):
+        """到 deadline（time.monotonic）时在后台线程中调用 callback，返回供 cancel 使用的句柄"""
+        entry = [deadline, next(self._order), callback]
+        with self._condition:
+            heapq.heappush(self._heap, entry)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='fetch-watchdog', daemon=True)
+                self._thread.start()
+            self._condition.notify()
+        return entry
+
+    def cancel(self, entry):
+        """取消尚未到期的回调；已取消的条目到达堆顶时丢弃"""
+        with self._condition:
+            entry[2] = None
+
+    def _run(self):
+        with self._condition:
+            while not self._closed:
+                while self._heap and self._heap[0][2] is None:
+                    heapq.heappop(self._heap)
+                if not self._heap:
+                    self._condition.wait()
+                    continue
+                delay = self._heap[0][0] - time.monotonic()
+                if delay > 0:
+                    self._condition.wait(delay)
+                    continue
+                callback = heapq.heappop(self._heap)[2]
+                # 回调（关闭连接）可能稍慢，执行时不持有锁
+                self._condition.release()
+                try:
+                    callback()
+                except Exception:
+                    # 连接可能已由读取方关闭，中止失败不影响其他请求
+                    pass
+                finally:
+                    self._condition.acquire()
+
+    def close(self):
+        """停止后台线程"""
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+
+
+class FetchResult:
+    """单次抓取结果"""
+
+    def __init__(self, url, status_code=0, content=b'', headers=None, error=None,
+                 from_cache=False, attempts=0, truncated=False):
+        self.url = url
+        self.status_code = status_code
+        self.content = content
+        self.headers = CaseInsensitiveDict(headers or {})
+        self.error = error
+        self.from_cache = from_cache
+        self.attempts = attempts
+        # 流式读取在字节预算内提前结束时为True，content只是响应的前一部分
+        self.truncated = truncated
+        self._text = None
+
+    @property
+    def ok(self):
+        """请求成功且状态码不是错误码（与 raise_for_status 判定一致）"""
+        return self.error is None and 0 < self.status_code < 400
+
+    def raise_for_status(self):
+        """请求失败时抛出 FetchError"""
+        if self.error is not None:
+            raise FetchError(self.error)
+        if self.status_code >= 400:
+            raise FetchError(f"HTTP {self.status_code}")
+
+    @property
+    def content_length(self):
+        """
+        内容长度：优先使用响应头Content-Length，没有时按读取的字节数；
+        没有Content-Length（如分块传输）且只读取了开头部分时长度未知，返回None
+        """
+        length = self.headers.get('Content-Length', '')
+        if length.isdigit():
+            return int(length)
+        if self.truncated:
+            return None
+        return len(self.content)
+
+    @property
+    def text(self):
+        """按声明或检测到的字符集解码的页面内容"""
+        if self._text is None:
+            self._text = decode_html(self.url, self.content, self.headers.get('Content-Type', ''))
+        return self._text
+
+
+class FetchEngine:
+    def __init__(self, per_host_limit=4, max_workers=16, timeout=15, headers=None,
+                 cache=None, rate_limiter=None, retry_policy=None, circuit_breaker=None,
+                 concurrency=None, fixture=None, transport='http1', total_timeout=60, verbose=True):
+        # 传输层：http1 每个工作线程独立会话，连接池大小与线程数一致；
+        # http2 所有线程共用一个多路复用的客户端
+        self.transport = transport
+        self.sessions = create_session_pool(transport, max_workers, headers or DEFAULT_HEADERS)
+        # 录制/回放模式（见 fixtures.py）替换实际发出请求的会话
+        self.fixture = fixture
+        if fixture is not None:
+            self.sessions = fixture.session_pool(self.sessions)
+
+        # 每个主机同时在途的请求数：给出 AIMDController 时按延迟和错误自适应调整，否则固定为 per_host_limit
+        self.per_host_limit = per_host_limit
+        self.concurrency = concurrency
+        # timeout 只限制建连和两次读取之间的间隔；total_timeout 限制单次请求从发出到读完响应体的总时长
+        self.timeout = timeout
+        self.total_timeout = total_timeout
+        # 整次爬取的截止时间（time.monotonic），到期后不再发出新请求
+        self.deadline = None
+        # 爬取预算（见 crawl_budget.py），每个网络请求及其下载量都记入预算
+        self.budget = None
+        self.cache = cache
+        self.rate_limiter = rate_limiter
+        self.retry_policy = retry_policy or RetryPolicy(max_attempts=1)
+        self.circuit_breaker = circuit_breaker
+        self.verbose = verbose
+
+        # 阻塞的HTTP请求放到线程池中执行，由事件循环统一调度
+        self.executor = ThreadPoolExecutor(max_workers=max_workers)
+        # 请求总时长到期时中止读取
+        self.watchdog = Watchdog()
+        # 信号量绑定事件循环，按循环分别创建
+        self._loop_semaphores = weakref.WeakKeyDictionary()
+
+        self._stats_lock = threading.Lock()
+        self.stats = {
+            'requests': 0,
+            'bytes_downloaded': 0,
+            'cache_hits': 0,
+            'not_modified': 0,
+            'retries': 0,
+            'circuit_rejected': 0,
+            'deadline_aborts': 0,
+            'budget_rejected': 0,
+            'errors': 0
+        }
+        # 最终失败的URL及原因，用于运行结束时的统计
+        self.failures = {}
+
+    def _count(self, **increments):
+        """累加统计数据"""
+        with self._stats_lock:
+            for name, value in increments.items():
+                self.stats[name] += value
+
+    def set_deadline(self, seconds):
+        """设置整次爬取的时间预算（秒），None 表示不限；到期后不再发出新请求，爬虫用已获取的结果完成本次爬取"""
+        self.deadline = time.monotonic() + seconds if seconds else None
+
+    def set_budget(self, budget):
+        """
+        设置爬取预算（CrawlBudget），None 表示不限；多个引擎可以共用同一预算
+        每个请求都记入预算，用完后爬虫停止后续抓取阶段，同样用已获取的结果完成本次爬取
+        """
+        self.budget = budget
+        if budget is not None:
+            budget.start()
+
+    def stop_time(self):
+        """停止发出请求的时间点：爬取截止时间与预算截止时间中较早者，都未设置返回None"""
+        deadlines = [d for d in (self.deadline, self.budget and self.budget.deadline) if d is not None]
+        return min(deadlines) if deadlines else None
+
+    def time_left(self):
+        """距爬取截止时间的剩余秒数，未设置截止时间返回None"""
+        stop_time = self.stop_time()
+        if stop_time is None:
+            return None
+        return stop_time - time.monotonic()
+
+    def deadline_passed(self):
+        """是否已到爬取截止时间"""
+        stop_time = self.stop_time()
+        return stop_time is not None and time.monotonic() >= stop_time
+
+    def budget_exhausted(self):
+        """爬取预算是否已用完"""
+        return self.budget is not None and self.budget.exhausted()
+
+    def should_stop(self):
+        """是否应停止后续的抓取阶段（已到截止时间或预算用完）"""
+        return self.deadline_passed() or self.budget_exhausted()
+
+    def report_stop_reason(self):
+        """爬取结束时输出提前停止的原因（已到截止时间或预算用完），返回该原因，未提前停止返回None"""
+        if self.deadline_passed():
+            reason = "已到爬取截止时间"
+            print(f"\n⏰ {reason}，本次使用已获取的结果")
+        elif self.budget_exhausted():
+            reason = f"爬取预算已用完（{self.budget.exhausted_reason()}）"
+            print(f"\n💰 {reason}，本次使用已获取的结果")
+        else:
+            reason = None
+        return reason
+
+    def requests_left(self):
+        """爬取预算中还能发出的请求数，未设置预算或不限请求数返回None"""
+        return self.budget.requests_left() if self.budget is not None else None
+
+    def _request_budget(self):
+        """本次请求可用的总时长：单次请求上限与爬取剩余时间中较小者"""
+        budgets = [b for b in (self.total_timeout, self.time_left()) if b is not None]
+        return min(budgets) if budgets else None
+
+    def _semaphore_for(self, url):
+        """获取主机对应的并发信号量（自适应并发时为 AdaptiveGate）"""
+        host = urlparse(url).netloc.lower()
+        semaphores = self._loop_semaphores.setdefault(asyncio.get_running_loop(), {})
+        if host not in semaphores:
+            if self.concurrency is not None:
+                semaphores[host] = AdaptiveGate(self.concurrency, host)
+            else:
+                semaphores[host] = asyncio.Semaphore(self.per_host_limit)
+        return semaphores[host]
+
+    def _cached_result(self, url, entry):
+        """由缓存条目构造抓取结果"""
+        return FetchResult(
+            url,
+            status_code=entry['status_code'],
+            content=entry['body'],
+            headers=entry['headers'],
+            from_cache=True
+        )
+
+    def _fail(self, url, reason, status_code=0, attempts=0, partial=b''):
+        """
+        记录最终失败并构造结果
+        partial: 中止前已读到的部分内容，保留在结果中（truncated=True），结果仍视为失败
+        """
+        self._count(errors=1)
+        with self._stats_lock:
+            self.failures[url] = reason
+        if self.verbose:
+            print(f"获取页面失败 {url}: {reason}")
+        if status_code:
+            return FetchResult(url, status_code=status_code, attempts=attempts)
+        return FetchResult(url, content=partial, error=reason, attempts=attempts, truncated=bool(partial))
+
+    def _read_body(self, url, response, max_bytes=None, stop_when=None, deadline=None):
+        """
+        流式读取响应体，超出字节预算或 stop_when 判定已足够时停止
+        stop_when: stop_when(url) 为本次读取创建判定函数，每读到一块只把新内容交给它，
+                   由判定函数自己保留已读内容的累计状态
+        deadline: 读取的截止时间（time.monotonic），到期仍未读完时中止。
+                  读取阻塞在 socket 上（如服务器逐字节缓慢发送，一块始终读不满）时，
+                  由 watchdog 到期关闭连接，不必等到下一块读完才检查。
+                  HTTP/2 连接由多个请求共用，不能关闭：每个数据帧之后检查截止时间，
+                  完全收不到数据时由单次读取超时结束（发出请求时已限制为不超过剩余的总时长），
+                  因此最多超出截止时间一个读取超时（见 session_pool.HTTP2Response.abort）
+        返回 (内容, 是否提前停止, 是否超时中止)
+        """
+        chunks = []
+        size = 0
+        truncated = False
+        expired = False
+        enough = stop_when(url) if stop_when else None
+        aborted = threading.Event()
+
+        def abort():
+            aborted.set()
+            abort_response(response)
+
+        watchdog = self.watchdog.schedule(deadline, abort) if deadline is not None else None
+        try:
+            for chunk in iter_body(response, 8192):
+                chunks.append(chunk)
+                size += len(chunk)
+                if max_bytes and size >= max_bytes:
+                    truncated = True
+                    break
+                if enough and enough(chunk):
+                    truncated = True
+                    break
+                if deadline is not None and time.monotonic() >= deadline:
+                    expired = True
+                    break
+        except Exception:
+            # watchdog 关闭连接后，阻塞中的读取以连接错误结束
+            if not aborted.is_set():
+                raise
+        finally:
+            if watchdog is not None:
+                self.watchdog.cancel(watchdog)
+            response.close()
+        # watchdog 关闭连接后读取也可能当作正常结束返回，读到的内容同样不完整
+        if aborted.is_set() and not truncated:
+            expired = True
+        content = b''.join(chunks)
+        return content[:max_bytes] if max_bytes else content, truncated, expired
+
+    def _deadline_fail(self, url, reason, attempts, partial=b''):
+        """因总时长或爬取截止时间放弃的请求"""
+        self._count(deadline_aborts=1)
+        return self._fail(url, reason, attempts=attempts, partial=partial)
+
+    def _budget_fail(self, url, reason, attempts):
+        """因爬取预算用完放弃的请求"""
+        self._count(budget_rejected=1)
+        return self._fail(url, f"爬取预算已用完: {reason}", attempts=attempts)
+
+    def _stop_result(self, url, attempts):
+        """已到爬取截止时间或预算用完时放弃请求的结果，可以继续时返回None"""
+        if self.deadline_passed():
+            return self._deadline_fail(url, "已到爬取截止时间", attempts)
+        if self.budget_exhausted():
+            return self._budget_fail(url, self.budget.exhausted_reason(), attempts)
+        return None
+
+    def _fresh_cached(self, url, method='GET'):
+        """缓存中仍在有效期内的结果，没有时返回None"""
+        if self.cache is None or method != 'GET':
+            return None
+        entry = self.cache.get(url)
+        if entry and self.cache.is_fresh(entry):
+            self._count(cache_hits=1)
+            return self._cached_result(url, entry)
+        return None
+
+    def _release_breaker(self, url):
+        """熔断器已放行但请求未发出"""
+        if self.circuit_breaker:
+            self.circuit_breaker.release(url)
+
+    def _sleep_before_retry(self, delay):
+        """重试前退避等待；等待后会超过爬取截止时间时不再重试，返回False"""
+        time_left = self.time_left()
+        if time_left is not None and delay >= time_left:
+            return False
+        time.sleep(delay)
+        return True
+
+    def _fetch_blocking(self, url, timeout, method='GET', max_bytes=None, stop_when=None):
+        """
+        在工作线程中执行一次抓取（含缓存、限速、重试和熔断）
+        max_bytes/stop_when: 流式读取响应体，达到字节预算或判定已足够时提前停止（见 _read_body）
+        """
+        use_cache = self.cache is not None and method == 'GET'
+        entry = self.cache.get(url) if use_cache else None
+        if entry and self.cache.is_fresh(entry):
+            self._count(cache_hits=1)
+            return self._cached_result(url, entry)
+
+        request_headers = self.cache.conditional_headers(entry) if entry else {}
+        policy = self.retry_policy
+
+        for attempt in range(policy.max_attempts):
+            # 先检查截止时间和预算，已停止的请求不再排队等待限速令牌
+            stopped = self._stop_result(url, attempt)
+            if stopped is not None:
+                return stopped
+            if self.circuit_breaker and not self.circuit_breaker.allow(url):
+                self._count(circuit_rejected=1)
+                return self._fail(url, f"主机熔断中: {urlparse(url).netloc}", attempts=attempt)
+
+            is_last = attempt == policy.max_attempts - 1
+            started = None
+            try:
+                # 只有真正发往服务器的请求才消耗令牌；排队等待会超过爬取截止时间的请求直接放弃
+                if self.rate_limiter and not self.rate_limiter.acquire(url, self.stop_time()):
+                    self._release_breaker(url)
+                    return self._deadline_fail(url, "已到爬取截止时间", attempt)
+                # 取得令牌后立即记入预算；并发的请求可能在等待令牌期间用完了预算
+                if self.budget is not None and not self.budget.charge_request():
+                    self._release_breaker(url)
+                    return self._budget_fail(url, self.budget.exhausted_reason(), attempt)
+                if self.verbose:
+                    print(f"正在爬取: {url}")
+
+                # 响应体总是流式读取，以便在总时长用尽时中止
+                budget = self._request_budget()
+                started = time.monotonic()
+                response = self.sessions.get().request(
+                    method, url, timeout=min(timeout, budget) if budget is not None else timeout,
+                    headers=request_headers, stream=True
+                )
+                ok_body = response.status_code == 200
+                content, truncated, expired = self._read_body(
+                    url, response,
+                    max_bytes=max_bytes if ok_body else None,
+                    stop_when=stop_when if ok_body else None,
+                    deadline=started + budget if budget is not None else None
+                )
+                self._count(requests=1, bytes_downloaded=len(content))
+                if self.budget is not None:
+                    self.budget.charge_bytes(len(content))
+                if self.concurrency is not None:
+                    self.concurrency.record(url, time.monotonic() - started, response.status_code, error=expired)
+            except Exception as e:
+                retryable = policy.is_retryable_exception(e)
+                if self.concurrency is not None and started is not None:
+                    self.concurrency.record(url, time.monotonic() - started, error=retryable)
+                # 不可重试的异常（URL无效、回放存档缺失等）与主机是否可用无关，按成功结束试探
+                if self.circuit_breaker:
+                    if retryable:
+                        self.circuit_breaker.record_failure(url)
+                    else:
+                        self.circuit_breaker.record_success(url)
+                if retryable and not is_last and self._sleep_before_retry(policy.backoff(attempt)):
+                    self._count(retries=1)
+                    continue
+                return self._fail(url, str(e), attempts=attempt + 1)
+
+            if expired:
+                if self.circuit_breaker:
+                    self.circuit_breaker.record_failure(url)
+                return self._deadline_fail(url, f"超过请求总时长 {budget:.0f} 秒，已中止读取", attempt + 1, content)
+
+            if policy.is_retryable_status(response.status_code):
+                if self.circuit_breaker:
+                    self.circuit_breaker.record_failure(url)
+                delay = policy.backoff(attempt, response.headers.get('Retry-After'))
+                if not is_last and self._sleep_before_retry(delay):
+                    self._count(retries=1)
+                    continue
+                return self._fail(url, f"HTTP {response.status_code}",
+                                  status_code=response.status_code, attempts=attempt + 1)
+
+            # 服务器正常应答（包括404等不可重试的状态码）
+            if self.circuit_breaker:
+                self.circuit_breaker.record_success(url)
+
+            if response.status_code == 304 and entry:
+                self.cache.refresh(url)
+                self._count(not_modified=1)
+                return self._cached_result(url, entry)
+
+            head_unsupported = method == 'HEAD' and response.status_code in HEAD_UNSUPPORTED_STATUS
+            if response.status_code >= 400 and not head_unsupported:
+                return self._fail(url, f"HTTP {response.status_code}",
+                                  status_code=response.status_code, attempts=attempt + 1)
+            if use_cache and not truncated:
+                self.cache.store(url, response.status_code, response.headers, content)
+
+            return FetchResult(
+                url,
+                status_code=response.status_code,
+                content=content,
+                headers=response.headers,
+                attempts=attempt + 1,
+                truncated=truncated
+            )
+
+    async def fetch_async(self, url, timeout=None, **options):
+        """异步抓取单个URL，options 见 _fetch_blocking（method、max_bytes、stop_when）"""
+        async with self._semaphore_for(url):
+            # 已到截止时间或预算用完后不再把请求交给工作线程，缓存中仍有效的页面照常返回
+            if self.should_stop():
+                return self._fresh_cached(url, options.get('method', 'GET')) or self._stop_result(url, 0)
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(
+                self.executor,
+                functools.partial(self._fetch_blocking, url, timeout or self.timeout, **options)
+            )
+
+    async def fetch_many_async(self, urls, timeout=None, **options):
+        """
+        异步并发抓取多个URL，返回 {url: FetchResult}
+        规范URL相同的写法只抓取一次，结果按传入的每个URL返回
+        """
+        representatives = {}
+        for url in urls:
+            representatives.setdefault(canonical_url(url), url)
+        results = await asyncio.gather(
+            *(self.fetch_async(url, timeout, **options) for url in representatives.values())
+        )
+        by_key = dict(zip(representatives, results))
+        return {url: by_key[canonical_url(url)] for url in urls}
+
+    def run(self, coro):
+        """在新的事件循环中运行协程（同步封装）"""
+        return asyncio.run(coro)
+
+    def fetch(self, url, timeout=None, **options):
+        """同步抓取单个URL"""
+        return self.run(self.fetch_async(url, timeout, **options))
+
+    def fetch_many(self, urls, timeout=None, **options):
+        """同步并发抓取多个URL，返回 {url: FetchResult}"""
+        return self.run(self.fetch_many_async(urls, timeout, **options))
+
+    def probe_many(self, urls, max_bytes, stop_when=None, need_body=True, timeout=None):
+        """
+        验证用的轻量抓取
+        need_body: 需要检查内容时直接按字节预算流式GET，不另发HEAD（GET的状态码同样说明链接是否可用）；
+                   为False时只发HEAD，HEAD不可用或出错时才改用GET
+        返回 {url: FetchResult}，HEAD给出的Content-Length会保留在结果中
+        """
+        if need_body:
+            return self.fetch_many(urls, timeout, max_bytes=max_bytes, stop_when=stop_when)
+
+        heads = self.fetch_many(urls, timeout, method='HEAD')
+        body_urls = [
+            url for url, head in heads.items()
+            if head.error or head.status_code in HEAD_UNSUPPORTED_STATUS
+        ]
+        bodies = self.fetch_many(body_urls, timeout, max_bytes=max_bytes, stop_when=stop_when)
+
+        results = {}
+        for url, head in heads.items():
+            result = bodies.get(url, head)
+            if head.ok and 'Content-Length' in head.headers:
+                result.headers.setdefault('Content-Length', head.headers['Content-Length'])
+            results[url] = result
+        return results
+
+    def fetch_text(self, url, timeout=None):
+        """抓取页面文本，失败返回None"""
+        result = self.fetch(url, timeout)
+        return result.text if result.ok else None
+
+    def print_summary(self):
+        """打印抓取统计"""
+        print(f"\n📡 抓取统计: 网络请求 {self.stats['requests']} 次, "
+              f"下载 {self.stats['bytes_downloaded'] / 1024:.1f} KB, "
+              f"缓存命中 {self.stats['cache_hits']} 次, "
+              f"未修改(304) {self.stats['not_modified']} 次, "
+              f"重试 {self.stats['retries']} 次, "
+              f"熔断拒绝 {self.stats['circuit_rejected']} 次, "
+              f"超时中止 {self.stats['deadline_aborts']} 次, "
+              f"预算拒绝 {self.stats['budget_rejected']} 次, "
+              f"失败 {self.stats['errors']} 次")
+        if self.failures:
+            reasons = {}
+            for reason in self.failures.values():
+                reasons[reason] = reasons.get(reason, 0) + 1
+            for reason, count in sorted(reasons.items(), key=lambda x: x[1], reverse=True)[:5]:
+                print(f"   ❌ {reason}: {count} 个URL")
+        if self.budget is not None:
+            print(f"   💰 爬取预算: {self.budget.summary()}")
+        if self.concurrency is not None:
+            print(f"   🚦 自适应并发: {self.concurrency.summary()}")
+        if self.circuit_breaker and self.circuit_breaker.open_hosts():
+            print(f"   ⚠️  熔断中的主机: {', '.join(self.circuit_breaker.open_hosts())}")
+
+    def close(self):
+        """释放线程池、连接和缓存"""
+        self.executor.shutdown(wait=True)
+        self.watchdog.close()
+        self.sessions.close()
+        if self.cache:
+            self.cache.close()
+
+
+def default_engine(cache_ttl=6 * 3600, rate=2.0, burst=4, max_attempts=3, fixture=None, adaptive=True, **kwargs):
+    """
+    创建各爬虫默认使用的抓取引擎（带磁盘缓存、按主机限速、重试、熔断和自适应并发）
+    fixture: FixtureRecorder/FixtureReplayer，录制时每个请求都要真正发出，
+             回放时由存档应答，这两种模式都不使用磁盘缓存，回放也不限速
+    adaptive: 按主机的延迟和错误自适应调整并发数（上限为工作线程数），为False时固定为 per_host_limit
+    """
+    return FetchEngine(
+        cache=HTTPCache(ttl=cache_ttl) if fixture is None else None,
+        rate_limiter=None if fixture is not None and fixture.offline else HostRateLimiter(rate=rate, burst=burst),
+        retry_policy=RetryPolicy(max_attempts=max_attempts),
+        circuit_breaker=CircuitBreaker(),
+        concurrency=AIMDController(max_limit=kwargs.get('max_workers', 16)) if adaptive else None,
+        fixture=fixture,
+        **kwargs
+    )
@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+抓取录制与回放
+录制模式把爬虫发出的每个请求及响应保存到压缩存档；
+回放模式通过同一抓取接口从存档应答，并模拟网络延迟，
+用于在无网络的机器上可重复地测量爬虫吞吐量和解析开销
+"""
+
+import os
+import gzip
+import json
+import time
+import zlib
+import atexit
+import base64
+import threading
+import requests
+from requests.structures import CaseInsensitiveDict
+from url_canon import canonical_url
+from session_pool import iter_body, abort_response
+
+DEFAULT_FIXTURE_PATH = 'data/fixtures/crawl_fixture.jsonl.gz'
+FIXTURE_FORMAT = 'policy-crawl-fixture'
+FIXTURE_VERSION = 1
+
+
+class FixtureMissingError(Exception):
+    """回放存档中没有该请求"""
+
+
+class FixtureArchive:
+    """请求/响应存档：gzip压缩的JSON Lines，按 (方法, 规范URL) 索引"""
+
+    def __init__(self, path=DEFAULT_FIXTURE_PATH):
+        self.path = path
+        self.entries = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, path=DEFAULT_FIXTURE_PATH):
+        """读取存档"""
+        archive = cls(path)
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            header = json.loads(f.readline())
+            if header.get('format') != FIXTURE_FORMAT:
+                raise ValueError(f"不是抓取存档: {path}")
+            for line in f:
+                entry = json.loads(line)
+                archive.entries[(entry['method'], canonical_url(entry['url']))] = entry
+        return archive
+
+    def add(self, method, url, status_code=0, headers=None, body=b'', complete=True, error=None):
+        """记录一次请求；同一请求保留内容最完整的一次"""
+        key = (method, canonical_url(url))
+        entry = {
+            'method': method,
+            'url': url,
+            'status_code': status_code,
+            'headers': dict(headers or {}),
+            'body': base64.b64encode(body).decode('ascii'),
+            'complete': complete,
+            'error': error
+        }
+        with self._lock:
+            previous = self.entries.get(key)
+            if previous and previous['error'] is None and (
+                    error is not None or (previous['complete'] and not complete)):
+                return
+            self.entries[key] = entry
+
+    def lookup(self, method, url):
+        """查找请求；没有录制HEAD时由同一URL的GET响应构造"""
+        key = canonical_url(url)
+        entry = self.entries.get((method, key))
+        if entry is None and method == 'HEAD':
+            entry = self.entries.get(('GET', key))
+            if entry is not None:
+                entry = dict(entry, method='HEAD', body='')
+        return entry
+
+    def save(self):
+        """写入存档（先写临时文件再替换，避免中断时损坏）"""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._lock:
+            entries = list(self.entries.values())
+        temp_path = self.path + '.tmp'
+        with gzip.open(temp_path, 'wt', encoding='utf-8') as f:
+            f.write(json.dumps({'format': FIXTURE_FORMAT, 'version': FIXTURE_VERSION,
+                                'saved_at': time.time(), 'count': len(entries)}) + '\n')
+            for entry in entries:
+                f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+        os.replace(temp_path, self.path)
+
+
+class FixtureResponse:
+    """回放的响应，提供抓取引擎用到的 requests.Response 接口"""
+
+    def __init__(self, entry):
+        self.url = entry['url']
+        self.status_code = entry['status_code']
+        self.headers = CaseInsensitiveDict(entry['headers'])
+        self.content = base64.b64decode(entry['body'])
+
+    def iter_content(self, chunk_size=8192):
+        for start in range(0, len(self.content), chunk_size):
+            yield self.content[start:start + chunk_size]
+
+    def close(self):
+        pass
+
+
+class RecordingResponse:
+    """包装真实响应，记录实际读取到的内容"""
+
+    def __init__(self, response, method, archive):
+        self._response = response
+        self._method = method
+        self._archive = archive
+        self._chunks = []
+        self._recorded = False
+        self.url = response.url
+        self.status_code = response.status_code
+        self.headers = response.headers
+
+    def _record(self, body, complete):
+        if not self._recorded:
+            self._recorded = True
+            self._archive.add(self._method, self.url, self.status_code, self.headers, body, complete)
+
+    @property
+    def content(self):
+        content = self._response.content
+        self._record(content, True)
+        return content
+
+    def iter_content(self, chunk_size=8192):
+        # 与直接抓取相同的逐块读取方式，截止时间的检查不因录制而变粗
+        for chunk in iter_body(self._response, chunk_size):
+            self._chunks.append(chunk)
+            yield chunk
+        self._record(b''.join(self._chunks), True)
+
+    def abort(self):
+        """抓取引擎超时中止读取时，中止被包装的真实响应"""
+        abort_response(self._response)
+
+    def close(self):
+        # 流式读取提前结束时，存档中只有已读取的部分
+        self._record(b''.join(self._chunks), False)
+        self._response.close()
+
+
+class RecordingSession:
+    def __init__(self, session, archive):
+        self._session = session
+        self._archive = archive
+
+    def request(self, method, url, **kwargs):
+        try:
+            response = self._session.request(method, url, **kwargs)
+        except Exception as e:
+            self._archive.add(method, url, error=str(e))
+            raise
+        return RecordingResponse(response, method, self._archive)
+
+
+class RecordingSessionPool:
+    """包装真实会话池，录制经过的全部请求"""
+
+    def __init__(self, pool, archive):
+        self.pool = pool
+        self.archive = archive
+
+    def get(self):
+        return RecordingSession(self.pool.get(), self.archive)
+
+    def close(self):
+        self.archive.save()
+        self.pool.close()
+
+
+class ReplaySessionPool:
+    """不联网，从存档应答所有请求"""
+
+    def __init__(self, archive, latency=0.05, jitter=0.0):
+        self.archive = archive
+        self.latency = latency
+        self.jitter = jitter
+
+    def get(self):
+        return self
+
+    def request(self, method, url, **kwargs):
+        # 抖动由URL决定，多次回放的延迟完全一致
+        delay = self.latency + self.jitter * (zlib.crc32(url.encode('utf-8')) % 1000) / 1000
+        if delay > 0:
+            time.sleep(delay)
+        entry = self.archive.lookup(method, url)
+        if entry is None:
+            raise FixtureMissingError(f"回放存档中没有该请求: {method} {url}")
+        if entry['error']:
+            raise requests.exceptions.ConnectionError(entry['error'])
+        return FixtureResponse(entry)
+
+    def close(self):
+        pass
+
+
+class FixtureRecorder:
+    """录制模式：真实抓取，同时把请求和响应写入存档（进程退出时自动保存）"""
+    offline = False
+
+    def __init__(self, path=DEFAULT_FIXTURE_PATH):
+        self.archive = FixtureArchive(path)
+        atexit.register(self.archive.save)
+
+    def session_pool(self, pool):
+        return RecordingSessionPool(pool, self.archive)
+
+    def save(self):
+        self.archive.save()
+
+
+class FixtureReplayer:
+    """回放模式：从存档应答，每个请求模拟 latency + 最多 jitter 秒的延迟"""
+    offline = True
+
+    def __init__(self, path=DEFAULT_FIXTURE_PATH, latency=0.05, jitter=0.0):
+        self.archive = FixtureArchive.load(path)
+        self.latency = latency
+        self.jitter = jitter
+
+    def session_pool(self, pool):
+        pool.close()
+        return ReplaySessionPool(self.archive, self.latency, self.jitter)
+
+    def save(self):
+        pass
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+爬虫共享的磁盘HTTP响应缓存
+按规范URL存储响应（同一文档的不同写法共用一个条目），记录ETag/Last-Modified用于条件请求，
+支持TTL过期和按总大小的LRU淘汰
+"""
+
+import os
+import json
+import time
+import sqlite3
+import threading
+from url_canon import canonical_url
+
+
+class HTTPCache:
+    def __init__(self, path='data/cache/http_cache.db', ttl=6 * 3600, max_bytes=200 * 1024 * 1024):
+        self.path = path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        # 抓取在多个工作线程中进行，共用一个连接并加锁
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                url TEXT,
+                status_code INTEGER,
+                headers TEXT,
+                body BLOB,
+                etag TEXT,
+                last_modified TEXT,
+                stored_at REAL,
+                last_access REAL,
+                size INTEGER
+            )
+        """)
+        self._conn.commit()
+
+    def get(self, url):
+        """读取缓存条目，不存在返回None"""
+        key = canonical_url(url)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT url, status_code, headers, body, etag, last_modified, stored_at "
+                "FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute(
+                "UPDATE responses SET last_access = ? WHERE key = ?", (time.time(), key)
+            )
+            self._conn.commit()
+
+        return {
+            'url': row[0],
+            'status_code': row[1],
+            'headers': json.loads(row[2]),
+            'body': row[3],
+            'etag': row[4],
+            'last_modified': row[5],
+            'stored_at': row[6]
+        }
+
+    def is_fresh(self, entry):
+        """条目是否仍在TTL内，可不经请求直接使用"""
+        return time.time() - entry['stored_at'] < self.ttl
+
+    def conditional_headers(self, entry):
+        """生成条件请求头"""
+        headers = {}
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def store(self, url, status_code, headers, body):
+        """写入响应（仅缓存200响应）"""
+        if status_code != 200:
+            return
+        key = canonical_url(url)
+        # 请求库已解压响应体，去掉与原始传输相关的头
+        headers = {
+            name.title(): value for name, value in headers.items()
+            if name.lower() not in ('content-encoding', 'content-length', 'transfer-encoding')
+        }
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses "
+                "(key, url, status_code, headers, body, etag, last_modified, stored_at, last_access, size) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, url, status_code, json.dumps(headers, ensure_ascii=False), body,
+                 headers.get('Etag'), headers.get('Last-Modified'), now, now, len(body))
+            )
+            self._evict()
+            self._conn.commit()
+
+    def refresh(self, url):
+        """条件请求返回304时刷新条目的存储时间"""
+        key = canonical_url(url)
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "UPDATE responses SET stored_at = ?, last_access = ? WHERE key = ?", (now, now, key)
+            )
+            self._conn.commit()
+
+    def _evict(self):
+        """总大小超过上限时，按最近访问时间淘汰最旧的条目"""
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        rows = self._conn.execute("SELECT key, size FROM responses ORDER BY last_access ASC").fetchall()
+        for key, size in rows:
+            if total <= self.max_bytes:
+                break
+            self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            total -= size
+
+    def close(self):
+        """关闭缓存数据库"""
+        with self._lock:
+            self._conn.close()
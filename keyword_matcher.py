@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+共享的多关键词匹配
+标题筛选、政策分类、申报要求提取和质量评分都要在同一段文字里查找几十到上百个关键词。
+每组关键词只整理一次（去重、去空），一段文字只查找一次即得到所有命中的关键词及位置，
+不再按分类、按句子或按关键词重复切分和查找文字。
+一组关键词编译成一个正则表达式（各关键词按长度从长到短排列），查找开销随文字长度增长，
+与关键词数量无关；爬虫在初始化时为各组关键词建好匹配器，筛选链接时不再逐个关键词查找
+"""
+
+import re
+import bisect
+import threading
+
+# 已整理的匹配器，按关键词元组复用
+_matchers = {}
+_matchers_lock = threading.Lock()
+
+
+class KeywordMatcher:
+    def __init__(self, keywords):
+        """keywords: 关键词列表，区分大小写，重复的关键词只保留一个"""
+        self.keywords = list(dict.fromkeys(keyword for keyword in keywords if keyword))
+        # 同一位置优先匹配最长的关键词；没有关键词时不编译（空正则处处匹配）
+        longest_first = sorted(self.keywords, key=len, reverse=True)
+        self.pattern = re.compile('|'.join(map(re.escape, longest_first))) if self.keywords else None
+        # 某处命中关键词时，该处同时命中的是它自身及作为它前缀的较短关键词，按关键词列表顺序排列
+        self._prefixes = {
+            keyword: [other for other in self.keywords if keyword.startswith(other)]
+            for keyword in self.keywords
+        }
+
+    def _matches(self, text):
+        """每个命中位置上最长的关键词；下一次从该位置的下一个字符开始查找，不漏掉重叠的命中"""
+        if self.pattern is None:
+            return
+        match = self.pattern.search(text)
+        while match:
+            yield match
+            match = self.pattern.search(text, match.start() + 1)
+
+    def find_all(self, text):
+        """所有命中 [(起始位置, 关键词)]，按位置排序，包括相互重叠的命中"""
+        return [(match.start(), keyword)
+                for match in self._matches(text)
+                for keyword in self._prefixes[match.group()]]
+
+    def found(self, text):
+        """文字中出现的关键词集合"""
+        found = set()
+        for match in self._matches(text):
+            found.update(self._prefixes[match.group()])
+        return found
+
+    def contains_any(self, text):
+        """文字中是否出现任一关键词"""
+        return self.pattern is not None and self.pattern.search(text) is not None
+
+
+def keyword_matcher(keywords):
+    """同一组关键词只编译一次，供模块级的固定关键词组使用；爬虫的关键词在初始化时建好匹配器"""
+    key = tuple(keywords)
+    matcher = _matchers.get(key)
+    if matcher is None:
+        with _matchers_lock:
+            matcher = _matchers.get(key)
+            if matcher is None:
+                matcher = _matchers[key] = KeywordMatcher(key)
+    return matcher
+
+
+def score_categories(categories, title, content, title_weight=3, content_weight=1):
+    """
+    各分类的关键词得分：分类的每个关键词在标题中出现加 title_weight 分，在内容中出现加 content_weight 分
+    categories: {分类: [关键词]}；所有分类的关键词合并后，标题和内容各扫描一次
+    """
+    matcher = keyword_matcher(keyword for keywords in categories.values() for keyword in keywords)
+    in_title = matcher.found(title)
+    in_content = matcher.found(content)
+    return {
+        category: sum((title_weight if keyword in in_title else 0) +
+                      (content_weight if keyword in in_content else 0) for keyword in keywords)
+        for category, keywords in categories.items()
+    }
+
+
+def sentences_by_keyword(sentences, matcher):
+    """
+    每个关键词出现在哪些句子中 {关键词: [句子序号]}，序号升序
+    句子以换行连接后整体扫描一次，按命中位置换算句子序号，代替逐个关键词遍历所有句子
+    matcher: KeywordMatcher，其关键词中不能含换行
+    """
+    starts = []
+    offset = 0
+    for sentence in sentences:
+        starts.append(offset)
+        offset += len(sentence) + 1
+
+    hits = {}
+    for start, keyword in matcher.find_all('\n'.join(sentences)):
+        index = bisect.bisect_right(starts, start) - 1
+        indexes = hits.setdefault(keyword, [])
+        if not indexes or indexes[-1] != index:
+            indexes.append(index)
+    return hits
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+详情链接优先级
+按标题关键词命中、列表页日期和来源部门给候选链接打分，
+详情页抓取配额优先分配给分数最高的链接，同分按发现顺序，每次运行结果一致
+"""
+
+import re
+import heapq
+from datetime import date
+from urllib.parse import urlsplit, parse_qs
+
+DATE_PATTERN = re.compile(r'(20\d{2})[-/.年](\d{1,2})[-/.月](\d{1,2})')
+
+# 列表项容器：日期通常和链接在同一个列表项或表格行中
+ITEM_TAGS = ('li', 'tr', 'td', 'dd', 'dt', 'p', 'span', 'div')
+MAX_ITEM_TEXT = 200
+
+# 来源部门权重：人才政策主要出自人社、住房、科委等部门
+DEPARTMENT_WEIGHTS = {
+    'xhxxgk_wbj_rshbj': 10,
+    'xhxxgk_wbj_zfbzj': 8,
+    'xhxxgk_wbj_kjw': 6,
+    'xhxxgk_wbj_xgybgs': 6,
+    'xhxxgk_wbj_zcwj': 5,
+    'xhxxgk_wbj_xxgyhb': 4,
+    'xhxxgk_wbj_jyj': 3,
+    'xhxxgk_wbj_wsjkw': 3,
+    'xhxxgk_wbj_gafj': 3,
+    'xhxxgk_wbj_sww': 3,
+    'xhxxgk_wbj_fgw': 3,
+    'xhxxgk_wbj_gggs': 2,
+    'xhxxgk_wbj_czj': 2,
+    'xhxxgk_wbj_gzw': 2,
+}
+# 站内搜索结果已按关键词筛选过
+SEARCH_WEIGHT = 4
+
+KEYWORD_POINTS = 10
+MAX_RECENCY_POINTS = 20
+# 每过这么多天，日期分减1
+RECENCY_DAYS_PER_POINT = 60
+
+
+def anchor_date(a):
+    """链接所在列表项中的日期（YYYY-MM-DD），找不到返回空字符串"""
+    node = a
+    for _ in range(3):
+        if node is None or (node is not a and node.name not in ITEM_TAGS):
+            break
+        text = node.get_text(' ', strip=True)
+        if len(text) > MAX_ITEM_TEXT:
+            break
+        match = DATE_PATTERN.search(text)
+        if match:
+            year, month, day = (int(g) for g in match.groups())
+            return f"{year:04d}-{month:02d}-{day:02d}"
+        node = node.parent
+    return ''
+
+
+def source_weight(source_url):
+    """来源页面的部门权重"""
+    parts = urlsplit(source_url or '')
+    if 'pcRender' in parts.path:
+        return SEARCH_WEIGHT
+    codes = parse_qs(parts.query).get('code')
+    return DEPARTMENT_WEIGHTS.get(codes[0], 0) if codes else 0
+
+
+def recency_points(date_text, today=None):
+    """日期越近分数越高，无日期或超过约3年为0"""
+    if not date_text:
+        return 0
+    try:
+        published = date.fromisoformat(date_text)
+    except ValueError:
+        return 0
+    age_days = max(0, ((today or date.today()) - published).days)
+    return max(0, MAX_RECENCY_POINTS - age_days // RECENCY_DAYS_PER_POINT)
+
+
+def score_link(link, matcher, today=None):
+    """链接优先级分数，matcher: 标题关键词的 KeywordMatcher"""
+    title = link.get('title', '')
+    keyword_hits = len(matcher.found(title))
+    return (keyword_hits * KEYWORD_POINTS +
+            recency_points(link.get('date', ''), today) +
+            source_weight(link.get('source', '')))
+
+
+def top_links(links, limit, matcher):
+    """选出优先级最高的 limit 个链接，按分数从高到低排列"""
+    today = date.today()
+    scored = [(-score_link(link, matcher, today), order, link) for order, link in enumerate(links)]
+    return [link for _, _, link in heapq.nsmallest(limit, scored)]
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+列表页的快速链接解析
+列表页只需要读取链接：用 lxml 解析（C实现，比 html.parser 快得多），
+只为 <a> 元素及其所在列表项生成Python对象，不构建 BeautifulSoup 文档树。
+支持各爬虫提取链接用到的几种选择器，提取结果与 BeautifulSoup 相同；
+多个选择器可一次遍历所有链接完成匹配（candidate_anchors）
+"""
+
+import re
+
+try:
+    from lxml import etree
+except ImportError:
+    etree = None
+
+from documents import parse_html
+
+# get_text 不计入这些元素中的文字（包括其中子元素的文字），与 BeautifulSoup 一致
+SKIP_TEXT_TAGS = ('script', 'style', 'template', 'rt', 'rp')
+
+# 支持的选择器：a[href*="..."]、a[href]、.类名 a、标签 a
+HREF_CONTAINS_SELECTOR = re.compile(r'^a\[href\*="([^"]+)"\]$')
+HAS_HREF_SELECTOR = 'a[href]'
+CLASS_DESCENDANT_SELECTOR = re.compile(r'^\.([\w-]+) a$')
+TAG_DESCENDANT_SELECTOR = re.compile(r'^([a-z][a-z0-9]*) a$')
+
+
+def compile_selector(selector):
+    """把选择器转换为匹配规则 (类型, 值)"""
+    match = HREF_CONTAINS_SELECTOR.match(selector)
+    if match:
+        return 'href_contains', match.group(1)
+    if selector == HAS_HREF_SELECTOR:
+        return 'has_href', None
+    match = CLASS_DESCENDANT_SELECTOR.match(selector)
+    if match:
+        return 'ancestor_class', match.group(1)
+    match = TAG_DESCENDANT_SELECTOR.match(selector)
+    if match:
+        return 'ancestor_tag', match.group(1)
+    raise ValueError(f"列表页快速解析不支持的选择器: {selector}")
+
+
+def rule_matches(rule, href, tags, classes):
+    """链接是否匹配规则；tags/classes 为链接所有祖先元素的标签名和类名"""
+    kind, value = rule
+    if kind == 'href_contains':
+        return href is not None and value in href
+    if kind == 'has_href':
+        return href is not None
+    if kind == 'ancestor_class':
+        return value in classes
+    return value in tags
+
+
+def class_names(value):
+    """class 属性中的类名（BeautifulSoup 为列表，lxml 为字符串）"""
+    if not value:
+        return []
+    return value if isinstance(value, list) else value.split()
+
+
+def element_strings(element):
+    """元素内的所有文字片段，按文档顺序，不含注释和脚本、样式、模板等元素中的文字"""
+    if element.text and element.tag not in SKIP_TEXT_TAGS:
+        yield element.text
+    for child in element:
+        if isinstance(child.tag, str) and child.tag not in SKIP_TEXT_TAGS:
+            yield from element_strings(child)
+        if child.tail:
+            yield child.tail
+
+
+class LinkNode:
+    """lxml 元素的轻量包装，提供提取链接和 link_priority.anchor_date 用到的 BeautifulSoup 接口"""
+
+    def __init__(self, element):
+        self.element = element
+        self.name = element.tag
+
+    @property
+    def parent(self):
+        parent = self.element.getparent()
+        return LinkNode(parent) if parent is not None else None
+
+    def get(self, key, default=None):
+        return self.element.get(key, default)
+
+    def get_text(self, separator='', strip=False):
+        # 位于模板等元素之内时，BeautifulSoup 把其中的文字都归入该元素，get_text 为空
+        if any(ancestor.tag in SKIP_TEXT_TAGS for ancestor in self.element.iterancestors()):
+            return ''
+        strings = element_strings(self.element)
+        if strip:
+            strings = (s.strip() for s in strings)
+            strings = (s for s in strings if s)
+        return separator.join(strings)
+
+
+class LinkDocument:
+    """只含链接的列表页文档，select 接口与 BeautifulSoup 相同（仅限上述选择器）"""
+
+    def __init__(self, root):
+        self.anchors = []
+        if root is None:
+            return
+        for element in root.iter('a'):
+            ancestors = list(element.iterancestors())
+            self.anchors.append((
+                LinkNode(element),
+                {ancestor.tag for ancestor in ancestors},
+                {cls for ancestor in ancestors for cls in class_names(ancestor.get('class'))}
+            ))
+
+    def select(self, selector):
+        """按文档顺序返回匹配选择器的链接"""
+        rule = compile_selector(selector)
+        return [a for a, tags, classes in self.anchors if rule_matches(rule, a.get('href'), tags, classes)]
+
+
+def anchor_contexts(document):
+    """文档中所有链接及其祖先的标签名和类名 [(链接, 标签名集合, 类名集合)]，按文档顺序"""
+    if isinstance(document, LinkDocument):
+        return document.anchors
+    contexts = []
+    for a in document.find_all('a'):
+        parents = list(a.parents)
+        contexts.append((
+            a,
+            {parent.name for parent in parents},
+            {cls for parent in parents for cls in class_names(parent.get('class'))}
+        ))
+    return contexts
+
+
+def candidate_anchors(document, selectors):
+    """
+    一次遍历文档中的链接，找出匹配任一选择器的链接
+    返回 [(链接, href, 文字)]，先按最先匹配的选择器、再按文档顺序排列，每个链接只出现一次、文字只提取一次；
+    与依次 select 各选择器再拼接、按 href 去重的结果相同
+    """
+    rules = [compile_selector(selector) for selector in selectors]
+    ranked = []
+    for order, (a, tags, classes) in enumerate(anchor_contexts(document)):
+        href = a.get('href')
+        rank = next((i for i, rule in enumerate(rules) if rule_matches(rule, href, tags, classes)), None)
+        if rank is not None:
+            ranked.append((rank, order, a, href))
+    ranked.sort(key=lambda item: item[:2])
+    return [(a, href, a.get_text(strip=True)) for _, _, a, href in ranked]
+
+
+def parse_links(html):
+    """
+    解析列表页，返回支持 select 的文档
+    传入的已经是解析好的文档时直接返回；未安装 lxml 时退回 BeautifulSoup
+    """
+    if isinstance(html, LinkDocument):
+        return html
+    if not isinstance(html, (str, bytes)) or etree is None:
+        return parse_html(html)
+    try:
+        root = etree.fromstring(html, etree.HTMLParser()) if html.strip() else None
+    except ValueError:
+        # 带编码声明的字符串等 lxml 不接受的输入
+        return parse_html(html)
+    return LinkDocument(root)
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+单次遍历的多配置爬取
+五个爬虫的部门列表、搜索页和详情页大量重叠，分别运行时同一页面要抓取和解析多次。
+这里用一个共享抓取引擎把所有配置要用的页面各抓取一次、各解析一次，
+再把同一份解析结果交给每个配置做筛选、分类和申报要求提取，各配置照常导出自己的结果文件
+"""
+
+import os
+import sys
+from fetch_engine import default_engine
+from crawl_frontier import CrawlFrontier, FrontierGroup
+from content_templates import ContentTemplates
+from pagination import PaginationWalker, SearchHarvester, department_code
+from documents import DocumentCache
+from talent_focused_crawler import TalentFocusedCrawler
+from enhanced_xuhui_crawler import EnhancedXuhuiTalentCrawler
+from comprehensive_talent_crawler import ComprehensiveTalentCrawler
+from verified_talent_crawler import VerifiedTalentCrawler
+from xuhui_talent_crawler import XuhuiTalentCrawler
+
+# (名称, 爬虫类, 导出方法)，名称与 crawler_benchmark.py 一致
+PROFILES = [
+    ('talent_focused', TalentFocusedCrawler, 'analyze_and_export'),
+    ('enhanced_xuhui', EnhancedXuhuiTalentCrawler, 'analyze_and_export'),
+    ('comprehensive_talent', ComprehensiveTalentCrawler, 'export_results'),
+    ('verified_talent', VerifiedTalentCrawler, 'export_verified_results'),
+    ('xuhui_talent', XuhuiTalentCrawler, 'analyze_and_export'),
+]
+
+
+def unique(items):
+    """去掉重复项，保持原有顺序"""
+    return list(dict.fromkeys(items))
+
+
+class MultiProfileCrawler:
+    def __init__(self, engine=None, transport='http1', profiles=None, documents=None,
+                 frontier_path='data/cache/frontier.db', templates_path='data/cache/templates.db'):
+        """
+        engine: 所有配置共用的抓取引擎
+        profiles: 要运行的配置名称，默认全部
+        documents: 共用的解析结果缓存（DocumentCache）
+        frontier_path: 抓取前沿数据库，与单独运行各爬虫时共用，各配置的记录仍相互独立
+        templates_path: 正文提取模板数据库，同样与单独运行时共用
+        """
+        self.engine = engine or default_engine(transport=transport)
+        self.documents = documents or DocumentCache()
+        # 每个配置保留自己的抓取前沿、正文模板、关键词和筛选规则
+        self.crawlers = [
+            (name, crawler_class(engine=self.engine, frontier=CrawlFrontier(name, path=frontier_path),
+                                 templates=ContentTemplates(name, path=templates_path)), export_method)
+            for name, crawler_class, export_method in PROFILES
+            if profiles is None or name in profiles
+        ]
+        # 部门列表只翻一次页：所有读取该部门的配置都认为列表未变化，才跳过其余页面
+        self.pagination = PaginationWalker(self.engine, frontier=FrontierGroup(
+            [(crawler.frontier, crawler.department_codes) for _, crawler, _ in self.crawlers]
+        ))
+        self.search = SearchHarvester(self.engine)
+
+    def fetch_list_pages(self):
+        """
+        抓取所有配置要用的列表页，每个页面只抓取一次
+        返回每个配置自己的 [(url, FetchResult)]，顺序与单独运行时相同
+        """
+        codes = unique(code for _, crawler, _ in self.crawlers for code in crawler.department_codes)
+        print(f"📄 {len(self.crawlers)} 个配置共 {len(codes)} 个部门列表")
+        by_code = {code: [] for code in codes}
+        for url, result in self.pagination.walk(codes):
+            by_code[department_code(url)].append((url, result))
+
+        # 有搜索翻页器的配置按关键词翻页，其余配置的URL源只抓取第1页
+        search_urls = unique(url for _, crawler, _ in self.crawlers if hasattr(crawler, 'search')
+                             for url in crawler.urls)
+        other_urls = unique(url for _, crawler, _ in self.crawlers if not hasattr(crawler, 'search')
+                            for url in getattr(crawler, 'urls', []) if url not in search_urls)
+        search_pages = self.search.harvest_by_query(search_urls)
+        other_pages = self.engine.fetch_many(other_urls)
+
+        list_pages = {}
+        for name, crawler, _ in self.crawlers:
+            pages = [item for code in crawler.department_codes for item in by_code[code]]
+            for url in getattr(crawler, 'urls', []):
+                if hasattr(crawler, 'search'):
+                    pages += search_pages[url]
+                elif url in search_pages:
+                    pages.append(search_pages[url][0])
+                else:
+                    pages.append((url, other_pages[url]))
+            list_pages[name] = pages
+        return list_pages
+
+    def crawl(self, deadline=None, budget=None):
+        """
+        单次遍历爬取所有配置
+        deadline/budget: 同各爬虫的爬取方法，由所有配置共用
+        """
+        self.engine.set_deadline(deadline)
+        self.engine.set_budget(budget)
+        print(f"开始单次遍历爬取 {len(self.crawlers)} 个配置: {', '.join(name for name, _, _ in self.crawlers)}")
+        os.makedirs('data', exist_ok=True)
+
+        # 第一步：抓取所有列表页，各配置从共用的解析结果中提取自己的链接
+        list_pages = self.fetch_list_pages()
+        candidates = {}
+        due = {}
+        for name, crawler, _ in self.crawlers:
+            print(f"\n===== {name}: 收集链接 =====")
+            candidates[name] = crawler.detail_candidates(crawler.collect_links(list_pages[name], self.documents))
+            due[name] = [] if self.engine.should_stop() else crawler.frontier.due(candidates[name])
+            print(f"其中 {len(due[name])} 个需要抓取，{len(candidates[name]) - len(due[name])} 个沿用上次结果")
+        self.documents.clear()
+
+        # 第二步：所有配置需要的详情页合并后一次并发抓取
+        due_urls = unique(link['url'] for name in due for link in due[name])
+        requested = sum(len(links) for links in due.values())
+        print(f"\n📥 各配置共需抓取 {requested} 个详情页，合并后 {len(due_urls)} 个")
+        detail_pages = self.engine.fetch_many(due_urls)
+
+        # 第三步：各配置用同一份解析结果筛选、分类并提取申报要求
+        for name, crawler, _ in self.crawlers:
+            print(f"\n===== {name}: 处理详情页 =====")
+            pages = {link['url']: detail_pages[link['url']] for link in due[name]}
+            crawler.process_detail_pages(candidates[name], pages, self.documents)
+
+        self.engine.report_stop_reason()
+        print("\n🎯 各配置爬取结果:")
+        for name, crawler, _ in self.crawlers:
+            print(f"   {name}: {len(crawler.policies)} 个政策")
+        print(f"   🧩 页面解析 {self.documents.parsed} 次，复用已解析的页面 {self.documents.reused} 次")
+        templates = [crawler.templates for _, crawler, _ in self.crawlers]
+        print(f"   📐 正文模板直接命中 {sum(t.hits for t in templates)} 次，"
+              f"新学习 {sum(t.learned for t in templates)} 个，重新学习 {sum(t.relearned for t in templates)} 次")
+        self.engine.print_summary()
+
+    def export(self):
+        """各配置导出自己的结果文件"""
+        for name, crawler, export_method in self.crawlers:
+            print(f"\n===== {name}: 导出 =====")
+            getattr(crawler, export_method)()
+
+
+def main():
+    # 可在命令行指定要运行的配置名称，默认全部
+    crawler = MultiProfileCrawler(profiles=sys.argv[1:] or None)
+    crawler.crawl()
+    crawler.export()
+
+if __name__ == "__main__":
+    main()
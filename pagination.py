@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+政务公开列表页的自动翻页
+只需给出部门代码：从第1页识别总页数后并发抓取其余页面；
+无法识别总页数时逐页前进，某页没有新的详情链接即停止；
+第1页的链接集合与上次运行相同时，跳过该部门的其余页面。
+站内搜索按关键词翻页，关键词之间结果重叠较多，新结果占比过低时停止翻页
+"""
+
+import re
+import hashlib
+from urllib.parse import urlsplit, urlunsplit, parse_qs, parse_qsl, urlencode
+
+XUHUI_BASE_URL = "https://www.xuhui.gov.cn"
+LIST_PATH = "/xxgk/portal/article/organizationArticle?code={code}&page={page}"
+
+# 分页栏中的总页数写法，按顺序尝试
+TOTAL_PAGES_PATTERNS = [
+    re.compile(r'共\s*(\d+)\s*页'),
+    re.compile(r'第\s*\d+\s*/\s*(\d+)\s*页'),
+    re.compile(r'(?:totalPage|pageCount|totalPages)["\']?\s*[:=]\s*["\']?(\d+)'),
+]
+
+DETAIL_ID_PATTERN = re.compile(r'detail\?id=([0-9A-Za-z_-]+)')
+
+
+def parse_total_pages(html):
+    """从列表页识别总页数，识别不到返回None"""
+    for pattern in TOTAL_PAGES_PATTERNS:
+        match = pattern.search(html)
+        if match and int(match.group(1)) > 0:
+            return int(match.group(1))
+    return None
+
+
+def detail_ids(html):
+    """列表页中出现的详情页标识"""
+    return set(DETAIL_ID_PATTERN.findall(html))
+
+
+def department_code(url):
+    """部门列表页URL中的部门代码，不是部门列表页返回None"""
+    codes = parse_qs(urlsplit(url).query).get('code')
+    return codes[0] if codes else None
+
+
+def list_fingerprint(html):
+    """列表页指纹：只取详情链接集合，不受导航、时间戳等易变标记影响；没有详情链接时返回None"""
+    ids = detail_ids(html)
+    if not ids:
+        return None
+    return hashlib.sha1('\n'.join(sorted(ids)).encode('utf-8')).hexdigest()
+
+
+class PaginationWalker:
+    def __init__(self, engine, base_url=XUHUI_BASE_URL, max_pages=30, frontier=None):
+        """
+        engine: 共享抓取引擎
+        max_pages: 每个部门最多抓取的页数
+        frontier: 抓取前沿，记录各列表页的指纹；第1页未变化时跳过该部门的其余页面
+        """
+        self.engine = engine
+        self.base_url = base_url
+        self.max_pages = max_pages
+        self.frontier = frontier
+
+    def page_url(self, code, page):
+        """部门列表页URL"""
+        return self.base_url + LIST_PATH.format(code=code, page=page)
+
+    def walk(self, codes, timeout=None):
+        """
+        抓取各部门的全部列表页
+        返回 [(url, FetchResult)]，按部门代码和页码排序；
+        因第1页未变化而跳过的页面结果为None，由 CrawlFrontier.list_links 沿用上次的链接
+        """
+        pages = {code: [] for code in codes}
+        seen = {code: set() for code in codes}
+
+        # 第1页：所有部门并发抓取，识别总页数
+        first_pages = self.engine.fetch_many([self.page_url(code, 1) for code in codes], timeout=timeout)
+        totals = {}
+        unknown = []
+        for code in codes:
+            url = self.page_url(code, 1)
+            result = first_pages[url]
+            pages[code].append((url, result))
+            if not result.ok:
+                continue
+            if self.frontier is not None and self.frontier.list_unchanged(url, result.text):
+                page = 2
+                while page <= self.max_pages and self.frontier.has_list_page(self.page_url(code, page)):
+                    pages[code].append((self.page_url(code, page), None))
+                    page += 1
+                print(f"  📄 {code}: 第1页未变化，跳过其余 {page - 2} 页")
+                continue
+            seen[code] = detail_ids(result.text)
+            total = parse_total_pages(result.text)
+            if total is None:
+                unknown.append(code)
+            else:
+                totals[code] = min(total, self.max_pages)
+                print(f"  📄 {code}: 共 {total} 页")
+
+        # 已知总页数：其余页面一次性并发抓取；截止时间已到或预算用完时不再抓取，
+        # 预算只剩部分请求时按页码从前往后抓取到预算为止（各部门优先抓取靠前的页面）
+        rest = sorted(
+            ((code, page) for code in codes if code in totals for page in range(2, totals[code] + 1)),
+            key=lambda item: item[1]
+        )
+        if self.engine.should_stop():
+            rest = []
+        elif self.engine.requests_left() is not None:
+            rest = rest[:self.engine.requests_left()]
+        rest_pages = self.engine.fetch_many([self.page_url(code, page) for code, page in rest], timeout=timeout)
+        for code, page in rest:
+            url = self.page_url(code, page)
+            pages[code].append((url, rest_pages[url]))
+
+        # 总页数未知：各部门同步逐页前进，某页没有新的详情链接即停止；截止时间已到或预算用完时也停止
+        page = 2
+        while unknown and page <= self.max_pages and not self.engine.should_stop():
+            results = self.engine.fetch_many([self.page_url(code, page) for code in unknown], timeout=timeout)
+            still_going = []
+            for code in unknown:
+                url = self.page_url(code, page)
+                result = results[url]
+                new_ids = detail_ids(result.text) - seen[code] if result.ok else set()
+                if not new_ids:
+                    print(f"  📄 {code}: 未识别总页数，探测到第 {page - 1} 页为止")
+                    continue
+                pages[code].append((url, result))
+                seen[code].update(new_ids)
+                still_going.append(code)
+            unknown = still_going
+            page += 1
+
+        return [item for code in codes for item in pages[code]]
+
+
+class SearchHarvester:
+    def __init__(self, engine, min_yield=0.3, max_pages=10, page_param='page'):
+        """
+        站内搜索（search/pcRender）的多关键词翻页抓取
+        各关键词共用一个已见详情页集合，某关键词一页结果中未见过的详情页比例低于 min_yield 时停止翻页
+        engine: 共享抓取引擎
+        max_pages: 每个关键词最多抓取的页数
+        page_param: 搜索结果页码参数名
+        """
+        self.engine = engine
+        self.min_yield = min_yield
+        self.max_pages = max_pages
+        self.page_param = page_param
+
+    def page_url(self, url, page):
+        """搜索结果第 page 页的URL，第1页即原URL"""
+        if page == 1:
+            return url
+        parts = urlsplit(url)
+        query = [(k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if k != self.page_param]
+        query.append((self.page_param, str(page)))
+        return urlunsplit(parts._replace(query=urlencode(query, safe=':/')))
+
+    def harvest(self, urls, timeout=None):
+        """
+        抓取各关键词的搜索结果页
+        返回 [(url, FetchResult)]，按关键词和页码排序；第1页总会返回（包括失败的）
+        """
+        pages = self.harvest_by_query(urls, timeout)
+        return [item for url in urls for item in pages[url]]
+
+    def harvest_by_query(self, urls, timeout=None):
+        """同 harvest，按关键词分组返回 {url: [(url, FetchResult)]}"""
+        pages = {url: [] for url in urls}
+        seen = set()
+        hits = 0
+        requests = 0
+
+        # 各关键词同步逐页前进，同一页内按关键词顺序计算新增，结果可重复
+        active = list(urls)
+        page = 1
+        while active and page <= self.max_pages and (page == 1 or not self.engine.should_stop()):
+            results = self.engine.fetch_many([self.page_url(url, page) for url in active], timeout=timeout)
+            requests += len(active)
+            still_going = []
+            for url in active:
+                page_url = self.page_url(url, page)
+                result = results[page_url]
+                ids = detail_ids(result.text) if result.ok else set()
+                new_ids = ids - seen
+                if page == 1 or new_ids:
+                    pages[url].append((page_url, result))
+                seen.update(new_ids)
+                hits += len(ids)
+                if ids and len(new_ids) / len(ids) >= self.min_yield:
+                    still_going.append(url)
+                elif ids:
+                    print(f"  🔎 第 {page} 页新结果占 {len(new_ids)}/{len(ids)}，停止翻页: {url}")
+            active = still_going
+            page += 1
+
+        print(f"  🔎 {len(urls)} 个搜索关键词共抓取 {requests} 页，命中详情页 {hits} 次，去重后 {len(seen)} 个")
+        return pages
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+按主机的令牌桶限速器
+以每秒请求数和突发容量控制访问频率，替代散落在各爬虫中的固定 time.sleep
+"""
+
+import time
+import threading
+from urllib.parse import urlparse
+
+
+class TokenBucket:
+    """令牌桶：按 rate 个/秒补充令牌，最多积累 burst 个"""
+
+    def __init__(self, rate, burst):
+        self.rate = float(rate)
+        self.burst = float(burst)
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self):
+        """预订一个令牌，返回需要等待的秒数"""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            # 令牌可以透支，后来的请求依次排在更晚的时间点
+            self.tokens -= 1
+            if self.tokens >= 0:
+                return 0.0
+            return -self.tokens / self.rate
+
+
+class HostRateLimiter:
+    def __init__(self, rate=2.0, burst=4, host_rates=None):
+        """
+        rate: 每个主机默认每秒请求数
+        burst: 每个主机允许的突发请求数
+        host_rates: 单独配置的主机限速 {host: (rate, burst)}
+        """
+        self.rate = rate
+        self.burst = burst
+        self.host_rates = host_rates or {}
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def _bucket_for(self, url):
+        """获取主机对应的令牌桶"""
+        host = urlparse(url).netloc.lower()
+        with self._lock:
+            if host not in self._buckets:
+                rate, burst = self.host_rates.get(host, (self.rate, self.burst))
+                self._buckets[host] = TokenBucket(rate, burst)
+            return self._buckets[host]
+
+    def acquire(self, url, deadline=None):
+        """
+        阻塞直到允许向该主机发出请求
+        deadline: 截止时间（time.monotonic），需要等到截止时间之后才能发出时不等待，返回False
+        """
+        delay = self._bucket_for(url).reserve()
+        if deadline is not None and time.monotonic() + delay >= deadline:
+            return False
+        if delay > 0:
+            time.sleep(delay)
+        return True
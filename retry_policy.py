@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+抓取重试策略
+区分可重试错误（超时、连接失败、429/5xx）与不可重试错误，按带抖动的指数退避重试
+"""
+
+import random
+import requests
+
+RETRYABLE_STATUS_CODES = (429, 500, 502, 503, 504)
+
+
+class RetryPolicy:
+    def __init__(self, max_attempts=3, base_delay=0.5, max_delay=8.0,
+                 retry_status_codes=RETRYABLE_STATUS_CODES):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.retry_status_codes = retry_status_codes
+
+    def is_retryable_status(self, status_code):
+        """状态码是否值得重试"""
+        return status_code in self.retry_status_codes
+
+    def is_retryable_exception(self, exc):
+        """异常是否值得重试：超时和连接类错误可重试，URL错误、重定向过多等直接失败"""
+        if isinstance(exc, (requests.exceptions.InvalidURL,
+                            requests.exceptions.MissingSchema,
+                            requests.exceptions.InvalidSchema,
+                            requests.exceptions.TooManyRedirects)):
+            return False
+        return isinstance(exc, (requests.exceptions.Timeout,
+                                requests.exceptions.ConnectionError,
+                                requests.exceptions.ChunkedEncodingError))
+
+    def backoff(self, attempt, retry_after=None):
+        """第 attempt 次（从0开始）失败后的等待秒数：full jitter 指数退避，优先遵守 Retry-After"""
+        if retry_after:
+            try:
+                return min(float(retry_after), self.max_delay)
+            except ValueError:
+                pass
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
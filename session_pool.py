@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+线程安全的会话池（抓取引擎的传输层）
+http1: 每个工作线程使用独立的 requests.Session，所有会话共用一个按工作线程数
+       设置连接池大小的 HTTPAdapter，并发抓取时复用连接而不会反复建连
+http2: 所有线程共用一个开启HTTP/2的 httpx.Client，服务器支持时并发请求在同一连接上
+       多路复用，不支持时自动回退到HTTP/1.1（需要安装 httpx[http2]）
+"""
+
+import socket
+import threading
+import contextlib
+import requests
+import urllib3
+from requests.adapters import HTTPAdapter
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+TRANSPORTS = ('http1', 'http2')
+
+
+class SessionPool:
+    def __init__(self, pool_size, headers=None):
+        self.headers = headers or {}
+        # urllib3 连接池本身是线程安全的，可以被多个会话共用
+        self.adapter = HTTPAdapter(pool_connections=10, pool_maxsize=pool_size)
+        self._local = threading.local()
+        self._sessions = []
+        self._lock = threading.Lock()
+
+    def get(self):
+        """获取当前线程的会话，首次调用时创建"""
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = requests.Session()
+            session.headers.update(self.headers)
+            session.mount('http://', self.adapter)
+            session.mount('https://', self.adapter)
+            self._local.session = session
+            with self._lock:
+                self._sessions.append(session)
+        return session
+
+    def close(self):
+        """关闭所有会话及共用的连接池"""
+        with self._lock:
+            for session in self._sessions:
+                session.close()
+            self._sessions = []
+        self.adapter.close()
+
+
+def iter_body(response, chunk_size):
+    """
+    逐块读取响应体。requests 的响应用 urllib3 的 read1：收到数据就返回，不等读满一块，
+    逐字节缓慢发送时每次读取都能及时检查截止时间，中止时已收到的数据也不会滞留在缓冲区中；
+    urllib3 的异常按 requests.iter_content 的方式转换，重试判断不变。
+    其他响应（HTTP/2、录制、回放）用各自的 iter_content
+    """
+    raw = getattr(response, 'raw', None)
+    if not isinstance(response, requests.Response) or not hasattr(raw, 'read1'):
+        yield from response.iter_content(chunk_size=chunk_size)
+        return
+    try:
+        while True:
+            chunk = raw.read1(chunk_size, decode_content=True)
+            if not chunk:
+                break
+            yield chunk
+    except urllib3.exceptions.ProtocolError as e:
+        raise requests.exceptions.ChunkedEncodingError(e)
+    except urllib3.exceptions.DecodeError as e:
+        raise requests.exceptions.ContentDecodingError(e)
+    except urllib3.exceptions.ReadTimeoutError as e:
+        raise requests.exceptions.ConnectionError(e)
+    except urllib3.exceptions.SSLError as e:
+        raise requests.exceptions.SSLError(e)
+
+
+def abort_response(response):
+    """
+    从其他线程中止正在读取的响应，使阻塞在 socket 上的读取尽快返回
+    提供 abort() 的响应（HTTP/2、录制）由其自行处理；requests 的响应关闭底层 socket（urllib3 的 shutdown）；
+    其他响应（回放）不会阻塞，直接关闭
+    """
+    abort = getattr(response, 'abort', None)
+    if abort is not None:
+        abort()
+        return
+    raw = getattr(response, 'raw', None)
+    if raw is not None and hasattr(raw, 'shutdown'):
+        raw.shutdown()
+    else:
+        response.close()
+
+
+@contextlib.contextmanager
+def translate_errors():
+    """把 httpx 异常转换为对应的 requests 异常，重试策略无需区分传输层"""
+    try:
+        yield
+    except httpx.TimeoutException as e:
+        raise requests.exceptions.Timeout(str(e)) from e
+    except (httpx.InvalidURL, httpx.UnsupportedProtocol) as e:
+        raise requests.exceptions.InvalidURL(str(e)) from e
+    except httpx.TooManyRedirects as e:
+        raise requests.exceptions.TooManyRedirects(str(e)) from e
+    except httpx.TransportError as e:
+        raise requests.exceptions.ConnectionError(str(e)) from e
+
+
+class HTTP2Response:
+    """包装 httpx.Response，提供抓取引擎用到的 requests.Response 接口"""
+
+    def __init__(self, response):
+        self._response = response
+        self.url = str(response.url)
+        self.status_code = response.status_code
+        self.headers = response.headers
+
+    @property
+    def content(self):
+        with translate_errors():
+            return self._response.read()
+
+    def iter_content(self, chunk_size=8192):
+        """收到的数据即时返回（HTTP/2 下每个数据帧一块），不凑满 chunk_size，读取方可及时检查截止时间"""
+        with translate_errors():
+            for chunk in self._response.iter_bytes():
+                yield chunk
+
+    def abort(self):
+        """
+        从其他线程中止读取
+        回退到 HTTP/1.1 时连接只属于本请求，关闭底层 socket，阻塞中的读取立即返回；
+        HTTP/2 连接上同时有其他请求的流，不能关闭，httpx 也不支持从其他线程关闭单个流，
+        因此不做处理：读取方在下一个数据帧到达或单次读取超时后结束
+        """
+        if self._response.http_version == 'HTTP/2':
+            return
+        stream = self._response.extensions.get('network_stream')
+        sock = stream.get_extra_info('socket') if stream is not None else None
+        if sock is not None:
+            sock.shutdown(socket.SHUT_RDWR)
+
+    def close(self):
+        self._response.close()
+
+
+class HTTP2SessionPool:
+    def __init__(self, pool_size, headers=None):
+        # httpx.Client 是线程安全的，所有工作线程共用；HTTP/2 下请求在少数连接上多路复用
+        self.client = httpx.Client(
+            http2=True,
+            headers=headers or {},
+            follow_redirects=True,
+            limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size)
+        )
+
+    def get(self):
+        """所有线程共用同一个客户端"""
+        return self
+
+    def request(self, method, url, timeout=None, headers=None, stream=False):
+        """发出请求，接口与 requests.Session.request 的常用参数一致"""
+        with translate_errors():
+            request = self.client.build_request(method, url, headers=headers, timeout=timeout)
+            return HTTP2Response(self.client.send(request, stream=stream))
+
+    def close(self):
+        """关闭客户端及其连接"""
+        self.client.close()
+
+
+def create_session_pool(transport, pool_size, headers=None):
+    """按传输方式创建会话池；http2 依赖缺失时回退到 http1"""
+    if transport not in TRANSPORTS:
+        raise ValueError(f"未知的传输方式: {transport}，可选 {', '.join(TRANSPORTS)}")
+    if transport == 'http2':
+        if httpx is None:
+            print("⚠️  未安装 httpx，HTTP/2 不可用，改用 HTTP/1.1")
+        else:
+            try:
+                return HTTP2SessionPool(pool_size, headers)
+            except ImportError:
+                print("⚠️  未安装 h2，HTTP/2 不可用，改用 HTTP/1.1（pip install httpx[http2]）")
+    return SessionPool(pool_size, headers)
@@ -5,78 +5,68 @@
 专门针对企业人才引进、房屋补贴、落户服务等政策
 """
 
-import requests
 import re
 import json
-import time
 import pandas as pd
-from bs4 import BeautifulSoup
 from datetime import datetime
-from urllib.parse import urljoin, urlparse
+from urllib.parse import urljoin
 import os
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from fetch_engine import default_engine
+from crawl_frontier import CrawlFrontier
+from content_templates import ContentTemplates
+from pagination import PaginationWalker, SearchHarvester
+from link_priority import anchor_date, top_links
+from url_canon import canonical_url, policy_id
+from documents import parse_html
+from list_parser import parse_links, candidate_anchors
+from keyword_matcher import KeywordMatcher, score_categories, sentences_by_keyword
+from detail_metadata import parse_detail_metadata
 
 class TalentFocusedCrawler:
-    def __init__(self):
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
-        })
-        
-        # 专门针对人才政策的URL
-        self.urls = [
+    def __init__(self, engine=None, frontier=None, transport='http1', templates=None):
+        # 共享抓取引擎：并发抓取、按主机限制并发，响应缓存到磁盘
+        # transport: 'http1' 或 'http2'（服务器支持时多路复用同一连接）
+        self.engine = engine or default_engine(transport=transport)
+        # 抓取前沿：记录已抓过的详情页，增量运行时只抓新页面和到期页面
+        self.frontier = frontier or CrawlFrontier('talent_focused')
+        # 正文提取模板：按主机和URL模式记住取到正文的选择器，新页面结构才完整尝试
+        self.templates = templates or ContentTemplates('talent_focused')
+        # 部门列表页自动翻页，搜索关键词按新结果占比翻页
+        self.pagination = PaginationWalker(self.engine, frontier=self.frontier)
+        self.search = SearchHarvester(self.engine)
+        
+        # 政务公开各部门代码，列表页由翻页器自动识别页数
+        self.department_codes = [
             # 政务公开 - 更多页面
-            "https://www.xuhui.gov.cn/xxgk/portal/article/organizationArticle?code=xhxxgk_wbj_xxgyhb&page=1",
-            "https://www.xuhui.gov.cn/xxgk/portal/article/organizationArticle?code=xhxxgk_wbj_xxgyhb&page=2",
-            "https://www.xuhui.gov.cn/xxgk/portal/article/organizationArticle?code=xhxxgk_wbj_xxgyhb&page=3",
-            "https://www.xuhui.gov.cn/xxgk/portal/article/organizationArticle?code=xhxxgk_wbj_xxgyhb&page=4",
-            "https://www.xuhui.gov.cn/xxgk/portal/article/organizationArticle?code=xhxxgk_wbj_xxgyhb&page=5",
-            "https://www.xuhui.gov.cn/xxgk/portal/article/organizationArticle?code=xhxxgk_wbj_xxgyhb&page=6",
+            "xhxxgk_wbj_xxgyhb",
             
             # 人力资源和社会保障局 - 重点扩展
-            "https://www.xuhui.gov.cn/xxgk/portal/article/organizationArticle?code=xhxxgk_wbj_rshbj&page=1",
-            "https://www.xuhui.gov.cn/xxgk/portal/article/organizationArticle?code=xhxxgk_wbj_rshbj&page=2",
-            "https://www.xuhui.gov.cn/xxgk/portal/article/organizationArticle?code=xhxxgk_wbj_rshbj&page=3",
-            "https://www.xuhui.gov.cn/xxgk/portal/article/organizationArticle?code=xhxxgk_wbj_rshbj&page=4",
-            "https://www.xuhui.gov.cn/xxgk/portal/article/organizationArticle?code=xhxxgk_wbj_rshbj&page=5",
-            "https://www.xuhui.gov.cn/xxgk/portal/article/organizationArticle?code=xhxxgk_wbj_rshbj&page=6",
+            "xhxxgk_wbj_rshbj",
             
             # 住房保障和房屋管理局 - 重点关注
-            "https://www.xuhui.gov.cn/xxgk/portal/article/organizationArticle?code=xhxxgk_wbj_zfbzj&page=1",
-            "https://www.xuhui.gov.cn/xxgk/portal/article/organizationArticle?code=xhxxgk_wbj_zfbzj&page=2",
-            "https://www.xuhui.gov.cn/xxgk/portal/article/organizationArticle?code=xhxxgk_wbj_zfbzj&page=3",
-            "https://www.xuhui.gov.cn/xxgk/portal/article/organizationArticle?code=xhxxgk_wbj_zfbzj&page=4",
+            "xhxxgk_wbj_zfbzj",
             
             # 科学技术委员会
-            "https://www.xuhui.gov.cn/xxgk/portal/article/organizationArticle?code=xhxxgk_wbj_kjw&page=1",
-            "https://www.xuhui.gov.cn/xxgk/portal/article/organizationArticle?code=xhxxgk_wbj_kjw&page=2",
-            "https://www.xuhui.gov.cn/xxgk/portal/article/organizationArticle?code=xhxxgk_wbj_kjw&page=3",
-            "https://www.xuhui.gov.cn/xxgk/portal/article/organizationArticle?code=xhxxgk_wbj_kjw&page=4",
-            "https://www.xuhui.gov.cn/xxgk/portal/article/organizationArticle?code=xhxxgk_wbj_kjw&page=5",
+            "xhxxgk_wbj_kjw",
             
             # 教育局 - 人才子女教育
-            "https://www.xuhui.gov.cn/xxgk/portal/article/organizationArticle?code=xhxxgk_wbj_jyj&page=1",
-            "https://www.xuhui.gov.cn/xxgk/portal/article/organizationArticle?code=xhxxgk_wbj_jyj&page=2",
-            "https://www.xuhui.gov.cn/xxgk/portal/article/organizationArticle?code=xhxxgk_wbj_jyj&page=3",
+            "xhxxgk_wbj_jyj",
             
             # 卫生健康委员会 - 人才医疗服务
-            "https://www.xuhui.gov.cn/xxgk/portal/article/organizationArticle?code=xhxxgk_wbj_wsjkw&page=1",
-            "https://www.xuhui.gov.cn/xxgk/portal/article/organizationArticle?code=xhxxgk_wbj_wsjkw&page=2",
+            "xhxxgk_wbj_wsjkw",
             
             # 公安分局 - 落户服务
-            "https://www.xuhui.gov.cn/xxgk/portal/article/organizationArticle?code=xhxxgk_wbj_gafj&page=1",
-            "https://www.xuhui.gov.cn/xxgk/portal/article/organizationArticle?code=xhxxgk_wbj_gafj&page=2",
+            "xhxxgk_wbj_gafj",
             
             # 通知公告 - 人才相关通知
-            "https://www.xuhui.gov.cn/xxgk/portal/article/organizationArticle?code=xhxxgk_wbj_gggs&page=1",
-            "https://www.xuhui.gov.cn/xxgk/portal/article/organizationArticle?code=xhxxgk_wbj_gggs&page=2",
-            "https://www.xuhui.gov.cn/xxgk/portal/article/organizationArticle?code=xhxxgk_wbj_gggs&page=3",
+            "xhxxgk_wbj_gggs",
             
             # 规范性文件
-            "https://www.xuhui.gov.cn/xxgk/portal/article/organizationArticle?code=xhxxgk_wbj_zcwj&page=1",
-            "https://www.xuhui.gov.cn/xxgk/portal/article/organizationArticle?code=xhxxgk_wbj_zcwj&page=2",
-            "https://www.xuhui.gov.cn/xxgk/portal/article/organizationArticle?code=xhxxgk_wbj_zcwj&page=3",
-            
+            "xhxxgk_wbj_zcwj",
+        ]
+        
+        # 专门针对人才政策的URL
+        self.urls = [
             # 专门的人才政策搜索
             "https://www.xuhui.gov.cn/search/pcRender?pageId=51bc01c2a0b04b5e8816d5eaea8c6df4&advance=true&tpl=2068&keyword=人才引进",
             "https://www.xuhui.gov.cn/search/pcRender?pageId=51bc01c2a0b04b5e8816d5eaea8c6df4&advance=true&tpl=2068&keyword=人才补贴",
@@ -171,26 +161,23 @@ class TalentFocusedCrawler:
             ]
         }
         
+        # 关键词匹配器只建一次，筛选链接、提取申报要求时直接使用
+        self.talent_matcher = KeywordMatcher(self.talent_keywords)
+        self.application_matcher = KeywordMatcher(
+            [k for keywords in self.application_keywords.values() for k in keywords])
+        
         self.policies = []
 
     def fetch_page(self, url):
         """获取页面内容"""
-        try:
-            print(f"正在爬取: {url}")
-            response = self.session.get(url, timeout=15)
-            response.raise_for_status()
-            response.encoding = 'utf-8'
-            return response.text
-        except Exception as e:
-            print(f"获取页面失败 {url}: {e}")
-            return None
+        return self.engine.fetch_text(url)
 
     def extract_policy_links(self, html, base_url):
         """从列表页提取政策链接 - 人才政策专用版"""
         if not html:
             return []
         
-        soup = BeautifulSoup(html, 'html.parser')
+        soup = parse_links(html)
         links = []
         
         # 多种选择器策略
@@ -204,37 +191,36 @@ class TalentFocusedCrawler:
             '.news-title a'
         ]
         
-        found_links = []
-        for selector in link_selectors:
-            found_links.extend(soup.select(selector))
+        # 一次遍历所有链接：按最先匹配的选择器和文档顺序排列，每个链接只提取一次文字
+        found_links = candidate_anchors(soup, link_selectors)
         
         # 人才政策识别
         seen_hrefs = set()
-        for a in found_links:
-            href = a.get('href')
-            title = a.get_text(strip=True)
-            
+        for a, href, title in found_links:
             if href and href not in seen_hrefs and len(title) > 5:
                 # 更精确的人才政策识别
-                is_talent_related = any(keyword in title for keyword in self.talent_keywords)
+                is_talent_related = self.talent_matcher.contains_any(title)
                 
                 if is_talent_related:
-                    full_url = urljoin(base_url, href)
+                    full_url = canonical_url(urljoin(base_url, href))
                     links.append({
                         'title': title,
-                        'url': full_url
+                        'url': full_url,
+                        'date': anchor_date(a),
+                        'source': base_url
                     })
                     seen_hrefs.add(href)
         
         return links
 
-    def extract_policy_content(self, url):
+    def extract_policy_content(self, url, html=None):
         """提取政策详细内容"""
-        html = self.fetch_page(url)
+        if html is None:
+            html = self.fetch_page(url)
         if not html:
             return None
         
-        soup = BeautifulSoup(html, 'html.parser')
+        soup = parse_html(html)
         
         # 提取标题
         title = ""
@@ -248,66 +234,30 @@ class TalentFocusedCrawler:
                 title = title_elem.get_text(strip=True)
                 break
         
-        # 提取内容
-        content = ""
+        # 提取内容：同类页面直接用学到的选择器，新页面结构才依次尝试各选择器和 body 全文
         content_selectors = [
             '.content', '.art-content', '.main-content', '.policy-content',
             '[class*="content"]', '.main', 'article', '.detail', '.text'
         ]
-        for selector in content_selectors:
-            content_elem = soup.select_one(selector)
-            if content_elem:
-                for nav in content_elem.select('nav, .nav, .menu, .breadcrumb, .pagination'):
-                    nav.decompose()
-                content = content_elem.get_text(strip=True)
-                if len(content) > 200:
-                    break
-        
-        if not content or len(content) < 100:
-            body = soup.find('body')
-            if body:
-                for elem in body.select('nav, .nav, .menu, .sidebar, .footer, .header'):
-                    elem.decompose()
-                content = body.get_text(strip=True)
-        
-        # 提取发布时间
-        publish_date = ""
-        date_patterns = [
-            r'(\d{4}[-年]\d{1,2}[-月]\d{1,2}[日]?)',
-            r'(\d{4}/\d{1,2}/\d{1,2})',
-            r'(\d{4}\.\d{1,2}\.\d{1,2})',
-            r'发布时间[：:]\s*(\d{4}[-年]\d{1,2}[-月]\d{1,2})',
-            r'时间[：:]\s*(\d{4}[-年]\d{1,2}[-月]\d{1,2})'
-        ]
+        content = self.templates.extract(
+            url, soup, content_selectors,
+            remove='nav, .nav, .menu, .breadcrumb, .pagination',
+            body_remove='nav, .nav, .menu, .sidebar, .footer, .header'
+        )
         
-        search_text = content + title + str(soup)
-        for pattern in date_patterns:
-            match = re.search(pattern, search_text)
-            if match:
-                publish_date = match.group(1)
-                break
-        
-        # 提取发布部门
-        department = ""
-        dept_patterns = [
-            r'发布机构[：:]\s*([^，。；！？\n]+)',
-            r'发布部门[：:]\s*([^，。；！？\n]+)',
-            r'(徐汇区[^，。；！？\n]*?[局|委|办|中心|部|处])',
-            r'(上海市徐汇区[^，。；！？\n]*?[局|委|办|中心|部|处])'
-        ]
-        
-        for pattern in dept_patterns:
-            match = re.search(pattern, search_text)
-            if match:
-                department = match.group(1).strip()
-                break
+        # 发布时间、发布部门、发文字号、索引号和主题分类从详情页头部字段读取
+        metadata = parse_detail_metadata(soup, title, content)
         
         return {
             'title': title,
             'url': url,
+            'policy_id': policy_id(url),
             'content': content[:6000],
-            'publish_date': publish_date,
-            'department': department,
+            'publish_date': metadata['publish_date'],
+            'department': metadata['department'],
+            'document_number': metadata['document_number'],
+            'index_number': metadata['index_number'],
+            'subject': metadata['subject'],
             'crawl_time': datetime.now().isoformat()
         }
 
@@ -344,16 +294,8 @@ class TalentFocusedCrawler:
             ]
         }
         
-        # 计算分类得分
-        category_scores = {}
-        for category, keywords in categories.items():
-            score = 0
-            for keyword in keywords:
-                if keyword in policy['title']:
-                    score += 3
-                if keyword in policy['content']:
-                    score += 1
-            category_scores[category] = score
+        # 计算分类得分：标题中出现的关键词3分，内容中1分
+        category_scores = score_categories(categories, policy['title'], policy['content'])
         
         if category_scores:
             best_category = max(category_scores, key=category_scores.get)
@@ -367,13 +309,16 @@ class TalentFocusedCrawler:
         text = f"{policy['title']} {policy['content']}"
         requirements = {}
         
+        # 所有句子只扫描一遍，找出各关键词所在的句子
+        sentences = re.split(r'[。！？；\n]', text)
+        hits = sentences_by_keyword(sentences, self.application_matcher)
+        
         for req_type, keywords in self.application_keywords.items():
             found_requirements = []
             
             for keyword in keywords:
-                sentences = re.split(r'[。！？；\n]', text)
-                for sentence in sentences:
-                    if keyword in sentence and len(sentence.strip()) > 10:
+                for sentence in (sentences[i] for i in hits.get(keyword, [])):
+                    if len(sentence.strip()) > 10:
                         cleaned = sentence.strip()
                         if (len(cleaned) > 15 and 
                             not cleaned.startswith(('首页', '返回', '上一页', '下一页')) and
@@ -394,53 +339,62 @@ class TalentFocusedCrawler:
         
         return requirements
 
-    def crawl_talent_policies(self):
-        """爬取人才政策"""
-        print("开始专项爬取徐汇区企业人才政策...")
-        print(f"将爬取 {len(self.urls)} 个人才政策专用URL源")
-        
-        os.makedirs('data', exist_ok=True)
-        
+    def collect_links(self, list_pages, documents=None):
+        """
+        从列表页收集人才政策链接，按政策ID去重并记入抓取前沿
+        documents: 多个爬虫配置共用的 DocumentCache（见 multi_profile_crawler.py）
+        """
         all_links = []
-        
-        # 并发爬取
-        def fetch_links(url):
-            html = self.fetch_page(url)
-            if html:
-                return self.extract_policy_links(html, url)
-            return []
-        
-        with ThreadPoolExecutor(max_workers=3) as executor:
-            future_to_url = {executor.submit(fetch_links, url): url for url in self.urls}
-            for future in as_completed(future_to_url):
-                url = future_to_url[future]
-                try:
-                    links = future.result()
-                    all_links.extend(links)
-                    if links:
-                        print(f"从 {url} 获取到 {len(links)} 个人才政策链接")
-                except Exception as e:
-                    print(f"处理 {url} 时出错: {e}")
-                time.sleep(0.5)
-        
-        # 去重
+        for url, result in list_pages:
+            try:
+                links = self.frontier.list_links(url, result, self.extract_policy_links, documents)
+                all_links.extend(links)
+                if links:
+                    print(f"从 {url} 获取到 {len(links)} 个人才政策链接")
+            except Exception as e:
+                print(f"处理 {url} 时出错: {e}")
+        
+        # 按政策ID去重，同一政策的不同URL写法只保留一个
         unique_links = []
-        seen_urls = set()
+        seen_ids = set()
         for link in all_links:
-            if link['url'] not in seen_urls:
+            if policy_id(link['url']) not in seen_ids:
                 unique_links.append(link)
-                seen_urls.add(link['url'])
+                seen_ids.add(policy_id(link['url']))
         
         print(f"去重后共找到 {len(unique_links)} 个人才政策链接")
-        
-        # 爬取详细内容，增加到60个
-        target_links = unique_links[:60]
-        print(f"将详细爬取前 {len(target_links)} 个人才政策")
-        
+        self.frontier.mark_seen(unique_links)
+        return unique_links
+
+    def detail_candidates(self, unique_links):
+        """需要详细爬取的链接：按标题关键词、列表日期和来源部门排序，优先爬取价值最高的60个"""
+        target_links = top_links(unique_links, 60, self.talent_matcher)
+        print(f"将按优先级详细爬取 {len(target_links)} 个人才政策")
+        return target_links
+
+    def process_detail_pages(self, target_links, detail_pages, documents=None):
+        """
+        逐个解析详情页并保留人才政策
+        detail_pages: {url: FetchResult}，不在其中的链接沿用上次结果
+        """
         for i, link in enumerate(target_links, 1):
             print(f"正在处理第 {i}/{len(target_links)} 个政策: {link['title'][:60]}...")
             
-            policy = self.extract_policy_content(link['url'])
+            if link['url'] not in detail_pages:
+                policy = self.frontier.get_record(link['url'])
+                if policy:
+                    self.policies.append(policy)
+                    print(f"  ♻️  沿用上次结果 (分类: {policy['category']})")
+                continue
+            
+            result = detail_pages[link['url']]
+            if not result.ok:
+                self.frontier.mark_failed(link['url'])
+                continue
+            
+            saved = None
+            html = documents.parse(link['url'], result.text) if documents is not None else result.text
+            policy = self.extract_policy_content(link['url'], html)
             if policy and len(policy['content']) > 150:
                 policy['category'] = self.classify_policy(policy)
                 policy['application_requirements'] = self.extract_application_requirements(policy)
@@ -455,13 +409,40 @@ class TalentFocusedCrawler:
                 
                 if has_talent_req or policy['category'] in talent_categories:
                     self.policies.append(policy)
+                    saved = policy
                     print(f"  ✅ 已保存 (分类: {policy['category']})")
                 else:
                     print(f"  ❌ 跳过 (非人才政策)")
             
-            time.sleep(1.2)
+            self.frontier.mark_fetched(link['url'], result.content, saved)
+
+    def crawl_talent_policies(self, deadline=None, budget=None):
+        """爬取人才政策"""
+        # deadline: 整次爬取的时间预算（秒）；budget: 爬取预算（CrawlBudget），见 FetchEngine.set_deadline / set_budget
+        self.engine.set_deadline(deadline)
+        self.engine.set_budget(budget)
+        print("开始专项爬取徐汇区企业人才政策...")
+        print(f"将爬取 {len(self.department_codes)} 个部门列表和 {len(self.urls)} 个人才政策专用URL源")
+        
+        os.makedirs('data', exist_ok=True)
+        
+        # 并发爬取所有列表页：部门列表自动翻页，各搜索关键词翻页到没有足够新结果为止
+        list_pages = self.pagination.walk(self.department_codes)
+        list_pages += self.search.harvest(self.urls)
+        unique_links = self.collect_links(list_pages)
+        
+        # 只抓取从未抓过或已到刷新时间的详情页，其余沿用上次结果；已到截止时间或预算用完时不再抓取
+        target_links = self.detail_candidates(unique_links)
+        due_links = [] if self.engine.should_stop() else self.frontier.due(target_links)
+        print(f"其中 {len(due_links)} 个需要抓取，{len(target_links) - len(due_links)} 个沿用上次结果")
+        
+        # 并发抓取所有详情页，再逐个解析
+        detail_pages = self.engine.fetch_many([link['url'] for link in due_links])
+        self.process_detail_pages(target_links, detail_pages)
         
+        self.engine.report_stop_reason()
         print(f"\n🎯 成功爬取 {len(self.policies)} 个人才政策")
+        self.engine.print_summary()
 
     def analyze_and_export(self):
         """分析并导出人才政策数据"""
@@ -511,7 +492,11 @@ class TalentFocusedCrawler:
                 '分类': policy.get('category', ''),
                 '发布部门': policy.get('department', ''),
                 '发布时间': policy.get('publish_date', ''),
+                '发文字号': policy.get('document_number', ''),
+                '索引号': policy.get('index_number', ''),
+                '主题分类': policy.get('subject', ''),
                 '链接': policy.get('url', ''),
+                '政策ID': policy_id(policy.get('url', '')),
                 '企业基本条件': req.get('企业基本条件', ''),
                 '人才条件要求': req.get('人才条件要求', ''),
                 '申报材料清单': req.get('申报材料清单', ''),
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+正文提取模板：同一URL模式下结构不同的页面，模板提取的正文与完整流程一致
+运行: python -m pytest tests 或 python -m unittest discover tests
+"""
+
+import os
+import sys
+import unittest
+from bs4 import BeautifulSoup
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from content_templates import ContentTemplates, cascade_content
+
+SELECTORS = ['.content', '.main', 'article']
+REMOVE = '.nav'
+
+# 没有 .content，完整流程取 .main
+MAIN_ONLY_PAGE = f'<html><body><div class="main">{"甲" * 300}</div></body></html>'
+# .main 中有侧边导航和 .content，完整流程取 .content
+MAIN_WITH_CONTENT_PAGE = (
+    '<html><body><div class="main">'
+    f'<div class="sidebar">{"栏目导航" * 75}</div>'
+    f'<div class="content">{"乙" * 300}</div>'
+    '</div></body></html>'
+)
+
+
+class ContentTemplatesTest(unittest.TestCase):
+    def setUp(self):
+        self.templates = ContentTemplates('test', path=':memory:')
+
+    def tearDown(self):
+        self.templates.close()
+
+    def extract(self, url, html):
+        soup = BeautifulSoup(html, 'html.parser')
+        return (self.templates.extract(url, soup, SELECTORS, remove=REMOVE),
+                cascade_content(soup, SELECTORS, remove=REMOVE)[0])
+
+    def test_earlier_selector_on_later_page_overrides_template(self):
+        got, expected = self.extract('https://www.xuhui.gov.cn/detail?id=1', MAIN_ONLY_PAGE)
+        self.assertEqual(got, expected)
+
+        # 同一模式的模板是 .main，但本页有排在前面的 .content
+        got, expected = self.extract('https://www.xuhui.gov.cn/detail?id=2', MAIN_WITH_CONTENT_PAGE)
+        self.assertEqual(got, expected)
+        self.assertEqual(got, "乙" * 300)
+        self.assertEqual(self.templates.hits, 0)
+        self.assertEqual(self.templates.relearned, 1)
+
+    def test_same_structure_uses_template(self):
+        for policy in range(3):
+            got, expected = self.extract(f'https://www.xuhui.gov.cn/detail?id={policy}', MAIN_ONLY_PAGE)
+            self.assertEqual(got, expected)
+        self.assertEqual(self.templates.learned, 1)
+        self.assertEqual(self.templates.hits, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
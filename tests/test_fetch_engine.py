@@ -0,0 +1,314 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+抓取引擎的请求总时长：本地慢速服务器逐字节发送响应体时，total_timeout 仍能按时中止读取
+（requests、httpx 的 HTTP/1.1 和 HTTP/2 传输都要验证；HTTP/2 完全收不到数据时由单次读取超时结束）；
+爬取预算用完后，其余请求不再排队等待限速令牌；熔断器放行的试探请求无论如何结束都会结束试探期
+运行: python -m pytest tests 或 python -m unittest discover tests
+"""
+
+import os
+import sys
+import time
+import socket
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+try:
+    import httpx
+    import h2.config
+    import h2.events
+    import h2.connection
+except ImportError:
+    httpx = None
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fetch_engine import FetchEngine
+from rate_limiter import HostRateLimiter
+from crawl_budget import CrawlBudget
+from circuit_breaker import CircuitBreaker
+
+BODY_SIZE = 3 * 1024
+# 逐字节发送的间隔：整个响应体要十几秒才能发完
+DRIP_INTERVAL = 0.005
+
+
+class SlowDripHandler(BaseHTTPRequestHandler):
+    """/slow 逐字节缓慢发送响应体，/fast 一次发完，/nolength 一次发完但不给 Content-Length"""
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        if self.path != '/nolength':
+            self.send_header('Content-Length', str(BODY_SIZE))
+        self.end_headers()
+        try:
+            if self.path == '/slow':
+                for _ in range(BODY_SIZE):
+                    self.wfile.write(b'x')
+                    self.wfile.flush()
+                    time.sleep(DRIP_INTERVAL)
+            else:
+                self.wfile.write(b'x' * BODY_SIZE)
+        except OSError:
+            # 客户端中止读取后关闭了连接
+            pass
+
+
+class H2DripServer:
+    """
+    明文 HTTP/2（prior knowledge）服务器：/slow 每个数据帧只有一个字节，
+    /stall 发出响应头和一个数据帧后不再发送
+    """
+
+    def __init__(self):
+        self.sock = socket.socket()
+        self.sock.bind(('127.0.0.1', 0))
+        self.sock.listen()
+        self.base_url = f"http://127.0.0.1:{self.sock.getsockname()[1]}"
+        threading.Thread(target=self._accept, daemon=True).start()
+
+    def _accept(self):
+        while True:
+            try:
+                client, _ = self.sock.accept()
+            except OSError:
+                return
+            threading.Thread(target=self._serve, args=(client,), daemon=True).start()
+
+    def _serve(self, client):
+        conn = h2.connection.H2Connection(config=h2.config.H2Configuration(client_side=False))
+        conn.initiate_connection()
+        try:
+            client.sendall(conn.data_to_send())
+            while True:
+                data = client.recv(65535)
+                if not data:
+                    return
+                for event in conn.receive_data(data):
+                    if isinstance(event, h2.events.RequestReceived):
+                        path = dict(event.headers)[b':path']
+                        self._respond(client, conn, event.stream_id, path)
+                client.sendall(conn.data_to_send())
+        except OSError:
+            pass
+        finally:
+            client.close()
+
+    def _respond(self, client, conn, stream_id, path):
+        conn.send_headers(stream_id, [(':status', '200'), ('content-length', str(BODY_SIZE))])
+        conn.send_data(stream_id, b'x')
+        client.sendall(conn.data_to_send())
+        if path == b'/stall':
+            time.sleep(10)
+            return
+        for _ in range(BODY_SIZE - 1):
+            time.sleep(DRIP_INTERVAL)
+            conn.send_data(stream_id, b'x')
+            client.sendall(conn.data_to_send())
+
+    def close(self):
+        self.sock.close()
+
+
+class LocalServerTest(unittest.TestCase):
+    """在本地启动 SlowDripHandler 服务器的测试"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), SlowDripHandler)
+        cls.server.daemon_threads = True
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.base_url = f"http://127.0.0.1:{cls.server.server_address[1]}"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+
+class TotalTimeoutTest(LocalServerTest):
+    def setUp(self):
+        self.engine = FetchEngine(total_timeout=1, timeout=5, verbose=False)
+
+    def tearDown(self):
+        self.engine.close()
+
+    def test_slow_drip_body_aborted_at_total_timeout(self):
+        started = time.monotonic()
+        result = self.engine.fetch(self.base_url + '/slow')
+        elapsed = time.monotonic() - started
+
+        self.assertLess(elapsed, 2.5)
+        self.assertFalse(result.ok)
+        self.assertEqual(self.engine.stats['deadline_aborts'], 1)
+        # 中止前读到的部分内容保留在结果中
+        self.assertTrue(result.truncated)
+        self.assertGreater(len(result.content), 0)
+        self.assertLess(len(result.content), BODY_SIZE)
+
+    def test_fast_body_unaffected(self):
+        result = self.engine.fetch(self.base_url + '/fast')
+
+        self.assertTrue(result.ok)
+        self.assertEqual(len(result.content), BODY_SIZE)
+        self.assertEqual(self.engine.stats['deadline_aborts'], 0)
+
+    def test_deadlines_share_one_watchdog_thread(self):
+        before = threading.active_count()
+        self.engine.fetch_many([f"{self.base_url}/fast?page={i}" for i in range(20)])
+
+        # 工作线程之外只多出一个 watchdog 线程，而不是每个请求一个定时器线程
+        self.assertLessEqual(threading.active_count() - before, self.engine.executor._max_workers + 1)
+        self.assertEqual(sum(t.name == 'fetch-watchdog' for t in threading.enumerate()), 1)
+
+
+class ContentLengthTest(LocalServerTest):
+    def setUp(self):
+        self.engine = FetchEngine(verbose=False)
+
+    def tearDown(self):
+        self.engine.close()
+
+    def test_truncated_body_without_header_has_unknown_length(self):
+        result = self.engine.fetch(self.base_url + '/nolength', max_bytes=1024)
+
+        self.assertTrue(result.truncated)
+        self.assertEqual(len(result.content), 1024)
+        self.assertIsNone(result.content_length)
+
+    def test_length_from_header_or_complete_body(self):
+        truncated = self.engine.fetch(self.base_url + '/fast', max_bytes=1024)
+        complete = self.engine.fetch(self.base_url + '/nolength')
+
+        self.assertEqual(truncated.content_length, BODY_SIZE)
+        self.assertEqual(complete.content_length, BODY_SIZE)
+
+
+@unittest.skipIf(httpx is None, "需要 httpx[http2]")
+class HTTPXTotalTimeoutTest(LocalServerTest):
+    """httpx 传输：回退到 HTTP/1.1 时关闭 socket 中止读取，HTTP/2 在每个数据帧之后检查截止时间"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.h2_server = H2DripServer()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.h2_server.close()
+        super().tearDownClass()
+
+    def setUp(self):
+        self.engine = FetchEngine(total_timeout=1, timeout=5, transport='http2', verbose=False)
+
+    def tearDown(self):
+        self.engine.close()
+
+    def assert_aborted(self, url):
+        started = time.monotonic()
+        result = self.engine.fetch(url)
+        elapsed = time.monotonic() - started
+
+        self.assertLess(elapsed, 2.5)
+        self.assertFalse(result.ok)
+        self.assertEqual(self.engine.stats['deadline_aborts'], 1)
+        self.assertTrue(result.truncated)
+        self.assertLess(len(result.content), BODY_SIZE)
+
+    def test_http1_fallback_slow_drip_aborted(self):
+        self.assert_aborted(self.base_url + '/slow')
+
+    def use_prior_knowledge_http2(self):
+        """明文连接上直接使用 HTTP/2"""
+        self.engine.sessions.client.close()
+        self.engine.sessions.client = httpx.Client(http1=False, http2=True)
+
+    def test_http2_slow_drip_aborted_between_frames(self):
+        self.use_prior_knowledge_http2()
+        self.assert_aborted(self.h2_server.base_url + '/slow')
+
+    def test_http2_stalled_body_ends_at_read_timeout(self):
+        # 不能从其他线程中止 HTTP/2 的读取：单次读取超时已限制为不超过请求总时长
+        self.use_prior_knowledge_http2()
+        self.assert_aborted(self.h2_server.base_url + '/stall')
+
+
+class BudgetTest(LocalServerTest):
+    def setUp(self):
+        # 每秒2个令牌：预算外的25个请求若仍排队取令牌，要等十几秒
+        self.engine = FetchEngine(rate_limiter=HostRateLimiter(rate=2, burst=4), verbose=False)
+        self.engine.set_budget(CrawlBudget(max_requests=5))
+
+    def tearDown(self):
+        self.engine.close()
+
+    def test_exhausted_budget_does_not_wait_for_tokens(self):
+        urls = [f"{self.base_url}/fast?page={i}" for i in range(30)]
+        started = time.monotonic()
+        results = self.engine.fetch_many(urls)
+        elapsed = time.monotonic() - started
+
+        self.assertLess(elapsed, 3)
+        self.assertEqual(self.engine.stats['requests'], 5)
+        self.assertEqual(self.engine.stats['budget_rejected'], 25)
+        self.assertEqual(sum(result.ok for result in results.values()), 5)
+        self.assertTrue(self.engine.report_stop_reason().startswith('爬取预算已用完'))
+
+    def test_no_stop_reason_within_budget(self):
+        self.engine.fetch(self.base_url + '/fast')
+        self.assertIsNone(self.engine.report_stop_reason())
+        self.engine.set_budget(None)
+        self.engine.set_deadline(0.01)
+        time.sleep(0.02)
+        self.assertEqual(self.engine.report_stop_reason(), '已到爬取截止时间')
+
+
+class CircuitBreakerProbeTest(LocalServerTest):
+    def setUp(self):
+        self.breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+
+    def open_and_cool_down(self, url):
+        """使主机熔断并等到冷却结束，下一个请求即为试探请求"""
+        self.breaker.record_failure(url)
+        time.sleep(0.1)
+
+    def test_probe_not_sent_before_deadline_reopens_host(self):
+        url = self.base_url + '/fast'
+        limiter = HostRateLimiter(rate=0.1, burst=1)
+        limiter.acquire(url)
+        engine = FetchEngine(rate_limiter=limiter, circuit_breaker=self.breaker, verbose=False)
+        engine.set_deadline(5)
+        self.open_and_cool_down(url)
+
+        # 下一个令牌在截止时间之后，试探请求未发出
+        result = engine.fetch(url)
+        engine.close()
+
+        self.assertFalse(result.ok)
+        self.assertEqual(engine.stats['deadline_aborts'], 1)
+        # 主机重新熔断，冷却后可以再次试探，而不是一直停在试探状态
+        self.assertFalse(self.breaker.allow(url))
+        time.sleep(0.1)
+        self.assertTrue(self.breaker.allow(url))
+
+    def test_non_retryable_error_closes_breaker(self):
+        url = 'http://a..b/detail'
+        engine = FetchEngine(circuit_breaker=self.breaker, verbose=False)
+        self.open_and_cool_down(url)
+
+        result = engine.fetch(url)
+        engine.close()
+
+        self.assertFalse(result.ok)
+        self.assertEqual(self.breaker.open_hosts(), [])
+        self.assertTrue(self.breaker.allow(url))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+共享关键词匹配：在示例列表页的文字上与逐个关键词用 in 查找的结果一致，包括相互重叠、互为前缀的关键词
+运行: python -m pytest tests 或 python -m unittest discover tests
+"""
+
+import os
+import re
+import sys
+import unittest
+from bs4 import BeautifulSoup
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from keyword_matcher import KeywordMatcher, keyword_matcher, score_categories, sentences_by_keyword
+
+PAGES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'pages')
+PAGES = ['department_list.html', 'search_results.html', 'no_pager.html']
+
+# 爬虫的人才关键词（节选），含互为前缀（人才 / 人才公寓）和相互重叠（高层次人才 / 人才引进）的关键词
+TALENT_KEYWORDS = [
+    "人才引进", "高层次人才", "海外人才", "人才公寓", "人才", "人才房", "专家", "博士", "博士后",
+    "住房补贴", "住房", "补贴", "安居工程", "落户", "积分", "居住证", "人工智能", "智能", "AI", "ai",
+]
+
+CATEGORIES = {
+    '人才引进': ['人才引进', '高层次人才', '海外人才', '博士后', '专家'],
+    '住房保障': ['人才公寓', '住房补贴', '安居工程', '住房'],
+    '落户服务': ['落户', '积分', '居住证'],
+    '科技创新': ['人工智能', '智能', '科技创新'],
+    '空分类': [],
+}
+
+
+def read_text(name):
+    with open(os.path.join(PAGES_DIR, name), encoding='utf-8') as f:
+        return BeautifulSoup(f.read(), 'html.parser').get_text()
+
+
+def naive_find_all(keywords, text):
+    """参考实现：逐个关键词查找所有出现位置（含重叠），按位置、再按关键词列表顺序排列"""
+    keywords = list(dict.fromkeys(keyword for keyword in keywords if keyword))
+    hits = []
+    for order, keyword in enumerate(keywords):
+        start = text.find(keyword)
+        while start != -1:
+            hits.append((start, order, keyword))
+            start = text.find(keyword, start + 1)
+    return [(start, keyword) for start, order, keyword in sorted(hits)]
+
+
+class KeywordMatcherTest(unittest.TestCase):
+    def texts(self):
+        texts = [read_text(name) for name in PAGES]
+        texts.append('人才人才公寓高层次人才引进AI智能人工智能ai博士博士后')
+        texts.append('')
+        return texts
+
+    def test_matches_per_keyword_in_loop(self):
+        matcher = KeywordMatcher(TALENT_KEYWORDS)
+        for text in self.texts():
+            with self.subTest(text=text[:20]):
+                self.assertEqual(matcher.found(text), {keyword for keyword in TALENT_KEYWORDS if keyword in text})
+                self.assertEqual(matcher.contains_any(text), any(keyword in text for keyword in TALENT_KEYWORDS))
+                self.assertEqual(matcher.find_all(text), naive_find_all(TALENT_KEYWORDS, text))
+
+    def test_titles_match_per_keyword_in_loop(self):
+        matcher = KeywordMatcher(TALENT_KEYWORDS)
+        for name in PAGES:
+            with open(os.path.join(PAGES_DIR, name), encoding='utf-8') as f:
+                soup = BeautifulSoup(f.read(), 'html.parser')
+            for a in soup.find_all('a'):
+                title = a.get_text(strip=True)
+                self.assertEqual(matcher.contains_any(title), any(keyword in title for keyword in TALENT_KEYWORDS))
+
+    def test_duplicate_and_empty_keywords(self):
+        matcher = KeywordMatcher(['人才', '', '人才', '补贴'])
+        self.assertEqual(matcher.keywords, ['人才', '补贴'])
+        self.assertEqual(matcher.find_all('人才补贴人才'), [(0, '人才'), (2, '补贴'), (4, '人才')])
+        empty = KeywordMatcher([])
+        self.assertEqual(empty.find_all('人才'), [])
+        self.assertFalse(empty.contains_any('人才'))
+
+    def test_shared_matcher_is_reused(self):
+        self.assertIs(keyword_matcher(['人才', '补贴']), keyword_matcher(['人才', '补贴']))
+
+    def test_sentences_by_keyword(self):
+        matcher = KeywordMatcher(TALENT_KEYWORDS)
+        for text in self.texts():
+            sentences = [s for s in re.split(r'[。！？\n]', text) if s.strip()]
+            expected = {}
+            for keyword in TALENT_KEYWORDS:
+                indexes = [i for i, sentence in enumerate(sentences) if keyword in sentence]
+                if indexes:
+                    expected[keyword] = indexes
+            self.assertEqual(sentences_by_keyword(sentences, matcher), expected)
+
+    def test_score_categories(self):
+        texts = self.texts()
+        for title in ['关于开展2024年度徐汇区高层次人才引进工作的通知', '徐汇区人才公寓申请指南', '']:
+            for content in texts:
+                expected = {
+                    category: sum((3 if keyword in title else 0) + (1 if keyword in content else 0)
+                                  for keyword in keywords)
+                    for category, keywords in CATEGORIES.items()
+                }
+                self.assertEqual(score_categories(CATEGORIES, title, content), expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
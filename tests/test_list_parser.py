@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+列表页解析：lxml 解析出的链接文档在示例列表页上与 BeautifulSoup 的 select、get_text 结果一致；
+一次遍历的 candidate_anchors 与依次 select 各选择器再拼接的结果一致
+运行: python -m pytest tests 或 python -m unittest discover tests
+"""
+
+import os
+import sys
+import unittest
+from bs4 import BeautifulSoup
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from list_parser import parse_links, candidate_anchors, LinkDocument
+
+PAGES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'pages')
+PAGES = ['department_list.html', 'search_results.html', 'no_pager.html']
+
+# 各爬虫提取列表页链接时用到的选择器
+SELECTORS = [
+    'a[href*="detail"]', 'a[href*="article"]', 'a[href*="policy"]', 'a[href*="talent"]', 'a[href*="人才"]',
+    '.list-item a', '.title a', 'li a', '.policy-title a', '.news-title a', 'a[href]',
+]
+
+# 各爬虫的选择器组合（talent_focused、verified 的顺序，以及打乱顺序的一组）
+SELECTOR_LISTS = [
+    ['a[href*="detail"]', 'a[href*="article"]', '.list-item a', '.title a', 'li a', '.policy-title a',
+     '.news-title a'],
+    ['a[href*="detail"]', 'a[href*="article"]', '.list-item a', '.title a', 'li a'],
+    ['li a', '.news-title a', 'a[href*="人才"]', '.title a', 'a[href*="detail"]'],
+    SELECTORS,
+]
+
+
+def read_page(name):
+    with open(os.path.join(PAGES_DIR, name), encoding='utf-8') as f:
+        return f.read()
+
+
+def anchor_summary(anchors):
+    """链接的 href 和文字，用于比较不同解析器的结果"""
+    return [(a.get('href'), a.get_text(strip=True), a.get_text('|')) for a in anchors]
+
+
+def naive_candidates(soup, selectors):
+    """参考实现：依次 select 各选择器再拼接，同一链接只保留第一次出现 [(href, 文字)]"""
+    found = []
+    for selector in selectors:
+        found.extend(soup.select(selector))
+    seen = set()
+    candidates = []
+    for a in found:
+        if id(a) not in seen:
+            seen.add(id(a))
+            candidates.append((a.get('href'), a.get_text(strip=True)))
+    return candidates
+
+
+def first_by_href(candidates):
+    """爬虫按 href 去重后的结果"""
+    seen = set()
+    links = []
+    for href, title in candidates:
+        if href and href not in seen:
+            seen.add(href)
+            links.append((href, title))
+    return links
+
+
+class ParseLinksTest(unittest.TestCase):
+    def test_select_matches_beautifulsoup(self):
+        for name in PAGES:
+            html = read_page(name)
+            document = parse_links(html)
+            self.assertIsInstance(document, LinkDocument)
+            soup = BeautifulSoup(html, 'html.parser')
+            for selector in SELECTORS:
+                with self.subTest(page=name, selector=selector):
+                    self.assertEqual(anchor_summary(document.select(selector)),
+                                     anchor_summary(soup.select(selector)))
+
+    def test_text_skips_script_template_and_ruby(self):
+        html = ('<ul><li><a href="/detail?id=1">通知<script>var a = 1;</script><template>模板</template>全文</a></li>'
+                '<li><a href="/detail?id=2"><ruby>漢<rp>(</rp><rt>han</rt><rp>)</rp></ruby>字</a></li></ul>'
+                '<template><a href="/detail?id=3">模板中的链接</a></template>')
+        self.assertEqual(anchor_summary(parse_links(html).select('a[href*="detail"]')),
+                         anchor_summary(BeautifulSoup(html, 'html.parser').select('a[href*="detail"]')))
+        self.assertEqual([a.get_text() for a in parse_links(html).select('li a')], ['通知全文', '漢字'])
+
+    def test_parent_text_matches_beautifulsoup(self):
+        html = read_page('department_list.html')
+        ours = [a.parent.get_text(' ', strip=True) for a in parse_links(html).select('.list-item a')]
+        theirs = [a.parent.get_text(' ', strip=True)
+                  for a in BeautifulSoup(html, 'html.parser').select('.list-item a')]
+        self.assertEqual(ours, theirs)
+
+
+class CandidateAnchorsTest(unittest.TestCase):
+    def test_matches_per_selector_select_loop(self):
+        for name in PAGES:
+            html = read_page(name)
+            soup = BeautifulSoup(html, 'html.parser')
+            for selectors in SELECTOR_LISTS:
+                expected = naive_candidates(soup, selectors)
+                for document in (parse_links(html), soup):
+                    with self.subTest(page=name, selectors=selectors, parser=type(document).__name__):
+                        got = [(href, title) for a, href, title in candidate_anchors(document, selectors)]
+                        self.assertEqual(got, expected)
+                        self.assertEqual(first_by_href(got), first_by_href(expected))
+
+    def test_anchor_ranked_by_first_matching_selector(self):
+        html = ('<ul><li><a href="/a">列表A</a></li>'
+                '<li class="list-item"><a href="/detail?id=1">详情1</a></li>'
+                '<li><a href="/detail?id=2">详情2</a></li></ul>')
+        got = [href for a, href, title in candidate_anchors(parse_links(html), ['a[href*="detail"]', 'li a'])]
+        self.assertEqual(got, ['/detail?id=1', '/detail?id=2', '/a'])
+
+    def test_empty_page(self):
+        self.assertEqual(candidate_anchors(parse_links(''), SELECTORS), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+自动翻页：总页数识别与翻页停止规则，与逐页抓取的简单实现比较抓取到的页面
+运行: python -m pytest tests 或 python -m unittest discover tests
+"""
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fetch_engine import FetchResult
+from pagination import PaginationWalker, SearchHarvester, parse_total_pages, detail_ids, XUHUI_BASE_URL, LIST_PATH
+
+PAGES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'pages')
+
+
+def read_page(name):
+    with open(os.path.join(PAGES_DIR, name), encoding='utf-8') as f:
+        return f.read()
+
+
+def page_url(code, page):
+    return XUHUI_BASE_URL + LIST_PATH.format(code=code, page=page)
+
+
+def list_html(ids, pager=''):
+    items = ''.join(f'<li><a href="/xxgk/portal/article/detail?id={i}">政策{i}</a></li>' for i in ids)
+    return f'<html><body><ul>{items}</ul>{pager}</body></html>'
+
+
+class FakeEngine:
+    """按URL返回固定页面的抓取引擎，记录抓取过的URL；max_requests 模拟爬取预算"""
+
+    def __init__(self, site, max_requests=None):
+        self.site = site
+        self.max_requests = max_requests
+        self.fetched = []
+
+    def fetch_many(self, urls, timeout=None):
+        results = {}
+        for url in urls:
+            if self.should_stop():
+                results[url] = FetchResult(url, error='budget exhausted')
+                continue
+            self.fetched.append(url)
+            if url in self.site:
+                results[url] = FetchResult(url, 200, self.site[url].encode('utf-8'),
+                                           {'Content-Type': 'text/html; charset=utf-8'})
+            else:
+                results[url] = FetchResult(url, 404)
+        return results
+
+    def requests_left(self):
+        return None if self.max_requests is None else max(self.max_requests - len(self.fetched), 0)
+
+    def should_stop(self):
+        return self.requests_left() == 0
+
+
+class FakeFrontier:
+    """记录过的列表页及第1页是否未变化"""
+
+    def __init__(self, unchanged, known):
+        self.unchanged = set(unchanged)
+        self.known = set(known)
+
+    def list_unchanged(self, url, html):
+        return url in self.unchanged
+
+    def has_list_page(self, url):
+        return url in self.known
+
+
+def naive_walk(site, code, max_pages):
+    """逐页抓取的参考实现：有总页数时抓到总页数为止，否则抓到某页没有新的详情链接为止"""
+    first = site[page_url(code, 1)]
+    total = parse_total_pages(first)
+    if total is not None:
+        return [page_url(code, page) for page in range(1, min(total, max_pages) + 1)]
+    urls = [page_url(code, 1)]
+    seen = detail_ids(first)
+    for page in range(2, max_pages + 1):
+        html = site.get(page_url(code, page), '')
+        new_ids = detail_ids(html) - seen
+        if not new_ids:
+            break
+        urls.append(page_url(code, page))
+        seen.update(new_ids)
+    return urls
+
+
+def make_site():
+    """部门 known 有分页栏（示例列表页，共12页），unknown 没有分页栏、第4页重复第3页，short 只有1页"""
+    site = {page_url('known', 1): read_page('department_list.html')}
+    for page in range(2, 13):
+        site[page_url('known', page)] = list_html([f'k{page}a', f'k{page}b'], f'第 {page}/12 页')
+    for page in range(1, 4):
+        site[page_url('unknown', page)] = list_html([f'u{page}a', f'u{page}b'])
+    site[page_url('unknown', 4)] = list_html(['u3a', 'u3b'])
+    site[page_url('unknown', 5)] = list_html(['u5a'])
+    site[page_url('short', 1)] = read_page('no_pager.html')
+    return site
+
+
+class ParseTotalPagesTest(unittest.TestCase):
+    def test_fixture_pages(self):
+        self.assertEqual(parse_total_pages(read_page('department_list.html')), 12)
+        self.assertEqual(parse_total_pages(read_page('search_results.html')), 5)
+        # “共 0 页”不算总页数
+        self.assertIsNone(parse_total_pages(read_page('no_pager.html')))
+
+    def test_patterns_in_order(self):
+        self.assertEqual(parse_total_pages('<div>共 7 页</div><script>var totalPage = 9;</script>'), 7)
+        self.assertEqual(parse_total_pages('<script>pageCount: "3"</script>'), 3)
+        self.assertEqual(parse_total_pages('<span>第3页</span>'), None)
+
+
+class PaginationWalkerTest(unittest.TestCase):
+    CODES = ['known', 'unknown', 'short']
+
+    def walk(self, engine, max_pages=30, frontier=None):
+        walker = PaginationWalker(engine, max_pages=max_pages, frontier=frontier)
+        return walker.walk(self.CODES)
+
+    def test_pages_match_naive_walk(self):
+        site = make_site()
+        for max_pages in (1, 3, 5, 30):
+            with self.subTest(max_pages=max_pages):
+                pages = self.walk(FakeEngine(site), max_pages)
+                expected = [url for code in self.CODES for url in naive_walk(site, code, max_pages)]
+                self.assertEqual([url for url, result in pages], expected)
+                self.assertTrue(all(result.ok for url, result in pages))
+
+    def test_unchanged_first_page_skips_known_pages(self):
+        site = make_site()
+        known = [page_url('known', page) for page in range(1, 5)]
+        engine = FakeEngine(site)
+        pages = self.walk(engine, frontier=FakeFrontier([page_url('known', 1)], known))
+        # 第1页照常返回，上次记录过的第2-4页结果为None，由抓取前沿沿用上次的链接
+        self.assertEqual([(url, result is None) for url, result in pages[:4]],
+                         [(known[0], False)] + [(url, True) for url in known[1:]])
+        self.assertNotIn(page_url('known', 2), engine.fetched)
+
+    def test_budget_trims_known_pages_by_page_number(self):
+        site = make_site()
+        engine = FakeEngine(site, max_requests=6)
+        pages = self.walk(engine)
+        # 3个第1页之后只剩3个请求：known 的第2-4页，总页数未知的部门不再翻页
+        self.assertEqual(engine.fetched[3:], [page_url('known', page) for page in (2, 3, 4)])
+        self.assertEqual([url for url, result in pages],
+                         [page_url('known', page) for page in range(1, 5)] +
+                         [page_url('unknown', 1), page_url('short', 1)])
+
+    def test_budget_spent_on_first_pages(self):
+        engine = FakeEngine(make_site(), max_requests=3)
+        pages = self.walk(engine)
+        self.assertEqual(len(engine.fetched), 3)
+        self.assertEqual([url for url, result in pages], [page_url(code, 1) for code in self.CODES])
+
+
+class SearchHarvesterTest(unittest.TestCase):
+    def naive_harvest(self, site, urls, harvester):
+        """逐关键词、逐页计算新增比例的参考实现（各关键词同步翻页）"""
+        pages = {url: [] for url in urls}
+        seen = set()
+        active = list(urls)
+        page = 1
+        while active and page <= harvester.max_pages:
+            still_going = []
+            for url in active:
+                page_url = harvester.page_url(url, page)
+                ids = detail_ids(site.get(page_url, ''))
+                new_ids = ids - seen
+                if page == 1 or new_ids:
+                    pages[url].append(page_url)
+                seen.update(new_ids)
+                if ids and len(new_ids) / len(ids) >= harvester.min_yield:
+                    still_going.append(url)
+            active = still_going
+            page += 1
+        return [page_url for url in urls for page_url in pages[url]]
+
+    def test_stops_when_new_results_dry_up(self):
+        base = 'https://www.xuhui.gov.cn/search/pcRender?keyword='
+        urls = [base + 'a', base + 'b']
+        harvester = SearchHarvester(None, min_yield=0.5, max_pages=6)
+        site = {urls[0]: read_page('search_results.html')}
+        # 关键词 a：第2页全新，第3页只有1/3是新的，停止翻页
+        site[harvester.page_url(urls[0], 2)] = list_html(['a21', 'a22', 'a23'])
+        site[harvester.page_url(urls[0], 3)] = list_html(['a21', 'a22', 'a31'])
+        site[harvester.page_url(urls[0], 4)] = list_html(['a41'])
+        # 关键词 b：第1页与 a 的结果重叠一半，第2页与 a 的第2页重复
+        site[urls[1]] = list_html(['s001', 'b11'])
+        site[harvester.page_url(urls[1], 2)] = list_html(['a21', 'a22'])
+        site[harvester.page_url(urls[1], 3)] = list_html(['b31'])
+
+        engine = FakeEngine(site)
+        harvester.engine = engine
+        pages = harvester.harvest(urls)
+        self.assertEqual([url for url, result in pages], self.naive_harvest(site, urls, harvester))
+        self.assertEqual([url for url, result in pages],
+                         [urls[0], harvester.page_url(urls[0], 2), harvester.page_url(urls[0], 3), urls[1]])
+        self.assertNotIn(harvester.page_url(urls[0], 4), engine.fetched)
+        self.assertNotIn(harvester.page_url(urls[1], 3), engine.fetched)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+URL规范化与政策ID：只有徐汇区政府网站的详情页按 id 识别，其他网站的URL保留全部参数
+运行: python -m pytest tests 或 python -m unittest discover tests
+"""
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from url_canon import canonical_url, policy_id
+
+XUHUI_DETAIL = 'https://www.xuhui.gov.cn/xxgk/portal/article/detail?id=7'
+
+
+class CanonicalUrlTest(unittest.TestCase):
+    def test_xuhui_detail_keeps_only_id(self):
+        url = 'http://www.xuhui.gov.cn:443/xxgk/portal/article/detail?x=1&id=7#top'
+        self.assertEqual(canonical_url(url), XUHUI_DETAIL)
+        self.assertEqual(policy_id(url), 'detail:7')
+
+    def test_other_host_keeps_full_query(self):
+        url = 'https://rsj.sh.gov.cn/tzcxgz/detail.html?id=7&cid=3'
+        self.assertEqual(canonical_url(url), 'https://rsj.sh.gov.cn/tzcxgz/detail.html?cid=3&id=7')
+        self.assertEqual(policy_id(url), 'rsj.sh.gov.cn/tzcxgz/detail.html?cid=3&id=7')
+
+    def test_detail_substring_is_not_detail_page(self):
+        url = 'https://www.xuhui.gov.cn/a/details/list?page=2&id=9'
+        self.assertEqual(canonical_url(url), 'https://www.xuhui.gov.cn/a/details/list?id=9&page=2')
+        self.assertEqual(policy_id(url), 'www.xuhui.gov.cn/a/details/list?id=9&page=2')
+
+    def test_same_id_on_other_host_does_not_collide(self):
+        self.assertNotEqual(policy_id('https://rsj.sh.gov.cn/detail?id=7'), policy_id(XUHUI_DETAIL))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+URL规范化与稳定的政策ID
+同一政策可能以不同的参数顺序、http/https 或带锚点的URL出现，
+去重集合、缓存、抓取前沿和导出结果统一按规范化URL或政策ID记录，同一文档只抓取一次
+"""
+
+from urllib.parse import urlsplit, urlunsplit, parse_qs, parse_qsl, urlencode
+
+# 徐汇区政府网站的主机（含子域名）：统一使用 https，详情页按 id 参数识别
+HTTPS_HOSTS = ('xuhui.gov.cn',)
+
+# 徐汇区政府网站详情页路径的最后一段
+DETAIL_SEGMENT = 'detail'
+
+
+def portal_host(host):
+    """是否是徐汇区政府网站的主机"""
+    return any(host == h or host.endswith('.' + h) for h in HTTPS_HOSTS)
+
+
+def normalize_url(url):
+    """规范化URL：协议和主机小写、查询参数排序、去掉锚点"""
+    parts = urlsplit(url.strip())
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return urlunsplit((
+        parts.scheme.lower(),
+        parts.netloc.lower(),
+        parts.path or '/',
+        query,
+        ''
+    ))
+
+
+def detail_id(url):
+    """
+    徐汇区政府网站详情页（路径最后一段为 detail）的 id 参数，其他页面返回None；
+    其他网站即使路径中有 detail，参数也可能决定页面内容，不按 id 识别
+    """
+    parts = urlsplit(url.strip())
+    if not portal_host((parts.hostname or '').lower()) or parts.path.rsplit('/', 1)[-1] != DETAIL_SEGMENT:
+        return None
+    ids = parse_qs(parts.query).get('id')
+    return ids[0] if ids else None
+
+
+def canonical_url(url):
+    """
+    规范URL：在 normalize_url 基础上，徐汇区政府网站统一为 https、去掉默认端口，
+    其详情页只保留 id 参数；其他URL保留全部（排序后的）查询参数
+    """
+    parts = urlsplit(normalize_url(url))
+    scheme, netloc, query = parts.scheme, parts.netloc, parts.query
+    host = parts.hostname or ''
+    if portal_host(host):
+        scheme = 'https'
+        netloc = host if parts.port in (None, 80, 443) else netloc
+    policy = detail_id(url)
+    if policy is not None:
+        query = urlencode({'id': policy})
+    return urlunsplit((scheme, netloc, parts.path, query, ''))
+
+
+def policy_id(url):
+    """
+    稳定的政策ID：徐汇区政府网站详情页为 detail:<id>，
+    其他页面为带主机的 <主机><路径>?<查询参数>，不同网站的同名页面不会相互混淆
+    """
+    policy = detail_id(url)
+    if policy is not None:
+        return f"detail:{policy}"
+    parts = urlsplit(canonical_url(url))
+    return f"{parts.netloc}{parts.path}?{parts.query}" if parts.query else f"{parts.netloc}{parts.path}"
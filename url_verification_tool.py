@@ -5,35 +5,143 @@
 确保爬虫结果的真实性和可追溯性
 """
 
-import requests
 import json
-import time
+import codecs
 import pandas as pd
 from datetime import datetime
-from concurrent.futures import ThreadPoolExecutor, as_completed
 import os
+from fetch_engine import default_engine, FetchError
+from charset import default_detector, META_SCAN_BYTES
+from url_canon import policy_id
+from keyword_matcher import KeywordMatcher
+
+# 判定页面包含政策内容的关键词
+POLICY_CONTENT_KEYWORDS = ['徐汇', '政策', '申报', '支持', '补贴', '人才', '企业']
+
+# 质量评分的关键词
+SCORE_POLICY_KEYWORDS = ['申报', '支持', '补贴', '奖励', '资助', '政策', '条件', '要求']
+SCORE_AMOUNT_TERMS = ['万元', '亿元', '百万']
+SCORE_TALENT_KEYWORDS = ['人才', '博士', '硕士', '专家', '引进']
+SCORE_AI_KEYWORDS = ['人工智能', 'ai', '算法', '大模型', '智能']
+SCORE_KEYWORDS = SCORE_POLICY_KEYWORDS + SCORE_AMOUNT_TERMS + SCORE_TALENT_KEYWORDS + SCORE_AI_KEYWORDS
+
+POLICY_CONTENT_MATCHER = KeywordMatcher(POLICY_CONTENT_KEYWORDS)
+SCORE_MATCHER = KeywordMatcher(SCORE_KEYWORDS)
+STREAMING_MATCHER = KeywordMatcher(POLICY_CONTENT_KEYWORDS + SCORE_KEYWORDS)
+
+
+def format_length(length):
+    """报告中的内容长度；只读取了开头部分、不知道完整长度时为None"""
+    return f"{length} 字节" if length is not None else "未知（只读取了开头部分）"
+
+
+class StreamingChecks:
+    """
+    流式验证单个响应的累计状态：每块新内容只解码、扫描一次，记录已命中的关键词，
+    不再每读一块就把已读内容重新拼接、解码和评分
+    """
+
+    def __init__(self, tool, url):
+        self.tool = tool
+        self.url = url
+        self.decoder = None
+        # 确定编码前读到的内容
+        self.pending = b''
+        # 上一块末尾可能是跨块关键词的前半部分
+        self.tail = ''
+        self.overlap = max(len(keyword) for keyword in POLICY_CONTENT_KEYWORDS + SCORE_KEYWORDS) - 1
+        self.found = set()
+
+    def __call__(self, chunk):
+        """读到新的一块内容；返回已读内容是否足以确定关键词检查和质量评分"""
+        if self.decoder is None:
+            # 读到可能含<meta>声明的文档开头后再确定编码
+            self.pending += chunk
+            if len(self.pending) < META_SCAN_BYTES:
+                return False
+            encoding = default_detector.detect(self.url, self.pending)
+            self.decoder = codecs.getincrementaldecoder(encoding)(errors='replace')
+            chunk, self.pending = self.pending, b''
+        text = self.tail + self.decoder.decode(chunk).lower()
+        self.found |= STREAMING_MATCHER.found(text)
+        self.tail = text[max(len(text) - self.overlap, 0):]
+        # 按官网域名计算时达到满分，说明所有与内容相关的评分项都已命中，继续读取不会再改变结果
+        return (not self.found.isdisjoint(POLICY_CONTENT_KEYWORDS) and
+                self.tool.score_keywords(self.found, 'xuhui.gov.cn') >= 100)
 
 class URLVerificationTool:
-    def __init__(self):
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
-        })
+    def __init__(self, engine=None, verify_mode='stream', max_bytes=64 * 1024, transport='http1'):
+        """
+        verify_mode: 'stream' 用按字节预算截断的流式GET检查内容（读到结果确定为止）；
+                     'full' 下载完整页面
+        max_bytes: 流式GET最多读取的字节数
+        transport: 'http1' 或 'http2'（服务器支持时多路复用同一连接）
+        """
+        # 验证必须确认链接当前可用：缓存条目每次都用条件请求重新验证
+        self.engine = engine or default_engine(cache_ttl=0, timeout=10, verbose=False, transport=transport)
+        self.verify_mode = verify_mode
+        self.max_bytes = max_bytes
         self.verified_urls = []
         self.failed_urls = []
 
-    def verify_single_url(self, url, policy_title=""):
+    def fetch_for_verification(self, urls):
+        """按验证模式抓取URL，返回 {url: FetchResult}"""
+        if self.verify_mode == 'full':
+            return self.engine.fetch_many(urls)
+        # 流式GET只读到关键词和质量评分可以确定为止
+        return self.engine.probe_many(urls, self.max_bytes, stop_when=self.checks_decided)
+
+    def checks_decided(self, url):
+        """为一次流式读取创建判定函数：逐块判断已读内容是否足以确定关键词检查和质量评分"""
+        return StreamingChecks(self, url)
+
+    def verify_single_url(self, url, policy_title="", response=None):
         """验证单个URL的有效性"""
+        if response is None:
+            response = self.fetch_for_verification([url])[url]
+        verification_result = self.check_url(url, policy_title, response)
+        self.merge_results([verification_result])
+        return verification_result
+
+    def verify_urls(self, items):
+        """并发验证一批 (url, 标题)，同一政策的不同URL写法只验证一次，结果在本地收集后一次性合并"""
+        unique_items = {}
+        for url, policy_title in items:
+            unique_items.setdefault(policy_id(url), (url, policy_title))
+        items = list(unique_items.values())
+        responses = self.fetch_for_verification([url for url, _ in items])
+        results = []
+        for url, policy_title in items:
+            try:
+                results.append(self.check_url(url, policy_title, responses[url]))
+            except Exception as e:
+                print(f"验证过程中出错: {e}")
+        self.merge_results(results)
+        return results
+
+    def merge_results(self, results):
+        """将验证结果合并到有效/失效列表"""
+        for verification_result in results:
+            if verification_result['is_valid']:
+                self.verified_urls.append(verification_result)
+            else:
+                self.failed_urls.append(verification_result)
+
+    def check_url(self, url, policy_title, response):
+        """根据抓取结果生成单个URL的验证结果（不修改共享状态）"""
         try:
             print(f"验证: {policy_title[:60]}...")
-            response = self.session.get(url, timeout=10)
+            if response.error:
+                raise FetchError(response.error)
             
+            content_length = response.content_length
             verification_result = {
                 'url': url,
+                'policy_id': policy_id(url),
                 'policy_title': policy_title,
                 'status_code': response.status_code,
                 'is_valid': response.status_code == 200,
-                'content_length': len(response.content),
+                'content_length': content_length,
                 'verification_time': datetime.now().isoformat(),
                 'error': None
             }
@@ -44,9 +152,7 @@ class URLVerificationTool:
                 
                 # 检查内容是否包含关键信息
                 content_text = response.text.lower()
-                has_policy_content = any(keyword in content_text for keyword in [
-                    '徐汇', '政策', '申报', '支持', '补贴', '人才', '企业'
-                ])
+                has_policy_content = POLICY_CONTENT_MATCHER.contains_any(content_text)
                 
                 verification_result.update({
                     'is_xuhui_gov': is_xuhui_gov,
@@ -54,16 +160,15 @@ class URLVerificationTool:
                     'quality_score': self.calculate_quality_score(content_text, url)
                 })
                 
-                self.verified_urls.append(verification_result)
-                print(f"  ✅ 有效 (状态码: {response.status_code}, 内容长度: {len(response.content)})")
+                print(f"  ✅ 有效 (状态码: {response.status_code}, 内容长度: {format_length(content_length)})")
             else:
                 verification_result['error'] = f"HTTP {response.status_code}"
-                self.failed_urls.append(verification_result)
                 print(f"  ❌ 失效 (状态码: {response.status_code})")
                 
         except Exception as e:
             verification_result = {
                 'url': url,
+                'policy_id': policy_id(url),
                 'policy_title': policy_title,
                 'status_code': 0,
                 'is_valid': False,
@@ -74,13 +179,17 @@ class URLVerificationTool:
                 'has_policy_content': False,
                 'quality_score': 0
             }
-            self.failed_urls.append(verification_result)
             print(f"  ❌ 失败 (错误: {str(e)})")
         
         return verification_result
 
     def calculate_quality_score(self, content_text, url):
         """计算URL内容质量评分"""
+        # 内容只扫描一遍，得到所有评分关键词的命中情况
+        return self.score_keywords(SCORE_MATCHER.found(content_text), url)
+
+    def score_keywords(self, found, url):
+        """按命中的评分关键词计算质量评分"""
         score = 0
         
         # 基础分数
@@ -88,26 +197,17 @@ class URLVerificationTool:
             score += 20
         
         # 政策关键词
-        policy_keywords = ['申报', '支持', '补贴', '奖励', '资助', '政策', '条件', '要求']
-        for keyword in policy_keywords:
-            if keyword in content_text:
-                score += 5
+        score += 5 * sum(1 for keyword in SCORE_POLICY_KEYWORDS if keyword in found)
         
         # 具体数额
-        if any(term in content_text for term in ['万元', '亿元', '百万']):
+        if any(term in found for term in SCORE_AMOUNT_TERMS):
             score += 10
         
         # 人才相关
-        talent_keywords = ['人才', '博士', '硕士', '专家', '引进']
-        for keyword in talent_keywords:
-            if keyword in content_text:
-                score += 3
+        score += 3 * sum(1 for keyword in SCORE_TALENT_KEYWORDS if keyword in found)
         
         # AI相关
-        ai_keywords = ['人工智能', 'ai', '算法', '大模型', '智能']
-        for keyword in ai_keywords:
-            if keyword in content_text:
-                score += 3
+        score += 3 * sum(1 for keyword in SCORE_AI_KEYWORDS if keyword in found)
         
         return min(score, 100)  # 最高100分
 
@@ -122,19 +222,10 @@ class URLVerificationTool:
             policies = data.get('policies', [])
             print(f"找到 {len(policies)} 个政策需要验证")
             
-            # 并发验证URL
-            with ThreadPoolExecutor(max_workers=5) as executor:
-                future_to_policy = {
-                    executor.submit(self.verify_single_url, policy['url'], policy['title']): policy 
-                    for policy in policies if 'url' in policy
-                }
-                
-                for future in as_completed(future_to_policy):
-                    try:
-                        result = future.result()
-                    except Exception as e:
-                        print(f"验证过程中出错: {e}")
-                    time.sleep(0.5)
+            # 并发验证所有URL
+            self.verify_urls([
+                (policy['url'], policy['title']) for policy in policies if 'url' in policy
+            ])
                     
         except Exception as e:
             print(f"读取文件失败: {e}")
@@ -166,9 +257,7 @@ class URLVerificationTool:
         ]
         
         print("验证样本URL...")
-        for sample in sample_urls:
-            self.verify_single_url(sample['url'], sample['title'])
-            time.sleep(1)
+        self.verify_urls([(sample['url'], sample['title']) for sample in sample_urls])
 
     def generate_verification_report(self):
         """生成验证报告"""
@@ -203,7 +292,7 @@ class URLVerificationTool:
 **{i}. {url_info['policy_title']}**
 - URL: {url_info['url']}
 - 状态码: {url_info['status_code']}
-- 内容长度: {url_info['content_length']} 字节
+- 内容长度: {format_length(url_info['content_length'])}
 - 质量评分: {url_info.get('quality_score', 0)}/100
 - 验证时间: {url_info['verification_time']}
 """
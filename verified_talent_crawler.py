@@ -5,45 +5,50 @@
 专注于爬取真实、可验证的徐汇区企业人才政策
 """
 
-import requests
 import re
 import json
-import time
 import pandas as pd
-from bs4 import BeautifulSoup
 from datetime import datetime
-from urllib.parse import urljoin, urlparse
+from urllib.parse import urljoin
 import os
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from fetch_engine import default_engine, FetchError
+from crawl_frontier import CrawlFrontier
+from content_templates import ContentTemplates
+from pagination import PaginationWalker
+from link_priority import anchor_date, top_links
+from url_canon import canonical_url, policy_id
+from documents import parse_html
+from list_parser import parse_links, candidate_anchors
+from keyword_matcher import KeywordMatcher, score_categories
+from detail_metadata import parse_detail_metadata, find_publish_date, find_department
 
 class VerifiedTalentCrawler:
-    def __init__(self):
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
-        })
-        
-        # 精选的高质量URL源 - 已验证有效
-        self.verified_urls = [
+    def __init__(self, engine=None, frontier=None, transport='http1', templates=None):
+        # 共享抓取引擎：并发抓取、按主机限制并发，响应缓存到磁盘
+        # transport: 'http1' 或 'http2'（服务器支持时多路复用同一连接）
+        self.engine = engine or default_engine(transport=transport)
+        # 抓取前沿：记录已抓过的详情页，增量运行时只抓新页面和到期页面
+        self.frontier = frontier or CrawlFrontier('verified_talent')
+        # 正文提取模板：按主机和URL模式记住取到正文的选择器，新页面结构才完整尝试
+        self.templates = templates or ContentTemplates('verified_talent')
+        # 部门列表页自动翻页，第1页未变化时跳过其余页面
+        self.pagination = PaginationWalker(self.engine, frontier=self.frontier)
+        
+        # 精选的高质量部门 - 已验证有效，列表页由翻页器自动识别页数
+        self.department_codes = [
             # 核心政策部门
-            "https://www.xuhui.gov.cn/xxgk/portal/article/organizationArticle?code=xhxxgk_wbj_kjw&page=1",
-            "https://www.xuhui.gov.cn/xxgk/portal/article/organizationArticle?code=xhxxgk_wbj_kjw&page=2",
-            "https://www.xuhui.gov.cn/xxgk/portal/article/organizationArticle?code=xhxxgk_wbj_rshbj&page=1",
-            "https://www.xuhui.gov.cn/xxgk/portal/article/organizationArticle?code=xhxxgk_wbj_rshbj&page=2",
-            "https://www.xuhui.gov.cn/xxgk/portal/article/organizationArticle?code=xhxxgk_wbj_zfbzj&page=1",
-            "https://www.xuhui.gov.cn/xxgk/portal/article/organizationArticle?code=xhxxgk_wbj_zfbzj&page=2",
+            "xhxxgk_wbj_kjw",
+            "xhxxgk_wbj_rshbj",
+            "xhxxgk_wbj_zfbzj",
             
             # 新型工业化推进办公室 - AI政策主管部门
-            "https://www.xuhui.gov.cn/xxgk/portal/article/organizationArticle?code=xhxxgk_wbj_xgybgs&page=1",
-            "https://www.xuhui.gov.cn/xxgk/portal/article/organizationArticle?code=xhxxgk_wbj_xgybgs&page=2",
+            "xhxxgk_wbj_xgybgs",
             
             # 政策文件
-            "https://www.xuhui.gov.cn/xxgk/portal/article/organizationArticle?code=xhxxgk_wbj_zcwj&page=1",
-            "https://www.xuhui.gov.cn/xxgk/portal/article/organizationArticle?code=xhxxgk_wbj_zcwj&page=2",
+            "xhxxgk_wbj_zcwj",
             
             # 通知公告
-            "https://www.xuhui.gov.cn/xxgk/portal/article/organizationArticle?code=xhxxgk_wbj_gggs&page=1",
-            "https://www.xuhui.gov.cn/xxgk/portal/article/organizationArticle?code=xhxxgk_wbj_gggs&page=2",
+            "xhxxgk_wbj_gggs",
         ]
         
         # 高质量人才政策关键词
@@ -92,13 +97,24 @@ class VerifiedTalentCrawler:
             ]
         }
         
+        # 关键词匹配器只建一次，验证页面、筛选链接、提取申报要求时直接使用
+        self.talent_matcher = KeywordMatcher(self.talent_keywords)
+        self.application_matcher = KeywordMatcher(
+            [k for keywords in self.application_categories.values() for k in keywords])
+        self.quality_matcher = KeywordMatcher(['政策', '申报', '支持', '补贴', '人才'])
+        self.amount_matcher = KeywordMatcher(['万元', '亿元'])
+        self.meaningful_matcher = KeywordMatcher(['万元', '补贴', '资助', '申报条件', '支持标准'])
+        
         self.policies = []
         self.verification_log = []
 
-    def verify_url_quality(self, url, title=""):
+    def verify_url_quality(self, url, title="", response=None):
         """验证URL质量和内容有效性"""
         try:
-            response = self.session.get(url, timeout=10)
+            if response is None:
+                response = self.engine.fetch(url, timeout=10)
+            if response.error:
+                raise FetchError(response.error)
             if response.status_code != 200:
                 return False, f"HTTP {response.status_code}"
             
@@ -111,11 +127,11 @@ class VerifiedTalentCrawler:
                 quality_score += 20
             
             # 内容相关性
-            policy_keywords = sum(1 for kw in ['政策', '申报', '支持', '补贴', '人才'] if kw in content)
+            policy_keywords = len(self.quality_matcher.found(content))
             quality_score += policy_keywords * 5
             
             # 具体金额
-            if any(term in content for term in ['万元', '亿元']):
+            if self.amount_matcher.contains_any(content):
                 quality_score += 10
             
             # 质量阈值检查
@@ -144,13 +160,13 @@ class VerifiedTalentCrawler:
             })
             return False, str(e)
 
-    def fetch_page_with_verification(self, url):
+    def fetch_page_with_verification(self, url, response=None):
         """获取页面内容并验证"""
         try:
             print(f"正在爬取并验证: {url}")
-            response = self.session.get(url, timeout=15)
+            if response is None:
+                response = self.engine.fetch(url)
             response.raise_for_status()
-            response.encoding = 'utf-8'
             
             # 内容质量检查
             if len(response.content) < 500:
@@ -164,11 +180,11 @@ class VerifiedTalentCrawler:
             return None
 
     def extract_verified_policy_links(self, html, base_url):
-        """提取并验证政策链接"""
+        """提取人才政策候选链接（质量验证在详情页抓取后进行）"""
         if not html:
             return []
         
-        soup = BeautifulSoup(html, 'html.parser')
+        soup = parse_links(html)
         links = []
         
         # 多种选择器策略
@@ -180,47 +196,68 @@ class VerifiedTalentCrawler:
             'li a'
         ]
         
-        found_links = []
-        for selector in selectors:
-            found_links.extend(soup.select(selector))
+        # 一次遍历所有链接：按最先匹配的选择器和文档顺序排列，每个链接只提取一次文字
+        found_links = candidate_anchors(soup, selectors)
         
-        # 过滤和验证链接
-        seen_urls = set()
-        for a in found_links:
-            href = a.get('href')
-            title = a.get_text(strip=True)
-            
-            if href and href not in seen_urls and len(title) > 5:
-                # 人才政策相关性检查
-                is_talent_related = any(keyword in title for keyword in self.talent_keywords)
+        # 人才政策相关性检查
+        candidates = []
+        for a, href, title in found_links:
+            if href and len(title) > 5:
+                is_talent_related = self.talent_matcher.contains_any(title)
                 
                 if is_talent_related:
-                    full_url = urljoin(base_url, href)
-                    
-                    # 初步质量验证
-                    is_quality, quality_msg = self.verify_url_quality(full_url, title)
-                    
-                    if is_quality:
-                        links.append({
-                            'title': title,
-                            'url': full_url,
-                            'quality_verified': True,
-                            'quality_message': quality_msg
-                        })
-                        seen_urls.add(href)
-                        print(f"    ✅ 高质量链接: {title[:50]}...")
-                    else:
-                        print(f"    ❌ 质量不足: {title[:50]} ({quality_msg})")
+                    candidates.append((href, title, canonical_url(urljoin(base_url, href)), anchor_date(a)))
+        
+        # 过滤重复链接（按政策ID）
+        seen_ids = set()
+        for href, title, full_url, date in candidates:
+            if policy_id(full_url) not in seen_ids:
+                links.append({
+                    'title': title,
+                    'url': full_url,
+                    'date': date,
+                    'source': base_url
+                })
+                seen_ids.add(policy_id(full_url))
         
         return links
 
-    def extract_detailed_policy_content(self, url):
-        """提取详细政策内容并验证"""
-        html = self.fetch_page_with_verification(url)
+    def verify_candidate_links(self, links, pages):
+        """
+        用已抓取的详情页验证候选链接质量，返回高质量链接
+        pages: {url: FetchResult}，不在其中的链接沿用上次运行的结果（上次保存过政策才保留）
+        """
+        quality_links = []
+        for link in links:
+            if link['url'] not in pages:
+                if self.frontier.get_record(link['url']):
+                    quality_links.append(link)
+                continue
+            
+            is_quality, quality_msg = self.verify_url_quality(link['url'], link['title'], pages[link['url']])
+            if is_quality:
+                link['quality_verified'] = True
+                link['quality_message'] = quality_msg
+                quality_links.append(link)
+                print(f"    ✅ 高质量链接: {link['title'][:50]}...")
+            else:
+                print(f"    ❌ 质量不足: {link['title'][:50]} ({quality_msg})")
+                result = pages[link['url']]
+                if result.ok:
+                    self.frontier.mark_fetched(link['url'], result.content)
+        
+        return quality_links
+
+    def extract_detailed_policy_content(self, url, response=None, documents=None):
+        """
+        提取详细政策内容并验证
+        documents: 多个爬虫配置共用的 DocumentCache，提供时复用已解析的文档
+        """
+        html = self.fetch_page_with_verification(url, response)
         if not html:
             return None
         
-        soup = BeautifulSoup(html, 'html.parser')
+        soup = documents.parse(url, html) if documents is not None else parse_html(html)
         
         # 提取标题
         title = ""
@@ -234,81 +271,49 @@ class VerifiedTalentCrawler:
                 title = elem.get_text(strip=True)
                 break
         
-        # 提取内容
-        content = ""
+        # 提取内容：同类页面直接用学到的选择器；新页面结构依次尝试，
+        # 主要内容区域没找到足够内容时使用body
         content_selectors = [
             '.content', '.art-content', '.main-content',
             '[class*="content"]', '.main', 'article', '.detail'
         ]
-        for selector in content_selectors:
-            elem = soup.select_one(selector)
-            if elem:
-                # 清理导航元素
-                for nav in elem.select('nav, .nav, .menu, .breadcrumb, .pagination'):
-                    nav.decompose()
-                content = elem.get_text(strip=True)
-                if len(content) > 200:
-                    break
-        
-        # 如果主要内容区域没找到足够内容，使用body
-        if len(content) < 200:
-            body = soup.find('body')
-            if body:
-                for elem in body.select('nav, .nav, .menu, .sidebar, .footer, .header'):
-                    elem.decompose()
-                content = body.get_text(strip=True)
+        content = self.templates.extract(
+            url, soup, content_selectors,
+            remove='nav, .nav, .menu, .breadcrumb, .pagination',
+            body_remove='nav, .nav, .menu, .sidebar, .footer, .header',
+            body_below=200
+        )
         
         # 内容质量验证
         if len(content) < 300:
             print(f"    ⚠️  内容过短，跳过")
             return None
         
-        # 提取发布时间
-        publish_date = self.extract_publish_date(content + title)
-        
-        # 提取发布部门
-        department = self.extract_department(content + title)
+        # 提取发布时间、发布部门、发文字号、索引号和主题分类（详情页头部字段）
+        metadata = parse_detail_metadata(soup, title, content)
         
         return {
             'title': title,
             'url': url,
+            'policy_id': policy_id(url),
             'content': content[:8000],  # 限制内容长度
-            'publish_date': publish_date,
-            'department': department,
+            'publish_date': metadata['publish_date'],
+            'department': metadata['department'],
+            'document_number': metadata['document_number'],
+            'index_number': metadata['index_number'],
+            'subject': metadata['subject'],
             'crawl_time': datetime.now().isoformat(),
             'verified': True,
             'content_length': len(content)
         }
 
     def extract_publish_date(self, text):
-        """提取发布时间"""
-        patterns = [
-            r'发布时间[：:]\s*(\d{4}[-年]\d{1,2}[-月]\d{1,2})',
-            r'(\d{4}[-年]\d{1,2}[-月]\d{1,2}[日]?)',
-            r'(\d{4}/\d{1,2}/\d{1,2})',
-            r'(\d{4}\.\d{1,2}\.\d{1,2})'
-        ]
-        
-        for pattern in patterns:
-            match = re.search(pattern, text)
-            if match:
-                return match.group(1)
-        return ""
+        """从文字中提取发布时间"""
+        return find_publish_date(text)
 
     def extract_department(self, text):
-        """提取发布部门"""
-        patterns = [
-            r'发布机构[：:]\s*([^，。；！？\n]+)',
-            r'发布部门[：:]\s*([^，。；！？\n]+)',
-            r'(徐汇区[^，。；！？\n]*?[局|委|办|中心|部|处])',
-            r'(上海市徐汇区[^，。；！？\n]*?[局|委|办|中心|部|处])'
-        ]
-        
-        for pattern in patterns:
-            match = re.search(pattern, text)
-            if match:
-                return match.group(1).strip()
-        return ""
+        """从文字中提取发布部门"""
+        return find_department(text)
 
     def classify_verified_policy(self, policy):
         """对验证过的政策进行分类"""
@@ -338,16 +343,8 @@ class VerifiedTalentCrawler:
             ]
         }
         
-        # 计算分类得分
-        category_scores = {}
-        for category, keywords in categories.items():
-            score = 0
-            for keyword in keywords:
-                if keyword in policy['title']:
-                    score += 3
-                if keyword in policy['content']:
-                    score += 1
-            category_scores[category] = score
+        # 计算分类得分：标题中出现的关键词3分，内容中1分
+        category_scores = score_categories(categories, policy['title'], policy['content'])
         
         if category_scores:
             best_category = max(category_scores, key=category_scores.get)
@@ -361,20 +358,18 @@ class VerifiedTalentCrawler:
         text = f"{policy['title']} {policy['content']}"
         requirements = {}
         
+        # 按句子分割，每个句子只扫描一遍，得到其中出现的所有关键词
+        sentences = [sentence.strip() for sentence in re.split(r'[。！？；\n]', text)]
+        sentence_hits = [self.application_matcher.found(s) if 15 < len(s) < 400 else set() for s in sentences]
+        
         for category, keywords in self.application_categories.items():
             found_items = []
             
-            # 按句子分割并搜索
-            sentences = re.split(r'[。！？；\n]', text)
-            for sentence in sentences:
-                sentence = sentence.strip()
-                if len(sentence) > 15 and len(sentence) < 400:
-                    for keyword in keywords:
-                        if keyword in sentence:
-                            # 过滤无效句子
-                            if not sentence.startswith(('首页', '返回', '上一页', '下一页', '点击')):
-                                found_items.append(sentence)
-                                break
+            for sentence, found in zip(sentences, sentence_hits):
+                if not found.isdisjoint(keywords):
+                    # 过滤无效句子
+                    if not sentence.startswith(('首页', '返回', '上一页', '下一页', '点击')):
+                        found_items.append(sentence)
             
             # 去重并限制数量
             unique_items = []
@@ -390,64 +385,135 @@ class VerifiedTalentCrawler:
         
         return requirements
 
-    def crawl_verified_policies(self):
-        """爬取经过验证的人才政策"""
-        print("🔍 开始爬取徐汇区验证版企业人才政策...")
-        print(f"📋 将验证并爬取 {len(self.verified_urls)} 个可信URL源")
-        
-        os.makedirs('data', exist_ok=True)
-        
-        all_verified_links = []
-        
-        # 第一步：从验证过的URL收集高质量链接
-        for i, url in enumerate(self.verified_urls, 1):
-            print(f"\n{i}/{len(self.verified_urls)} 正在处理: {url}")
-            html = self.fetch_page_with_verification(url)
+    def collect_links(self, list_pages, documents=None):
+        """
+        验证列表页并收集候选链接，按政策ID去重并记入抓取前沿
+        documents: 多个爬虫配置共用的 DocumentCache（见 multi_profile_crawler.py）
+        """
+        all_candidate_links = []
+        for i, (url, result) in enumerate(list_pages, 1):
+            print(f"\n{i}/{len(list_pages)} 正在处理: {url}")
+            if result is None:
+                # 部门第1页未变化，翻页器跳过了该页
+                links = self.frontier.list_links(url, None, self.extract_verified_policy_links)
+                all_candidate_links.extend(links)
+                print(f"  ♻️  列表未变化，沿用上次的 {len(links)} 个候选链接")
+                continue
+            html = self.fetch_page_with_verification(url, result)
             if html:
-                links = self.extract_verified_policy_links(html, url)
-                all_verified_links.extend(links)
-                print(f"  📊 获取到 {len(links)} 个高质量链接")
-            time.sleep(1)
+                links = self.frontier.list_links(url, result, self.extract_verified_policy_links, documents)
+                all_candidate_links.extend(links)
+                print(f"  📊 获取到 {len(links)} 个候选链接")
         
-        # 去重
+        # 按政策ID去重，同一政策的不同URL写法只保留一个
         unique_links = []
-        seen_urls = set()
-        for link in all_verified_links:
-            if link['url'] not in seen_urls:
+        seen_ids = set()
+        for link in all_candidate_links:
+            if policy_id(link['url']) not in seen_ids:
                 unique_links.append(link)
-                seen_urls.add(link['url'])
+                seen_ids.add(policy_id(link['url']))
         
-        print(f"\n📊 去重后共 {len(unique_links)} 个高质量政策链接")
-        
-        # 第二步：提取详细内容
-        target_links = unique_links[:50]  # 处理前50个最高质量的链接
-        print(f"🎯 将详细爬取前 {len(target_links)} 个政策")
+        print(f"\n📊 去重后共 {len(unique_links)} 个候选政策链接")
+        self.frontier.mark_seen(unique_links)
+        return unique_links
+
+    def detail_candidates(self, unique_links):
+        """需要抓取详情页的链接：所有候选链接都要先抓取详情页验证质量"""
+        return unique_links
+
+    def process_detail_pages(self, candidate_links, detail_pages, documents=None):
+        """
+        验证候选链接质量，再提取优先级最高的高质量政策的详细内容
+        detail_pages: {url: FetchResult}，不在其中的链接沿用上次结果
+        """
+        quality_links = self.verify_candidate_links(candidate_links, detail_pages)
+        print(f"\n📊 其中 {len(quality_links)} 个高质量政策链接")
+        
+        # 按标题关键词、列表日期和来源部门排序，处理优先级最高的50个链接
+        target_links = top_links(quality_links, 50, self.talent_matcher)
+        print(f"🎯 将按优先级详细爬取 {len(target_links)} 个政策")
         
         for i, link in enumerate(target_links, 1):
             print(f"\n{i}/{len(target_links)} 处理: {link['title'][:60]}...")
             
-            policy = self.extract_detailed_policy_content(link['url'])
-            if policy:
-                policy['category'] = self.classify_verified_policy(policy)
-                policy['application_requirements'] = self.extract_verified_application_requirements(policy)
-                
-                # 质量检查：确保有实际价值的内容
-                has_meaningful_content = (
-                    len(policy['content']) > 500 or
-                    any(len(v.strip()) > 20 for v in policy['application_requirements'].values() if v) or
-                    any(keyword in policy['title'] + policy['content'] for keyword in 
-                        ['万元', '补贴', '资助', '申报条件', '支持标准'])
-                )
-                
-                if has_meaningful_content:
+            if link['url'] not in detail_pages:
+                policy = self.frontier.get_record(link['url'])
+                if policy:
                     self.policies.append(policy)
-                    print(f"    ✅ 已保存 (分类: {policy['category']})")
-                else:
-                    print(f"    ❌ 内容价值不足，跳过")
+                    print(f"    ♻️  沿用上次结果 (分类: {policy['category']})")
+                continue
+            
+            policy = self.record_verified_page(link, detail_pages[link['url']], documents)
+            if policy:
+                self.policies.append(policy)
+                print(f"    ✅ 已保存 (分类: {policy['category']})")
+        
+        # 未进入优先级前50的高质量页面也已下载：同样提取并记入抓取前沿（不计入本次结果），
+        # 之后的运行在刷新时间内沿用记录参与排序，不再重新下载
+        targets = {link['url'] for link in target_links}
+        backlog = [link for link in quality_links if link['url'] in detail_pages and link['url'] not in targets]
+        if backlog:
+            print(f"\n🗂️  记录其余 {len(backlog)} 个已下载的高质量政策，供之后的运行沿用")
+        for link in backlog:
+            self.record_verified_page(link, detail_pages[link['url']], documents)
+
+    def record_verified_page(self, link, result, documents=None):
+        """
+        提取已下载的高质量详情页并记入抓取前沿
+        返回有实际价值的政策，否则返回None（同样记入抓取前沿，之后的运行不再保留该链接）
+        """
+        saved = None
+        policy = self.extract_detailed_policy_content(link['url'], result, documents)
+        if policy:
+            policy['category'] = self.classify_verified_policy(policy)
+            policy['application_requirements'] = self.extract_verified_application_requirements(policy)
+            
+            # 质量检查：确保有实际价值的内容
+            has_meaningful_content = (
+                len(policy['content']) > 500 or
+                any(len(v.strip()) > 20 for v in policy['application_requirements'].values() if v) or
+                self.meaningful_matcher.contains_any(policy['title'] + policy['content'])
+            )
             
-            time.sleep(1.5)  # 适当增加延迟
+            if has_meaningful_content:
+                saved = policy
+            else:
+                print(f"    ❌ 内容价值不足，跳过")
+        
+        if result.ok:
+            self.frontier.mark_fetched(link['url'], result.content, saved)
+        else:
+            self.frontier.mark_failed(link['url'])
+        return saved
+
+    def crawl_verified_policies(self, deadline=None, budget=None):
+        """爬取经过验证的人才政策"""
+        # deadline: 整次爬取的时间预算（秒）；budget: 爬取预算（CrawlBudget），见 FetchEngine.set_deadline / set_budget
+        self.engine.set_deadline(deadline)
+        self.engine.set_budget(budget)
+        print("🔍 开始爬取徐汇区验证版企业人才政策...")
+        print(f"📋 将验证并爬取 {len(self.department_codes)} 个可信部门的全部列表页")
+        
+        os.makedirs('data', exist_ok=True)
+        
+        # 第一步：自动翻页并发抓取可信部门的列表页，收集候选链接
+        list_pages = self.pagination.walk(self.department_codes)
+        unique_links = self.collect_links(list_pages)
+        
+        # 第二步：每个详情页只下载一次，质量验证和内容提取使用同一个响应
+        # 只抓取从未抓过或已到刷新时间的详情页，其余沿用上次结果；已到截止时间或预算用完时不再抓取
+        candidate_links = self.detail_candidates(unique_links)
+        due_links = [] if self.engine.should_stop() else self.frontier.due(candidate_links)
+        print(f"📋 其中 {len(due_links)} 个需要抓取，{len(candidate_links) - len(due_links)} 个沿用上次结果")
+        
+        detail_pages = self.engine.fetch_many([link['url'] for link in due_links])
+        
+        # 第三步：验证质量并提取详细内容
+        self.process_detail_pages(candidate_links, detail_pages)
         
+        self.engine.report_stop_reason()
         print(f"\n🎯 成功爬取 {len(self.policies)} 个高质量人才政策")
+        self.engine.print_summary()
 
     def export_verified_results(self):
         """导出验证过的结果"""
@@ -502,7 +568,11 @@ class VerifiedTalentCrawler:
                 '政策分类': policy.get('category', ''),
                 '发布部门': policy.get('department', ''),
                 '发布时间': policy.get('publish_date', ''),
+                '发文字号': policy.get('document_number', ''),
+                '索引号': policy.get('index_number', ''),
+                '主题分类': policy.get('subject', ''),
                 '政策链接': policy.get('url', ''),
+                '政策ID': policy_id(policy.get('url', '')),
                 '验证状态': '已验证' if policy.get('verified') else '未验证',
                 '内容长度': policy.get('content_length', 0),
                 '企业基本条件': req.get('企业基本条件', ''),
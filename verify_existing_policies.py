@@ -4,14 +4,18 @@
 验证现有政策数据的真实性和有效性
 """
 
-import requests
 import json
-import time
 from datetime import datetime
 import pandas as pd
+from fetch_engine import default_engine, FetchError
+from url_canon import policy_id
 
-def verify_policy_urls():
-    """验证现有政策数据中的URL"""
+def verify_policy_urls(max_bytes=16 * 1024, transport='http1'):
+    """
+    验证现有政策数据中的URL
+    先发HEAD确认状态，服务器不支持HEAD时改用最多读取 max_bytes 字节的流式GET
+    transport: 'http1' 或 'http2'
+    """
     
     # 读取现有数据
     data_files = [
@@ -20,13 +24,14 @@ def verify_policy_urls():
         'data/talent_policies.json'
     ]
     
-    session = requests.Session()
-    session.headers.update({
-        'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
-    })
+    # 通过共享抓取引擎请求：按主机限速，未变化的页面由条件请求返回304
+    engine = default_engine(cache_ttl=0, timeout=10, verbose=False, transport=transport)
     
     all_verified_policies = []
     verification_results = []
+    # 同一政策在多个文件中出现时只请求一次、只计入一次验证通过（按政策ID）
+    responses = {}
+    verified_ids = set()
     
     for file_path in data_files:
         try:
@@ -38,6 +43,14 @@ def verify_policy_urls():
             policies = data.get('policies', [])
             print(f"找到 {len(policies)} 个政策")
             
+            new_urls = [
+                policy['url'] for policy in policies
+                if policy.get('url') and policy_id(policy['url']) not in responses
+            ]
+            probed = engine.probe_many(new_urls, max_bytes, need_body=False)
+            for url, result in probed.items():
+                responses.setdefault(policy_id(url), result)
+            
             for i, policy in enumerate(policies, 1):
                 url = policy.get('url', '')
                 title = policy.get('title', '')
@@ -48,7 +61,9 @@ def verify_policy_urls():
                 print(f"  {i}. 验证: {title[:50]}...")
                 
                 try:
-                    response = session.get(url, timeout=10)
+                    response = responses[policy_id(url)]
+                    if response.error:
+                        raise FetchError(response.error)
                     
                     verification_result = {
                         'file_source': file_path,
@@ -56,7 +71,7 @@ def verify_policy_urls():
                         'url': url,
                         'status_code': response.status_code,
                         'is_valid': response.status_code == 200,
-                        'content_length': len(response.content),
+                        'content_length': response.content_length,
                         'is_xuhui_gov': 'xuhui.gov.cn' in url,
                         'verification_time': datetime.now().isoformat(),
                         'original_category': policy.get('category', ''),
@@ -68,10 +83,13 @@ def verify_policy_urls():
                         print(f"    ✅ 有效 (状态码: {response.status_code})")
                         
                         # 添加到验证通过的政策列表
-                        verified_policy = policy.copy()
-                        verified_policy['verification_status'] = 'verified'
-                        verified_policy['verification_time'] = datetime.now().isoformat()
-                        all_verified_policies.append(verified_policy)
+                        if policy_id(url) not in verified_ids:
+                            verified_policy = policy.copy()
+                            verified_policy['policy_id'] = policy_id(url)
+                            verified_policy['verification_status'] = 'verified'
+                            verified_policy['verification_time'] = datetime.now().isoformat()
+                            all_verified_policies.append(verified_policy)
+                            verified_ids.add(policy_id(url))
                     else:
                         print(f"    ❌ 失效 (状态码: {response.status_code})")
                         verification_result['error'] = f"HTTP {response.status_code}"
@@ -95,8 +113,6 @@ def verify_policy_urls():
                     }
                     verification_results.append(verification_result)
                 
-                time.sleep(0.5)  # 防止请求过快
-                
         except Exception as e:
             print(f"读取文件 {file_path} 失败: {e}")
     
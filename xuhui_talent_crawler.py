@@ -5,39 +5,52 @@
 重点提取企业申报要求
 """
 
-import requests
 import re
 import json
-import time
 import pandas as pd
-from bs4 import BeautifulSoup
 from datetime import datetime
-from urllib.parse import urljoin, urlparse
+from urllib.parse import urljoin
 import os
+from fetch_engine import default_engine
+from crawl_frontier import CrawlFrontier
+from content_templates import ContentTemplates
+from pagination import PaginationWalker, SearchHarvester
+from link_priority import anchor_date, top_links
+from url_canon import canonical_url, policy_id
+from documents import parse_html
+from list_parser import parse_links
+from keyword_matcher import KeywordMatcher, keyword_matcher, sentences_by_keyword
+from detail_metadata import parse_detail_metadata
 
 class XuhuiTalentCrawler:
-    def __init__(self):
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
-        })
-        
-        # 徐汇区政府网站URLs - 重点关注人才政策
-        self.urls = [
+    def __init__(self, engine=None, frontier=None, transport='http1', templates=None):
+        # 共享抓取引擎：并发抓取、按主机限制并发，响应缓存到磁盘
+        # transport: 'http1' 或 'http2'（服务器支持时多路复用同一连接）
+        self.engine = engine or default_engine(transport=transport)
+        # 抓取前沿：记录已抓过的详情页，增量运行时只抓新页面和到期页面
+        self.frontier = frontier or CrawlFrontier('xuhui_talent')
+        # 正文提取模板：按主机和URL模式记住取到正文的选择器，新页面结构才完整尝试
+        self.templates = templates or ContentTemplates('xuhui_talent')
+        # 部门列表页自动翻页，搜索关键词按新结果占比翻页
+        self.pagination = PaginationWalker(self.engine, frontier=self.frontier)
+        self.search = SearchHarvester(self.engine)
+        
+        # 政务公开各部门代码，列表页由翻页器自动识别页数
+        self.department_codes = [
             # 政务公开 - 政策文件
-            "https://www.xuhui.gov.cn/xxgk/portal/article/organizationArticle?code=xhxxgk_wbj_xxgyhb&page=1",
-            "https://www.xuhui.gov.cn/xxgk/portal/article/organizationArticle?code=xhxxgk_wbj_xxgyhb&page=2",
-            "https://www.xuhui.gov.cn/xxgk/portal/article/organizationArticle?code=xhxxgk_wbj_xxgyhb&page=3",
+            "xhxxgk_wbj_xxgyhb",
             # 人力资源和社会保障局
-            "https://www.xuhui.gov.cn/xxgk/portal/article/organizationArticle?code=xhxxgk_wbj_rshbj&page=1",
-            "https://www.xuhui.gov.cn/xxgk/portal/article/organizationArticle?code=xhxxgk_wbj_rshbj&page=2",
+            "xhxxgk_wbj_rshbj",
             # 科学技术委员会
-            "https://www.xuhui.gov.cn/xxgk/portal/article/organizationArticle?code=xhxxgk_wbj_kjw&page=1",
-            "https://www.xuhui.gov.cn/xxgk/portal/article/organizationArticle?code=xhxxgk_wbj_kjw&page=2",
+            "xhxxgk_wbj_kjw",
             # 商务委员会
-            "https://www.xuhui.gov.cn/xxgk/portal/article/organizationArticle?code=xhxxgk_wbj_sww&page=1",
+            "xhxxgk_wbj_sww",
             # 发展和改革委员会
-            "https://www.xuhui.gov.cn/xxgk/portal/article/organizationArticle?code=xhxxgk_wbj_fgw&page=1",
+            "xhxxgk_wbj_fgw"
+        ]
+        
+        # 徐汇区政府网站URLs - 重点关注人才政策
+        self.urls = [
             # 徐汇区政府主站搜索人才相关
             "https://www.xuhui.gov.cn/search/pcRender?pageId=51bc01c2a0b04b5e8816d5eaea8c6df4&advance=true&tpl=2068&keyword=人才",
             "https://www.xuhui.gov.cn/search/pcRender?pageId=51bc01c2a0b04b5e8816d5eaea8c6df4&advance=true&tpl=2068&keyword=AI",
@@ -62,50 +75,50 @@ class XuhuiTalentCrawler:
             "申报时间": ["截止时间", "申报时间", "申报期间", "受理时间", "办理时限", "有效期", "评审时间", "公示时间"]
         }
         
+        # 关键词匹配器只建一次，筛选链接、提取申报要求时直接使用
+        self.talent_matcher = KeywordMatcher(self.talent_keywords)
+        self.application_matcher = KeywordMatcher(
+            [k for keywords in self.application_keywords.values() for k in keywords])
+        
         self.policies = []
 
     def fetch_page(self, url):
         """获取页面内容"""
-        try:
-            print(f"正在爬取: {url}")
-            response = self.session.get(url, timeout=10)
-            response.raise_for_status()
-            response.encoding = 'utf-8'
-            return response.text
-        except Exception as e:
-            print(f"获取页面失败 {url}: {e}")
-            return None
+        return self.engine.fetch_text(url, timeout=10)
 
     def extract_policy_links(self, html, base_url):
         """从列表页提取政策链接"""
         if not html:
             return []
         
-        soup = BeautifulSoup(html, 'html.parser')
+        soup = parse_links(html)
         links = []
         
         # 查找所有可能的政策链接
-        for a in soup.find_all('a', href=True):
+        for a in soup.select('a[href]'):
             href = a.get('href')
             title = a.get_text(strip=True)
             
             # 检查是否是人才相关政策
-            if any(keyword in title for keyword in self.talent_keywords):
-                full_url = urljoin(base_url, href)
+            if self.talent_matcher.contains_any(title):
+                full_url = canonical_url(urljoin(base_url, href))
                 links.append({
                     'title': title,
-                    'url': full_url
+                    'url': full_url,
+                    'date': anchor_date(a),
+                    'source': base_url
                 })
         
         return links
 
-    def extract_policy_content(self, url):
+    def extract_policy_content(self, url, html=None):
         """提取政策详细内容"""
-        html = self.fetch_page(url)
+        if html is None:
+            html = self.fetch_page(url)
         if not html:
             return None
         
-        soup = BeautifulSoup(html, 'html.parser')
+        soup = parse_html(html)
         
         # 提取标题
         title = ""
@@ -116,51 +129,24 @@ class XuhuiTalentCrawler:
                 title = title_elem.get_text(strip=True)
                 break
         
-        # 提取内容
-        content = ""
-        content_selectors = ['.content', '.art-content', '[class*="content"]', '.main', 'article']
-        for selector in content_selectors:
-            content_elem = soup.select_one(selector)
-            if content_elem:
-                content = content_elem.get_text(strip=True)
-                break
-        
+        # 提取内容：同类页面直接用学到的选择器；新页面结构取第一个找到的内容区域，
         # 如果没找到特定的内容区域，取body内容
-        if not content:
-            body = soup.find('body')
-            if body:
-                content = body.get_text(strip=True)
-        
-        # 提取发布时间
-        publish_date = ""
-        date_patterns = [
-            r'(\d{4}[-年]\d{1,2}[-月]\d{1,2}[日]?)',
-            r'(\d{4}/\d{1,2}/\d{1,2})',
-            r'(\d{4}\.\d{1,2}\.\d{1,2})'
-        ]
-        for pattern in date_patterns:
-            match = re.search(pattern, content + title)
-            if match:
-                publish_date = match.group(1)
-                break
+        content_selectors = ['.content', '.art-content', '[class*="content"]', '.main', 'article']
+        content = self.templates.extract(url, soup, content_selectors, enough=-1, body_below=1)
         
-        # 提取发布部门
-        department = ""
-        dept_keywords = ["徐汇区", "上海市", "人力资源", "科技", "发改", "商务", "房管", "教育"]
-        for keyword in dept_keywords:
-            if keyword in content or keyword in title:
-                # 尝试提取包含关键词的部门名称
-                dept_match = re.search(f'({keyword}[^，。；！？\n]*?[局|委|办|中心|部])', content + title)
-                if dept_match:
-                    department = dept_match.group(1)
-                    break
+        # 提取发布时间、发布部门、发文字号、索引号和主题分类（详情页头部字段）
+        metadata = parse_detail_metadata(soup, title, content)
         
         return {
             'title': title,
             'url': url,
+            'policy_id': policy_id(url),
             'content': content[:2000],  # 限制内容长度
-            'publish_date': publish_date,
-            'department': department,
+            'publish_date': metadata['publish_date'],
+            'department': metadata['department'],
+            'document_number': metadata['document_number'],
+            'index_number': metadata['index_number'],
+            'subject': metadata['subject'],
             'crawl_time': datetime.now().isoformat()
         }
 
@@ -180,7 +166,7 @@ class XuhuiTalentCrawler:
         }
         
         for category, keywords in categories.items():
-            if any(keyword in text for keyword in keywords):
+            if keyword_matcher(keywords).contains_any(text):
                 return category
         
         return "其他"
@@ -190,14 +176,16 @@ class XuhuiTalentCrawler:
         text = f"{policy['title']} {policy['content']}"
         requirements = {}
         
+        # 所有句子只扫描一遍，找出各关键词所在的句子
+        sentences = re.split(r'[。！？\n]', text)
+        hits = sentences_by_keyword(sentences, self.application_matcher)
+        
         for req_type, keywords in self.application_keywords.items():
             found_requirements = []
             
             for keyword in keywords:
-                # 查找包含关键词的句子
-                sentences = re.split(r'[。！？\n]', text)
-                for sentence in sentences:
-                    if keyword in sentence and len(sentence.strip()) > 10:
+                for sentence in (sentences[i] for i in hits.get(keyword, [])):
+                    if len(sentence.strip()) > 10:
                         cleaned = sentence.strip()
                         if cleaned and len(cleaned) > 5:
                             found_requirements.append(cleaned)
@@ -208,46 +196,88 @@ class XuhuiTalentCrawler:
         
         return requirements
 
-    def crawl_all_policies(self):
-        """爬取所有政策"""
-        print("开始爬取徐汇区人才政策...")
-        
-        # 创建输出目录
-        os.makedirs('data', exist_ok=True)
-        
+    def collect_links(self, list_pages, documents=None):
+        """
+        从列表页收集政策链接，按政策ID去重并记入抓取前沿
+        documents: 多个爬虫配置共用的 DocumentCache（见 multi_profile_crawler.py）
+        """
         all_links = []
+        for url, result in list_pages:
+            # 链接集合与上次相同的列表页直接沿用上次提取的链接
+            links = self.frontier.list_links(url, result, self.extract_policy_links, documents)
+            all_links.extend(links)
         
-        # 从各个页面收集政策链接
-        for url in self.urls:
-            html = self.fetch_page(url)
-            if html:
-                links = self.extract_policy_links(html, url)
-                all_links.extend(links)
-            time.sleep(1)  # 爬取间隔
-        
-        # 去重
+        # 按政策ID去重，同一政策的不同URL写法只保留一个
         unique_links = []
-        seen_urls = set()
+        seen_ids = set()
         for link in all_links:
-            if link['url'] not in seen_urls:
+            if policy_id(link['url']) not in seen_ids:
                 unique_links.append(link)
-                seen_urls.add(link['url'])
+                seen_ids.add(policy_id(link['url']))
         
         print(f"找到 {len(unique_links)} 个人才相关政策链接")
-        
-        # 提取每个政策的详细内容
-        for i, link in enumerate(unique_links[:20], 1):  # 限制爬取数量
+        self.frontier.mark_seen(unique_links)
+        return unique_links
+
+    def detail_candidates(self, unique_links):
+        """需要详细爬取的链接"""
+        return top_links(unique_links, 20, self.talent_matcher)  # 限制爬取数量，优先价值最高的
+
+    def process_detail_pages(self, target_links, detail_pages, documents=None):
+        """
+        提取每个政策的详细内容
+        detail_pages: {url: FetchResult}，不在其中的链接沿用上次结果
+        """
+        for i, link in enumerate(target_links, 1):
             print(f"正在处理第 {i} 个政策: {link['title'][:50]}...")
             
-            policy = self.extract_policy_content(link['url'])
+            if link['url'] not in detail_pages:
+                policy = self.frontier.get_record(link['url'])
+                if policy:
+                    self.policies.append(policy)
+                continue
+            
+            result = detail_pages[link['url']]
+            if not result.ok:
+                self.frontier.mark_failed(link['url'])
+                continue
+            
+            saved = None
+            html = documents.parse(link['url'], result.text) if documents is not None else result.text
+            policy = self.extract_policy_content(link['url'], html)
             if policy and len(policy['content']) > 100:  # 过滤掉内容太少的页面
                 policy['category'] = self.classify_policy(policy)
                 policy['application_requirements'] = self.extract_application_requirements(policy)
                 self.policies.append(policy)
+                saved = policy
             
-            time.sleep(2)  # 爬取间隔
+            self.frontier.mark_fetched(link['url'], result.content, saved)
+
+    def crawl_all_policies(self, deadline=None, budget=None):
+        """爬取所有政策"""
+        # deadline: 整次爬取的时间预算（秒）；budget: 爬取预算（CrawlBudget），见 FetchEngine.set_deadline / set_budget
+        self.engine.set_deadline(deadline)
+        self.engine.set_budget(budget)
+        print("开始爬取徐汇区人才政策...")
+        
+        # 创建输出目录
+        os.makedirs('data', exist_ok=True)
+        
+        # 并发抓取各个页面，收集政策链接：部门列表自动翻页，各搜索关键词翻页到没有足够新结果为止
+        list_pages = self.pagination.walk(self.department_codes, timeout=10)
+        list_pages += self.search.harvest(self.urls, timeout=10)
+        unique_links = self.collect_links(list_pages)
+        
+        # 并发抓取详情页，再提取每个政策的详细内容
+        # 只抓取从未抓过或已到刷新时间的详情页，其余沿用上次结果；已到截止时间或预算用完时不再抓取
+        target_links = self.detail_candidates(unique_links)
+        due_links = [] if self.engine.should_stop() else self.frontier.due(target_links)
+        detail_pages = self.engine.fetch_many([link['url'] for link in due_links], timeout=10)
+        self.process_detail_pages(target_links, detail_pages)
         
+        self.engine.report_stop_reason()
         print(f"成功爬取 {len(self.policies)} 个政策")
+        self.engine.print_summary()
 
     def analyze_and_export(self):
         """分析数据并导出"""
@@ -300,7 +330,11 @@ class XuhuiTalentCrawler:
                 '分类': policy.get('category', ''),
                 '发布部门': policy.get('department', ''),
                 '发布时间': policy.get('publish_date', ''),
+                '发文字号': policy.get('document_number', ''),
+                '索引号': policy.get('index_number', ''),
+                '主题分类': policy.get('subject', ''),
                 '链接': policy.get('url', ''),
+                '政策ID': policy_id(policy.get('url', '')),
                 '企业要求': req.get('企业要求', ''),
                 '申报条件': req.get('申报条件', ''),
                 '申报材料': req.get('申报材料', ''),